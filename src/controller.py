@@ -26,6 +26,7 @@ from .utility.pip import install_module
 from .utility.profile_settings import get_settings_dict_by_groups
 from .constants import AVAILABLE_INTEGRATIONS, AVAILABLE_WEBSEARCH, DIR_NAME, SCHEMA_ID, PROMPTS, AVAILABLE_STT, AVAILABLE_TTS, AVAILABLE_LLMS, AVAILABLE_RAGS, AVAILABLE_PROMPTS, AVAILABLE_MEMORIES, AVAILABLE_EMBEDDINGS, AVAILABLE_INTERFACES, SETTINGS_GROUPS, restore_handlers
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import pickle
 import json
 import datetime
@@ -34,6 +35,9 @@ from .extensions import ExtensionLoader
 from .utility import override_prompts
 from .utility.strings import clean_bot_response, clean_prompt, count_tokens, remove_thinking_blocks, get_edited_messages
 from .utility.context_manager import ContextManager, TrimResult
+from .utility.chat_store import ChatStore, ChatCollection
+from .utility.chat_search import merge_results
+from .utility.chunk_cache import ChunkCache
 from .utility.replacehelper import PromptFormatter, replace_variables_dict
 from enum import Enum 
 from .handlers import Handler
@@ -95,6 +99,9 @@ class NewelleController:
         chat: current chat 
         extensionloader: Extensionloader object 
     """
+    # Maximum number of tool calls of the same response running at the same time
+    MAX_PARALLEL_TOOL_CALLS = 4
+
     def chat_ids_ordered(self):
         """Return chat IDs in stable chronological order (sorted by ID)."""
         if not hasattr(self, 'chats') or not self.chats:
@@ -214,11 +221,14 @@ class NewelleController:
         self.scheduled_tasks_lock = threading.Lock()
         self.save_lock = threading.Lock()
         self.scheduler_source_id = None
+        self.pinned_chats = {}
+        self.context_embeddings = {}
 
     def ui_init(self):
         """Init necessary variables for the UI and load models and handlers"""
         self.init_paths()
         self.check_path_integrity()
+        self.chunk_cache = ChunkCache(os.path.join(self.cache_dir, "message_chunks.db"))
         skills_dirs = self._build_skills_dirs()
         self.skill_manager = SkillManager(skills_dirs, self.settings)
         self.skill_manager.discover()
@@ -243,6 +253,7 @@ class NewelleController:
             self.data_dir = os.path.join(self.config_dir, DIR_NAME)
             self.cache_dir = os.path.join(self.cache_dir, DIR_NAME)
             self.chats_path = os.path.join(self.data_dir, "chats.pkl")
+        self.chats_db_path = os.path.splitext(self.chats_path)[0] + ".db"
 
         self.pip_path = os.path.join(self.config_dir, "pip")
         self.models_dir = os.path.join(self.config_dir, "models")
@@ -303,14 +314,26 @@ class NewelleController:
         self.next_folder_id = 0
 
     def load_chats(self, chat_id):
-        """Load chats"""
+        """Load chat headers from the chat store, migrating the old pickle file if needed.
+
+        Messages are loaded on demand and only the most recently used transcripts are kept in memory.
+        """
         self.filename = "chats.pkl"
-        if os.path.exists(self.chats_path):
-            with open(self.chats_path, 'rb') as f:
-                raw = pickle.load(f)
-            self._ensure_chats_dict(raw)
+        self.chat_store = ChatStore(self.chats_db_path)
+        if self.chat_store.is_empty() and os.path.exists(self.chats_path):
+            self._migrate_chats_pickle()
+        cache_size = self.newelle_settings.chats_cache_size if hasattr(self, 'newelle_settings') else 20
+        self.chats = ChatCollection(
+            self.chat_store, cache_size, is_pinned=self.is_chat_pinned, on_unload=self._on_chat_unloaded
+        )
+        if not self.chat_store.is_empty():
+            state = self.chat_store.load_state()
+            self.chats.load_headers(self.chat_store.load_headers())
+            self.next_chat_id = state["next_chat_id"]
+            self.folders = state["folders"]
+            self.next_folder_id = state["next_folder_id"]
         else:
-            self.chats = {0: {"name": _("Chat ") + "1", "chat": []}}
+            self.chats[0] = {"name": _("Chat ") + "1", "chat": []}
             self.next_chat_id = 1
             self.folders = {}
             self.next_folder_id = 0
@@ -319,17 +342,80 @@ class NewelleController:
         if self.chats and hasattr(self, 'newelle_settings'):
             if self.newelle_settings.chat_id not in self.chats:
                 self.newelle_settings.chat_id = min(self.chats.keys())
+        threading.Thread(target=self.chat_store.build_search_index, daemon=True).start()
+
+    def is_chat_pinned(self, chat_id: int) -> bool:
+        """Return True if the messages of the chat must stay in memory"""
+        if hasattr(self, 'newelle_settings') and chat_id == self.newelle_settings.chat_id:
+            return True
+        with self.chats.lock:
+            return self.pinned_chats.get(chat_id, 0) > 0
+
+    def _on_chat_unloaded(self, chat_id: int):
+        """Drop the data kept in memory for a chat whose messages are unloaded"""
+        self.context_embeddings.pop(chat_id, None)
+
+    def pin_chat(self, chat_id: int):
+        """Keep the messages of a chat in memory, for example while it is open in a tab"""
+        with self.chats.lock:
+            self.pinned_chats[chat_id] = self.pinned_chats.get(chat_id, 0) + 1
+
+    def unpin_chat(self, chat_id: int):
+        """Release a pin obtained with pin_chat"""
+        with self.chats.lock:
+            count = self.pinned_chats.get(chat_id, 0) - 1
+            if count > 0:
+                self.pinned_chats[chat_id] = count
+            else:
+                self.pinned_chats.pop(chat_id, None)
+
+    def _migrate_chats_pickle(self):
+        """Import the old chats.pkl into the chat store and keep it as a backup"""
+        with open(self.chats_path, 'rb') as f:
+            raw = pickle.load(f)
+        self._ensure_chats_dict(raw)
+        self.chat_store.save(self.chats, self.folders, self.next_chat_id, self.next_folder_id)
+        self.chat_store.forget_all_messages()
+        os.replace(self.chats_path, self.chats_path + ".bak")
 
     def save_chats(self):
-        """Save chats"""
+        """Save chats, only the chats and messages that changed are written"""
         with self.save_lock:
-            with open(self.chats_path, 'wb') as f:
-                pickle.dump({
-                    "chats": self.chats,
-                    "next_chat_id": self.next_chat_id,
-                    "folders": self.folders,
-                    "next_folder_id": self.next_folder_id,
-                }, f)
+            self.chat_store.save(self.chats, self.folders, self.next_chat_id, self.next_folder_id)
+
+    def search_chats(self, query: str, limit: int = 20, semantic: bool = False) -> list[dict]:
+        """Search the messages of all the chats
+
+        Args:
+            query: text to search
+            limit: maximum number of results
+            semantic: also rank messages by embedding similarity, using the configured embedding handler.
+                Messages are embedded in small batches at every semantic search
+
+        Returns:
+            list[dict]: results from the most relevant, with chat_id, chat_name, position, role, snippet and score
+        """
+        index = self.chat_store.search_index
+        if index is None or not query.strip():
+            return []
+        # Get more results than needed, some may belong to hidden chats
+        results = index.search(query, limit * 2)
+        if semantic:
+            embedding = self.handlers.embedding
+            try:
+                index.index_embeddings(embedding.get_embedding, embedding.key + ":" + embedding.get_cache_model())
+                vector = embedding.get_embedding([query])[0]
+                results = merge_results([results, index.semantic_search(vector, limit * 2)], limit * 2)
+            except Exception as e:
+                print(f"Semantic chat search error: {e}")
+        found = []
+        for result in results:
+            chat = self.chats.get(result["chat_id"])
+            if chat is None or dict.get(chat, "call", False):
+                continue
+            result["chat_name"] = dict.get(chat, "name", "")
+            found.append(result)
+        return found[:limit]
 
     def create_call_chat(self):
         """Create a new call chat that won't be displayed in the chat list"""
@@ -877,6 +963,7 @@ class NewelleController:
         reload = self.newelle_settings.compare_settings(newsettings)
         if apply:
             self.newelle_settings = newsettings
+            self.chats.set_capacity(newsettings.chats_cache_size)
             for r in reload:
                 self.reload(r)
         return reload
@@ -927,6 +1014,7 @@ class NewelleController:
                 GLib.timeout_add(400, threading.Thread(target=self.handlers.rag.load).start)
             self.require_tool_update()
         elif reload_type == ReloadType.EMBEDDINGS:
+            self.context_embeddings = {}
             self.handlers.select_handlers(self.newelle_settings)
             GLib.timeout_add(300, threading.Thread(target=self.handlers.embedding.load_model).start)
         elif reload_type == ReloadType.PROMPTS:
@@ -1343,44 +1431,63 @@ class NewelleController:
     ) -> list[dict[str, str]]:
         """Format the history excluding none messages and picking the right context size
 
+        The chat is never modified: messages that need formatting are copied.
+
         Args:
             chat (): chat history, if None current is taken
+            include_last_message: include the last message of the chat
+            copy_chat: if False, messages that need no formatting are returned as the
+                chat's own dicts (no copy), so the result must be treated as read only
 
         Returns:
            chat history
         """
         if chat is None:
             chat = self.chat
-        if copy_chat:
-            chat = copy.deepcopy(chat)
         history = []
         use_fixed = self.newelle_settings.context_mode == "fixed"
         count = self.newelle_settings.memory if use_fixed else -1
-        msgs = chat[:-1] if not include_last_message else chat
-        msgs.reverse()
-        for msg in msgs:
+        end = len(chat) if include_last_message else len(chat) - 1
+        for i in range(end - 1, -1, -1):
             if count == 0:
                 break
+            msg = chat[i]
             if msg["User"] == "Console" and msg["Message"] == "None":
                 continue
-            if self.newelle_settings.remove_thinking:
-                msg["Message"] = remove_thinking_blocks(msg["Message"])
-            if msg["User"] == "File" or msg["User"] == "Folder":
-                msg["Message"] = f"```{msg['User'].lower()}\n{msg['Message'].strip()}\n```"
-                msg["User"] = "User"
-            history.insert(0,msg)
+            formatted = self._format_history_message(msg)
+            if copy_chat and formatted is msg:
+                formatted = dict(msg)
+            history.append(formatted)
             if count > 0:
                 count -= 1
+        history.reverse()
         return history
 
+    def _format_history_message(self, msg: dict[str, str]) -> dict[str, str]:
+        """Format a message for the history, returning a copy only if something changes"""
+        if self.newelle_settings.remove_thinking:
+            message = remove_thinking_blocks(msg["Message"])
+            if message != msg["Message"]:
+                msg = dict(msg)
+                msg["Message"] = message
+        if msg["User"] == "File" or msg["User"] == "Folder":
+            msg = dict(msg)
+            msg["Message"] = f"```{msg['User'].lower()}\n{msg['Message'].strip()}\n```"
+            msg["User"] = "User"
+        return msg
+
     def _trim_context(
         self,
         history: list[dict[str, str]],
         prompts: list[str],
         current_message: str,
+        chat_id: int | None = None,
     ) -> tuple[list[dict[str, str]], TrimResult | None]:
         """Trim history using the ContextManager when context-manager mode is active.
 
+        Args:
+            chat_id: Chat the history belongs to, used to reuse message embeddings across turns.
+
         Returns (trimmed_history, trim_result). trim_result is None when using fixed mode.
         """
         if self.newelle_settings.context_mode != "context-manager":
@@ -1394,44 +1501,60 @@ class NewelleController:
         else:
             llm = getattr(self.handlers, "llm", None)
 
+        summary_state = None
+        if chat_id is not None and chat_id in self.chats:
+            summary_state = self.chats[chat_id].get("context_summary")
         cm = ContextManager(
             max_tokens=self.newelle_settings.context_max,
             suggested_tokens=self.newelle_settings.context_suggested,
             embedding_handler=embedding,
             llm_handler=llm,
             summarization_enabled=self.newelle_settings.context_summarization,
+            embedding_cache=self.context_embeddings.setdefault(chat_id, {}) if chat_id is not None else None,
+            summary_state=summary_state,
         )
         result = cm.trim(history, prompts_token_count, current_message)
+        # Store the rolling summary with the chat, it is persisted on the next save
+        if chat_id is not None and chat_id in self.chats and cm.summary_state is not summary_state:
+            if cm.summary_state:
+                self.chats[chat_id]["context_summary"] = cm.summary_state
+            else:
+                # The summary no longer matches the history
+                self.chats[chat_id].pop("context_summary", None)
         self.last_trim_result = result
         return result.history, result
 
-    def get_memory_prompt(self, chat=None, chat_id=None):
+    def get_memory_prompt(self, chat=None, chat_id=None, history=None):
         """Get memory and RAG context prompts.
         
         Args:
             chat: Optional chat messages list. If None, uses current chat.
             chat_id: Optional chat ID for document indexing. If None, uses current chat_id.
+            history: Optional formatted history of the chat (without the last message),
+                as returned by get_history. Computed once here if None.
         """
         if chat is None:
             chat = self.chat
         if chat_id is None:
             chat_id = self.newelle_settings.chat_id
+        if history is None:
+            history = self.get_history(chat=chat, copy_chat=False)
             
         r = []
         if self.newelle_settings.memory_on:
             r += self.handlers.memory.get_context(
-                chat[-1]["Message"], self.get_history(chat=chat)
+                chat[-1]["Message"], history
             )
         if self.newelle_settings.rag_on:
             r += self.handlers.rag.get_context(
-                chat[-1]["Message"], self.get_history(chat=chat)
+                chat[-1]["Message"], history
             )
         if (
             self.newelle_settings.rag_on_documents
             and self.handlers.rag is not None
         ):
             documents = extract_supported_files(
-                self.get_history(chat=chat, include_last_message=True),
+                history + [self._format_history_message(m) for m in chat[-1:]],
                 self.handlers.rag.get_supported_files_reading(),
                 self.handlers.llm.get_supported_files()
             )
@@ -1503,15 +1626,18 @@ class NewelleController:
         for prompt in self.newelle_settings.bot_prompts:
             prompts.append(formatter.format(prompt))
 
+        # Format the history once, it is shared read only by memory, RAG and trimming
+        history = self.get_history(chat=chat, copy_chat=False)
+
         # Append memory
-        prompts += self.get_memory_prompt(chat=chat, chat_id=effective_chat_id)
+        prompts += self.get_memory_prompt(chat=chat, chat_id=effective_chat_id, history=history)
 
         # Set the history for the model
-        history = self.get_history(chat=chat)
         current_message = chat[-1]["Message"] if chat else ""
-        history, _ = self._trim_context(history, prompts, current_message)
-        # Let extensions preprocess the history
-        old_history = copy.deepcopy(history)
+        history, _ = self._trim_context(history, prompts, current_message, chat_id=effective_chat_id)
+        # Let extensions preprocess the history, messages are flat dicts of strings so a
+        # shallow copy of each one is enough to detect in place edits
+        old_history = [dict(m) for m in history]
         old_user_prompt = current_message
         processed_chat, prompts = self.integrationsloader.preprocess_history(chat, prompts)
         chat, prompts = self.extensionloader.preprocess_history(processed_chat, prompts)
@@ -1533,6 +1659,15 @@ class NewelleController:
             update_callback: Callback for streaming updates
             chat_id: Optional chat ID to use. If None, uses current chat_id from settings.
         """
+        effective_chat_id = chat_id if chat_id is not None else self.newelle_settings.chat_id
+        # Keep the transcript in memory while the generation holds references to it
+        self.pin_chat(effective_chat_id)
+        try:
+            yield from self._generate_response(stream_number_variable, update_callback, chat_id)
+        finally:
+            self.unpin_chat(effective_chat_id)
+
+    def _generate_response(self, stream_number_variable, update_callback, chat_id=None):
         prompts, history, old_history, old_user_prompt, chat, effective_chat_id = self.prepare_generation(chat_id=chat_id)
 
         # Handle invalid chat_id
@@ -1541,7 +1676,7 @@ class NewelleController:
             return
         
         # Check for edited messages
-        new_history = self.get_history(chat=chat)
+        new_history = self.get_history(chat=chat, copy_chat=False)
         edited_messages = get_edited_messages(new_history, old_history)
         
         if edited_messages is None:
@@ -1592,7 +1727,7 @@ class NewelleController:
             return
 
         # Post-processing
-        old_history = copy.deepcopy(chat)
+        old_history = [dict(m) for m in chat]
         chat, message_label = self.integrationsloader.postprocess_history(chat, message_label)
         chat, message_label = self.extensionloader.postprocess_history(chat, message_label)
         
@@ -1698,7 +1833,7 @@ class NewelleController:
                             prompt = current_history.pop(i)["Message"]
                             break
 
-                send_history, _ = self._trim_context(current_history, system_prompt, message)
+                send_history, _ = self._trim_context(current_history, system_prompt, message, chat_id=chat_id)
 
                 if self.handlers.llm.stream_enabled():
                     response = self.handlers.llm.send_message_stream(
@@ -1735,43 +1870,21 @@ class NewelleController:
                         self.save_chats()
                     return text_content
                 assistant_msg_uuid = int(uuid_lib.uuid4())
-                
-                for tool_call in tool_calls:
+                tool_outputs = self._run_tool_calls(
+                    tool_calls,
+                    msg_uuid,
+                    chat_id,
+                    active_tool_registry,
+                    force_tools_on_main_thread,
+                    on_tool_result_callback,
+                )
+
+                for tool_call, (tool_uuid, tool_result_output, has_output) in zip(tool_calls, tool_outputs):
                     tool_name = tool_call["name"]
                     tool_args = tool_call["args"]
-                    tool_uuid = str(uuid_lib.uuid4())[:8]
-                    
-                    try:
-                        tool = active_tool_registry.get_tool(tool_name)
-                        if tool is None:
-                            raise ValueError(f"Tool '{tool_name}' not found")
-
-                        tool_kwargs = {"msg_uuid": msg_uuid, "tool_uuid": tool_uuid, "chat_id": chat_id, **tool_args}
-                        should_run_on_main_thread = (
-                            force_tools_on_main_thread or tool.run_on_main_thread
-                        )
-
-                        if should_run_on_main_thread:
-                            result = self.execute_tool_on_main_thread(
-                                tool_name,
-                                tool_kwargs,
-                                tool_registry=active_tool_registry,
-                            )
-                        else:
-                            result = tool.execute(**tool_kwargs)
-                        if isinstance(result, ToolResult):
-                            if on_tool_result_callback:
-                                on_tool_result_callback(tool_name, result)
-                            tool_result_output = result.get_output()
-                            if tool_result_output is not None:
-                                cont = True
-                    except Exception as e:
-                        tool_result_output = f"Error: {str(e)}"
-                        if on_tool_result_callback:
-                            tr = ToolResult(output=tool_result_output)
-                            on_tool_result_callback(tool_name, tr)
-                    
-                    
+                    if has_output:
+                        cont = True
+
                     tool_call_msg = f"```json\n{{\"name\": \"{tool_name}\", \"arguments\": {json.dumps(tool_args)}}}\n```"
                     tool_result_msg = f"[Tool: {tool_name}, ID: {tool_uuid}]\n{tool_result_output}"
                     
@@ -1807,6 +1920,108 @@ class NewelleController:
             if skills_integration is not None:
                 skills_integration.set_skill_manager(original_skill_manager)
 
+    def _run_tool_calls(
+        self,
+        tool_calls: list[dict],
+        msg_uuid: int,
+        chat_id: int,
+        tool_registry: ToolRegistry,
+        force_tools_on_main_thread: bool = False,
+        on_tool_result_callback: Callable[[str, ToolResult], None] = None,
+    ) -> list[tuple[str, Any, bool]]:
+        """Execute the tool calls of a response.
+
+        Side-effect-free tools wait for their output concurrently in a bounded pool.
+        Tools running on the main thread are still started one at a time and in order.
+        Other tools wait for the previous calls to finish and finish before the next
+        call starts. Tool results are passed to the callback in the order of the calls.
+
+        Args:
+            tool_calls: tool calls, dicts with name and args
+            msg_uuid: UUID of the user message
+            chat_id: Chat ID of the tool calls
+            tool_registry: registry used to look up the tools
+            force_tools_on_main_thread: If True, start tool calls on the GTK main thread
+            on_tool_result_callback: Callback for tool results, receives (tool_name, ToolResult)
+
+        Returns:
+            (tool_uuid, output, has_output) for every tool call, in the same order
+        """
+        results = [None] * len(tool_calls)
+        pending = {}
+        # Tool results not passed to on_tool_result_callback yet, waiting for the results of the previous calls
+        ready = {}
+        next_callback = 0
+        callback_lock = threading.Lock()
+
+        def deliver(index, tool_name, result):
+            """Pass the tool results to on_tool_result_callback in the order of the calls"""
+            nonlocal next_callback
+            with callback_lock:
+                ready[index] = tool_name, result
+                while next_callback in ready:
+                    tool_name, result = ready.pop(next_callback)
+                    if on_tool_result_callback and result is not None:
+                        on_tool_result_callback(tool_name, result)
+                    next_callback += 1
+
+        def start_tool(tool, tool_name, tool_kwargs, on_main_thread):
+            if tool is None:
+                raise ValueError(f"Tool '{tool_name}' not found")
+            if on_main_thread:
+                return self.execute_tool_on_main_thread(tool_name, tool_kwargs, tool_registry=tool_registry)
+            return tool.execute(**tool_kwargs)
+
+        def finish_tool(index, tool_name, tool_uuid, start):
+            try:
+                result = start()
+                if isinstance(result, ToolResult):
+                    deliver(index, tool_name, result)
+                    output = result.get_output()
+                    return tool_uuid, output, output is not None
+                deliver(index, tool_name, None)
+                return tool_uuid, result, False
+            except Exception as e:
+                output = f"Error: {str(e)}"
+                deliver(index, tool_name, ToolResult(output=output))
+                return tool_uuid, output, False
+
+        def wait_pending():
+            for index, future in pending.items():
+                results[index] = future.result()
+            pending.clear()
+
+        with ThreadPoolExecutor(max_workers=self.MAX_PARALLEL_TOOL_CALLS) as executor:
+            for index, tool_call in enumerate(tool_calls):
+                tool_name = tool_call["name"]
+                tool_uuid = str(uuid_lib.uuid4())[:8]
+                tool = tool_registry.get_tool(tool_name)
+                tool_kwargs = {"msg_uuid": msg_uuid, "tool_uuid": tool_uuid, "chat_id": chat_id, **tool_call["args"]}
+                on_main_thread = tool is not None and (force_tools_on_main_thread or tool.run_on_main_thread)
+                concurrent = tool is not None and tool.side_effect_free
+
+                if not concurrent:
+                    wait_pending()
+                    results[index] = finish_tool(
+                        index, tool_name, tool_uuid, lambda: start_tool(tool, tool_name, tool_kwargs, on_main_thread)
+                    )
+                elif on_main_thread:
+                    # Start on the main thread in order, wait for the output in the pool
+                    try:
+                        started = start_tool(tool, tool_name, tool_kwargs, True)
+                        start = lambda started=started: started
+                    except Exception as e:
+                        def start(error=e):
+                            raise error
+                    pending[index] = executor.submit(finish_tool, index, tool_name, tool_uuid, start)
+                else:
+                    pending[index] = executor.submit(
+                        finish_tool, index, tool_name, tool_uuid,
+                        lambda tool=tool, tool_name=tool_name, tool_kwargs=tool_kwargs: start_tool(tool, tool_name, tool_kwargs, False)
+                    )
+            wait_pending()
+        return results
+
     def execute_tool_on_main_thread(
         self,
         tool_name: str,
@@ -1942,6 +2157,7 @@ class NewelleSettings:
         self.monospace_font_size = settings.get_int("monospace-font-size")
         self.monospace_line_height = settings.get_double("monospace-line-height")
         self.hide_warning = settings.get_boolean("hide-warning")
+        self.chats_cache_size = settings.get_int("chats-cache-size")
         self.load_prompts()
         # Adjust paths
         if os.path.exists(os.path.expanduser(self.main_path)):
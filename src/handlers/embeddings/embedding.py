@@ -1,30 +1,79 @@
 from ..handler import Handler
 from abc import abstractmethod
+from contextlib import contextmanager
+from functools import wraps
 from numpy import ndarray
+import numpy as np
+import hashlib
+import os
+import threading
+from .embedding_cache import EmbeddingCache
+
+
+def cached_embedding(get_embedding):
+    """Wrap a get_embedding implementation to use the handler embedding cache"""
+    @wraps(get_embedding)
+    def wrapper(self, text: list[str]) -> ndarray:
+        if isinstance(text, str):
+            text = [text]
+        if len(text) == 0:
+            return get_embedding(self, text)
+        with self.use_cache() as cache:
+            if cache is None:
+                return get_embedding(self, text)
+            keys = [cache.hash_text(t) for t in text]
+            found = cache.get(keys)
+            missing = {}
+            for key, t in zip(keys, text):
+                if key not in found:
+                    missing.setdefault(key, t)
+            if len(missing) > 0:
+                computed = get_embedding(self, list(missing.values()))
+                computed_array = np.asarray(computed, dtype=np.float32)
+                if computed_array.ndim != 2 or len(computed_array) != len(missing):
+                    # Unexpected result, let the handler answer the whole request
+                    return computed if len(found) == 0 else get_embedding(self, text)
+                cache.put(list(missing.keys()), computed_array)
+                found.update(zip(missing.keys(), computed_array))
+            return np.stack([found[key] for key in keys])
+    wrapper.cached = True
+    return wrapper
+
 
 class EmbeddingHandler(Handler):
     key = ""
     schema_key = "embedding-settings"
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every implementation of get_embedding goes through the embedding cache
+        get_embedding = cls.__dict__.get("get_embedding")
+        if get_embedding is not None and not getattr(get_embedding, "cached", False):
+            cls.get_embedding = cached_embedding(get_embedding)
 
     def __init__(self, settings, path):
         super().__init__(settings, path)
-        self.dim = None 
+        self.dim = None
+        self.cache = None
+        self.cache_model = None
+        # Guards cache and cache_model, a cache is closed only when no thread uses it
+        self._cache_lock = threading.Lock()
+        self._cache_users = {}
 
     def load_model(self):
         """Load embedding model, called at every settings reload"""
-        pass 
+        pass
 
-    @abstractmethod 
+    @abstractmethod
     def get_embedding(self, text: list[str]) -> ndarray:
         """
         Get the embedding for the given text
 
         Args:
-            text: text to embed 
+            text: text to embed
 
         Returns:
-            ndarray: embedding 
+            ndarray: embedding
         """
         pass
 
@@ -32,3 +81,82 @@ class EmbeddingHandler(Handler):
         if self.dim is None:
             self.dim = self.get_embedding(["test"]).shape[1]
         return self.dim
+
+    def get_cache_model(self) -> str:
+        """Get the identifier of the model used to compute the embeddings, used as cache key
+
+        Returns:
+            str: model identifier
+        """
+        return str(self.get_setting("model", False, ""))
+
+    def get_cache(self) -> EmbeddingCache | None:
+        """Get the on-disk embedding cache for the current model
+
+        The cache may be closed as soon as the model changes, use use_cache to keep it open.
+
+        Returns:
+            EmbeddingCache | None: the cache, None if it can not be opened
+        """
+        with self._cache_lock:
+            return self._get_current_cache()
+
+    @contextmanager
+    def use_cache(self):
+        """Context manager giving the embedding cache for the current model, None if it can not be opened.
+
+        The cache is not closed while it is used, even if the model changes in the meantime.
+        """
+        with self._cache_lock:
+            cache = self._get_current_cache()
+            if cache is not None:
+                self._cache_users[cache] = self._cache_users.get(cache, 0) + 1
+        try:
+            yield cache
+        finally:
+            if cache is not None:
+                with self._cache_lock:
+                    self._cache_users[cache] -= 1
+                    if self._cache_users[cache] == 0:
+                        del self._cache_users[cache]
+                        if cache is not self.cache:
+                            # Replaced while it was used
+                            cache.close()
+
+    def _get_current_cache(self) -> EmbeddingCache | None:
+        model = self.key + ":" + self.get_cache_model()
+        if self.cache_model == model:
+            return self.cache
+        self._retire_cache()
+        self.cache_model = model
+        try:
+            name = hashlib.sha1(model.encode("utf-8")).hexdigest()[:16]
+            self.cache = EmbeddingCache(os.path.join(self.path, "embeddings_cache", name))
+        except Exception as e:
+            print(f"Could not open embedding cache: {e}")
+        return self.cache
+
+    def _retire_cache(self):
+        """Detach the current cache, it is closed now or when its last user releases it"""
+        if self.cache is not None and self.cache not in self._cache_users:
+            self.cache.close()
+        self.cache = None
+        self.cache_model = None
+
+    def get_cache_stats(self) -> dict:
+        """Get the statistics of the embedding cache of the current model
+
+        Returns:
+            dict: cache hits, misses, number of entries and size in bytes
+        """
+        with self.use_cache() as cache:
+            if cache is None:
+                return {"hits": 0, "misses": 0, "entries": 0, "size": 0}
+            return cache.get_stats()
+
+    def close_cache(self):
+        with self._cache_lock:
+            self._retire_cache()
+
+    def destroy(self):
+        self.close_cache()
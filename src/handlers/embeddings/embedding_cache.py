@@ -0,0 +1,185 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+# Default maximum size of the vectors of a single model, in bytes
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+
+class EmbeddingCache:
+    """Content addressed on-disk cache of the embeddings of a single model
+
+    Vectors are kept in a memory mapped float32 matrix, a SQLite index maps the
+    hash of every text to its row. When the size limit is reached the rows of the
+    least recently used texts are reused.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.vectors = None
+        self.capacity = 0
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.db = sqlite3.connect(os.path.join(path, "index.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS entries (hash BLOB PRIMARY KEY, row INTEGER NOT NULL, used INTEGER NOT NULL) WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self.db.commit()
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        self.dim = meta.get("dim")
+        self.clock = meta.get("clock", 0)
+        self.rows = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if self.dim is not None:
+            self._open_vectors()
+
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        """Get the key of a text in the cache"""
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest()
+
+    def get(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Get the cached embeddings for the given keys
+
+        Args:
+            keys: hashes of the texts, see hash_text
+
+        Returns:
+            dict[bytes, np.ndarray]: embeddings of the keys found in the cache
+        """
+        with self.lock:
+            unique = list(dict.fromkeys(keys))
+            found = {}
+            if self.vectors is not None:
+                for i in range(0, len(unique), 500):
+                    chunk = unique[i:i + 500]
+                    query = "SELECT hash, row FROM entries WHERE hash IN ({})".format(",".join("?" * len(chunk)))
+                    for key, row in self.db.execute(query, chunk):
+                        found[key] = row
+            if found:
+                self.clock += 1
+                self.db.executemany("UPDATE entries SET used = ? WHERE hash = ?", [(self.clock, key) for key in found])
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('clock', ?)", (self.clock,))
+                self.db.commit()
+                rows = np.array(list(found.values()))
+                found = dict(zip(found.keys(), np.array(self.vectors[rows])))
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+            return found
+
+    def put(self, keys: list[bytes], vectors: np.ndarray):
+        """Add embeddings to the cache, evicting the least recently used ones if needed
+
+        Args:
+            keys: hashes of the texts, see hash_text
+            vectors: embeddings of the texts, one row for each key
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(keys) or len(keys) == 0:
+            return
+        with self.lock:
+            if self.dim != vectors.shape[1]:
+                # Different model output size, old vectors are useless
+                self._reset(vectors.shape[1])
+            new = {}
+            for key, vector in zip(keys, vectors):
+                new[key] = vector
+            max_rows = max(1, self.max_size // (self.dim * 4))
+            if len(new) > max_rows:
+                new = dict(list(new.items())[-max_rows:])
+            # Keep the rows of texts that are already cached
+            existing = {}
+            keys = list(new.keys())
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                query = "SELECT hash, row FROM entries WHERE hash IN ({})".format(",".join("?" * len(chunk)))
+                existing.update(self.db.execute(query, chunk))
+            missing = [key for key in keys if key not in existing]
+            self.clock += 1
+            self.db.executemany("UPDATE entries SET used = ? WHERE hash = ?", [(self.clock, key) for key in existing])
+            free = max(0, max_rows - self.rows)
+            rows = list(range(self.rows, self.rows + min(free, len(missing))))
+            self.rows += len(rows)
+            if len(rows) < len(missing):
+                evicted = self.db.execute(
+                    "SELECT hash, row FROM entries WHERE used < ? ORDER BY used LIMIT ?",
+                    (self.clock, len(missing) - len(rows))
+                ).fetchall()
+                self.db.executemany("DELETE FROM entries WHERE hash = ?", [(key,) for key, _ in evicted])
+                rows += [row for _, row in evicted]
+            self._ensure_capacity(max(rows, default=-1) + 1)
+            assigned = dict(existing)
+            assigned.update(zip(missing, rows))
+            for key, row in assigned.items():
+                self.vectors[row] = new[key]
+            self.vectors.flush()
+            self.db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", [(key, row, self.clock) for key, row in assigned.items()])
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('clock', ?)", (self.clock,))
+            self.db.commit()
+
+    def clear(self):
+        """Remove every embedding from the cache"""
+        with self.lock:
+            self._reset(self.dim)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics
+
+        Returns:
+            dict: number of hits and misses, cached entries and size on disk in bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self.rows,
+            "size": self.capacity * (self.dim or 0) * 4,
+        }
+
+    def close(self):
+        with self.lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+                self.vectors = None
+            self.db.close()
+
+    def _open_vectors(self):
+        self.vectors = None
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        self.capacity = size // (self.dim * 4)
+        if self.capacity < self.rows:
+            # Vectors file lost or truncated, the index can not be trusted
+            self._reset(self.dim)
+            return
+        if self.capacity > 0:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self.capacity:
+            return
+        max_rows = max(1, self.max_size // (self.dim * 4))
+        capacity = min(max(rows, self.capacity * 2, 1024), max(max_rows, rows))
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open_vectors()
+
+    def _reset(self, dim: int | None):
+        self.db.execute("DELETE FROM entries")
+        if dim is not None:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (dim,))
+        self.db.commit()
+        self.vectors = None
+        self.capacity = 0
+        self.rows = 0
+        self.dim = dim
+        with open(self.vectors_path, "wb"):
+            pass
@@ -14,12 +14,23 @@ import shutil
 import tarfile
 import tempfile
 import atexit
+from concurrent.futures import ThreadPoolExecutor
 from gi.repository import Gtk, Adw, GLib, Gdk
 import requests
 import numpy as np
 
 class LlamaCPPEmbeddingHandler(EmbeddingHandler):
     key = "llamacppembedding"
+    # Physical batch size of llama-server: every input must fit in it
+    MAX_INPUT_TOKENS = 512
+    # Logical batch size, used to pack several inputs in the same request
+    BATCH_TOKENS = 2048
+    # Number of server slots and of requests sent at the same time
+    MAX_CONCURRENT_BATCHES = 4
+    # Statuses returned by the server when a batch is too large, the batch is split instead of retried
+    BATCH_REJECTED_STATUSES = (400, 413)
+    # Statuses returned by servers without the tokenize endpoint
+    TOKENIZE_UNSUPPORTED_STATUSES = (404, 501)
 
     def get_cache_path(self):
         cache_dir = self.path
@@ -54,6 +65,8 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
         atexit.register(self._atexit_handler)
         self.port = None
         self.loaded_model = None
+        self.session = None
+        self.tokenize_supported = True
         self.models = self.get_custom_model_list()
         self.loaded_on = self.get_setting("gpu_acceleration", False, False)
         self.downloading = {}
@@ -201,7 +214,10 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
             cmd_path = self.llama_server_path
         else:
             cmd_path = "llama-server"
-        cmd = [cmd_path, "--model", path, "--port", str(self.port), "--host", "127.0.0.1", "--embeddings" ]
+        cmd = [cmd_path, "--model", path, "--port", str(self.port), "--host", "127.0.0.1", "--embeddings",
+               "--batch-size", str(self.BATCH_TOKENS), "--ubatch-size", str(self.MAX_INPUT_TOKENS),
+               "--parallel", str(self.MAX_CONCURRENT_BATCHES),
+               "--ctx-size", str(self.MAX_INPUT_TOKENS * self.MAX_CONCURRENT_BATCHES)]
         # Use flatpak-spawn for compiled or prebuilt CUDA binaries in Flatpak
         is_prebuilt = self.get_setting("prebuilt", False, False)
         is_cuda_binary = is_prebuilt and self.get_setting("prebuilt_cuda", False, False)
@@ -210,6 +226,7 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
 
         self.server_process = subprocess.Popen(cmd)
         self._killing_server = False
+        self.tokenize_supported = True
         threading.Thread(target=self._monitor_server, daemon=True).start()
         self.loaded_model = model
         self.loaded_on = self.get_setting("gpu_acceleration", False, False)
@@ -218,11 +235,11 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
         start_time = time.time()
         while time.time() - start_time < 60: # 60 seconds timeout
             try:
-                if requests.get(url).status_code == 200:
+                if self.get_session().get(url).status_code == 200:
                     # Verify embeddings work with a test request
                     try:
                         test_url = f"http://localhost:{self.port}/v1/embeddings"
-                        test_response = requests.post(
+                        test_response = self.get_session().post(
                             test_url,
                             headers={"Content-Type": "application/json"},
                             json={"input": "test", "model": model},
@@ -273,6 +290,10 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
     
     def destroy(self):
         self.kill_server()
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        super().destroy()
         try:
             atexit.unregister(self._atexit_handler)
         except AttributeError:
@@ -1259,14 +1280,20 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
         clipboard.set(text)
 
     # Embedding methods
+    def get_session(self) -> requests.Session:
+        """Get the HTTP session used for every request to llama-server, keeping connections alive"""
+        if self.session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.MAX_CONCURRENT_BATCHES)
+            session.mount("http://", adapter)
+            self.session = session
+        return self.session
+
     def truncate_text(self, text: str, max_tokens: int = 256) -> str:
-        """Truncate text to approximately max_tokens to avoid context length issues
-        
-        The llama-server has a default batch size of 512 tokens, so we use 256
-        as a safe limit to account for tokenization variations.
+        """Truncate text to approximately max_tokens, used when the server can not tokenize
+
+        Conservative estimate: 1 token ≈ 3 characters on average
         """
-        # Conservative estimate: 1 token ≈ 3 characters on average
-        # Using 256 tokens max to stay well under the 512 batch size limit
         max_chars = max_tokens * 3
         if len(text) > max_chars:
             truncated = text[:max_chars]
@@ -1277,82 +1304,119 @@ class LlamaCPPEmbeddingHandler(EmbeddingHandler):
             return truncated
         return text
 
+    def prepare_text(self, text: str) -> tuple[str, int]:
+        """Truncate a text to fit in the server batch using the server tokenizer
+
+        Returns:
+            tuple[str, int]: the text to embed and an upper bound of its token count
+        """
+        # Leave room for the special tokens added by the server
+        max_tokens = self.MAX_INPUT_TOKENS - 4
+        # Every token is at least one byte, so short texts never need tokenization
+        size = len(text.encode("utf-8"))
+        if size <= max_tokens:
+            return text, size
+        if self.tokenize_supported:
+            try:
+                base_url = f"http://localhost:{self.port}"
+                response = self.get_session().post(base_url + "/tokenize", json={"content": text}, timeout=30)
+                response.raise_for_status()
+                tokens = response.json()["tokens"]
+                if len(tokens) <= max_tokens:
+                    return text, len(tokens)
+                response = self.get_session().post(base_url + "/detokenize", json={"tokens": tokens[:max_tokens]}, timeout=30)
+                response.raise_for_status()
+                return response.json()["content"], max_tokens
+            except Exception as e:
+                print(f"Tokenization failed, using estimated truncation: {e}")
+                response = getattr(e, "response", None)
+                if response is not None and response.status_code in self.TOKENIZE_UNSUPPORTED_STATUSES:
+                    self.tokenize_supported = False
+        text = self.truncate_text(text, 256)
+        return text, min(len(text.encode("utf-8")), max_tokens)
+
+    def make_batches(self, prepared: list[tuple[str, int]]) -> list[list[int]]:
+        """Group the inputs in batches that fit the server logical batch size
+
+        Returns:
+            list[list[int]]: indexes of the inputs in every batch
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        for i, (_, tokens) in enumerate(prepared):
+            if current and current_tokens + tokens > self.BATCH_TOKENS:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of texts, splitting it in half if the server rejects its size"""
+        url = f"http://localhost:{self.port}/v1/embeddings"
+        max_retries = 5
+        rejected = None
+        for attempt in range(max_retries):
+            try:
+                response = self.get_session().post(url, json={"input": texts, "model": self.loaded_model})
+                if response.status_code == 200:
+                    data = response.json()
+                    if "data" in data and len(data["data"]) == len(texts):
+                        # Sort by index to maintain order
+                        sorted_data = sorted(data["data"], key=lambda x: x.get("index", 0))
+                        return [item["embedding"] for item in sorted_data]
+                    raise Exception(f"Invalid response format: {str(data)[:500]}")
+                error_text = response.text[:500] if response.text else "No error details"
+                if response.status_code in self.BATCH_REJECTED_STATUSES:
+                    rejected = f"HTTP {response.status_code}: {error_text}"
+                    break
+                raise Exception(f"HTTP {response.status_code}: {error_text}")
+            except requests.exceptions.ConnectionError:
+                if attempt == max_retries - 1:
+                    raise
+            except Exception as e:
+                print(f"Embedding request failed (attempt {attempt + 1}/{max_retries}): {e}")
+                if attempt == max_retries - 1:
+                    raise
+            time.sleep(0.5 * (attempt + 1))  # Backoff only after failures: 0.5s, 1s, 1.5s, 2s
+        if len(texts) <= 1:
+            # A single text that is rejected would be rejected again
+            raise Exception(rejected)
+        # The batch does not fit the server, embed the halves separately outside of the retry loop
+        half = len(texts) // 2
+        return self.embed_batch(texts[:half]) + self.embed_batch(texts[half:])
+
     def get_embedding(self, text: list[str]) -> np.ndarray:
-        """Get embeddings for a list of texts using llama-server's embedding endpoint"""
+        """Get embeddings for a list of texts using llama-server's embedding endpoint
+
+        Texts are truncated with the server tokenizer, packed in batches that fit the
+        server batch size and the batches are sent concurrently over a pooled session.
+        """
         # Ensure model is loaded and server is running
         if self.loaded_model is None or self.server_process is None:
             if not self.load_model():
                 raise Exception("Failed to load model")
-        
-        # Call the embeddings endpoint
-        url = f"http://localhost:{self.port}/v1/embeddings"
-        headers = {"Content-Type": "application/json"}
-        
+
         # Handle both single text and list of texts
         if isinstance(text, str):
             text = [text]
-        
-        # Truncate texts to avoid context length issues (500 error)
-        truncated_texts = [self.truncate_text(t) for t in text]
-        
-        # Try batch request first (more efficient)
-        try:
-            payload = {
-                "input": truncated_texts,
-                "model": self.loaded_model
-            }
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                data = response.json()
-                
-                if "data" in data and len(data["data"]) > 0:
-                    # Sort by index to maintain order
-                    sorted_data = sorted(data["data"], key=lambda x: x.get("index", 0))
-                    embeddings = [item["embedding"] for item in sorted_data]
-                    return np.array(embeddings)
-            else:
-                print(f"Batch embedding failed with status {response.status_code}: {response.text}")
-        except Exception as e:
-            print(f"Batch embedding failed, falling back to individual requests: {e}")
-        
-        # Fallback: Process individually with retry logic and pacing
-        embeddings = []
-        for i, t in enumerate(truncated_texts):
-            payload = {
-                "input": t,
-                "model": self.loaded_model
-            }
-            
-            # Retry logic for individual requests
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(url, headers=headers, json=payload)
-                    if response.status_code != 200:
-                        error_text = response.text[:500] if response.text else "No error details"
-                        print(f"Embedding request failed with status {response.status_code}: {error_text}")
-                        raise Exception(f"HTTP {response.status_code}: {error_text}")
-                    
-                    data = response.json()
-                    
-                    if "data" in data and len(data["data"]) > 0:
-                        embeddings.append(data["data"][0]["embedding"])
-                        break
-                    else:
-                        raise Exception(f"Invalid response format: {data}")
-                except Exception as e:
-                    print(f"Error getting embedding for text {i+1}/{len(text)} (attempt {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(0.5 * (attempt + 1))  # Exponential backoff: 0.5s, 1s, 1.5s, 2s, 2.5s
-                    else:
-                        raise
-            
-            # Small delay between requests to avoid overwhelming the server
-            if i < len(text) - 1:
-                time.sleep(0.1)
-        
+        if len(text) == 0:
+            return np.array([])
+
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_BATCHES) as executor:
+            prepared = list(executor.map(self.prepare_text, text))
+            batches = self.make_batches(prepared)
+            results = executor.map(lambda batch: self.embed_batch([prepared[i][0] for i in batch]), batches)
+            embeddings = [None] * len(text)
+            for batch, batch_embeddings in zip(batches, results):
+                for i, embedding in zip(batch, batch_embeddings):
+                    embeddings[i] = embedding
         return np.array(embeddings)
-    
+
     def get_embedding_size(self) -> int:
         """Get the embedding dimension for the loaded model"""
         if self.dim is None:
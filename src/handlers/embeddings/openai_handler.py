@@ -87,6 +87,9 @@ class OpenAIEmbeddingHandler(EmbeddingHandler):
             res.append(emb.embedding)
         return np.array(res)
         
+    def get_cache_model(self) -> str:
+        return str(self.get_setting("endpoint")) + ":" + str(self.get_setting("model"))
+
     def get_embedding_size(self) -> int:
         model = self.get_setting("model")
         if model == "text-embedding-3-small":
@@ -37,5 +37,8 @@ class WordLlamaHandler(EmbeddingHandler):
         else:
             return np.array([])
 
+    def get_cache_model(self) -> str:
+        return self.get_setting("model_size")
+
     def get_embedding_size(self) -> int:
         return int(self.get_setting("model_size"))
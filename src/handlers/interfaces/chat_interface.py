@@ -517,7 +517,7 @@ class ChatInterface(Interface):
                 continue
             marker = "▶" if cid == current_chat_id else " "
             name = chat.get("name", f"Chat {cid}")
-            msg_count = len(chat.get("chat", []))
+            msg_count = chat.message_count
             lines.append(f"{marker} {cid}. {name} ({msg_count} messages)"[:80])
         if not lines:
             return "📭 No chats available."
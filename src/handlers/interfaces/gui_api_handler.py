@@ -241,7 +241,7 @@ class GUIAPIInterface(Interface):
                 entry = {
                     "id": cid,
                     "name": chat_data.get("name", ""),
-                    "message_count": len(chat_data.get("chat", [])),
+                    "message_count": chat_data.message_count,
                     "folder_id": controller.get_folder_for_chat(cid),
                     "profile": chat_data.get("profile"),
                     "call": chat_data.get("call", False),
@@ -290,7 +290,7 @@ class GUIAPIInterface(Interface):
                 raise HTTPException(status_code=404, detail="Chat not found")
             return {
                 "id": chat_id,
-                "data": controller.chats[chat_id],
+                "data": controller.chats[chat_id].copy(),
             }
 
         @app.put("/api/chats/{chat_id}")
@@ -321,6 +321,7 @@ class LlamaCPPHandler(OpenAIHandler):
             atexit.unregister(self._atexit_handler)
         except AttributeError:
             pass
+        super().destroy()
 
     # Model library
     def fetch_models(self):
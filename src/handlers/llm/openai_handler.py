@@ -1,6 +1,7 @@
 import threading
 import json
 import gettext
+from contextlib import contextmanager
 from typing import Any, Callable
 
 _ = gettext.gettext
@@ -10,9 +11,67 @@ from ...utility.system import open_website
 from ...utility import convert_history_openai, get_streaming_extra_setting, extract_tools_from_prompts, balance_native_tool_call_responses
 from ...handlers import ExtraSettings, ErrorSeverity
 
+
+class OpenAIClientPool:
+    """Shared OpenAI clients, keyed by endpoint, API key and headers.
+
+    Reusing the same client across requests keeps the HTTP connections alive,
+    avoiding a new connection and TLS handshake for every generation.
+    """
+
+    def __init__(self):
+        self.clients = {}
+        # Number of requests using each client
+        self.users = {}
+        self.lock = threading.Lock()
+
+    def _key(self, api_key: str, base_url: str | None, headers: dict | None) -> tuple:
+        return (api_key, base_url, json.dumps(headers or {}, sort_keys=True))
+
+    @contextmanager
+    def use(self, api_key: str, base_url: str | None, headers: dict | None = None):
+        """Context manager giving the client for the given parameters, creating it if needed.
+
+        The client is not closed while it is used, even if it is invalidated in the meantime.
+        """
+        key = self._key(api_key, base_url, headers)
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                from openai import OpenAI
+                client = OpenAI(api_key=api_key, base_url=base_url, default_headers=headers or None)
+                self.clients[key] = client
+            self.users[client] = self.users.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            with self.lock:
+                self.users[client] -= 1
+                if self.users[client] == 0:
+                    del self.users[client]
+                    if self.clients.get(key) is not client:
+                        # Invalidated while it was used
+                        client.close()
+
+    def invalidate(self, api_key: str, base_url: str | None):
+        """Remove the clients of an endpoint and API key from the pool, whatever their headers.
+
+        Clients are closed now, or when the last request using them finishes.
+        """
+        with self.lock:
+            for key in [key for key in self.clients if key[:2] == (api_key, base_url)]:
+                client = self.clients.pop(key)
+                if client not in self.users:
+                    client.close()
+
+
+client_pool = OpenAIClientPool()
+
+
 class OpenAIHandler(LLMHandler):
     key = "openai"
     default_models = (("gpt-3.5-turbo", "gpt-3.5-turbo"), )
+    client_settings = ("api", "endpoint", "custom_headers")
     def __init__(self, settings, path):
         super().__init__(settings, path)
         if self.get_setting("models", False) is None:
@@ -24,6 +83,33 @@ class OpenAIHandler(LLMHandler):
     def get_models_list(self):
         return self.models
 
+    def get_api_key(self) -> str | None:
+        api = self.get_setting("api")
+        if api == "":
+            api = "nokey"
+        return api
+
+    def use_client(self, headers: dict):
+        """Context manager giving the pooled OpenAI client for the current endpoint and API key
+
+        Args:
+            headers: extra headers of the request, resolved once by the caller
+        """
+        return client_pool.use(self.get_api_key(), self.get_setting("endpoint"), headers)
+
+    def invalidate_client(self):
+        """Drop the pooled clients for the current endpoint and API key"""
+        client_pool.invalidate(self.get_api_key(), self.get_setting("endpoint"))
+
+    def set_setting(self, key: str, value):
+        if key in self.client_settings:
+            self.invalidate_client()
+        super().set_setting(key, value)
+
+    def destroy(self):
+        self.invalidate_client()
+        super().destroy()
+
     def set_secondary_settings(self, secondary: bool):
         if self.key != "openai":
             endpoint = self.get_setting("endpoint", search_default=False)
@@ -35,15 +121,14 @@ class OpenAIHandler(LLMHandler):
     def get_models(self, manual=False):
         if self.is_installed():
             try:
-                import openai
                 api = self.get_setting("api", False)
                 if api is None:
                     return
-                client = openai.Client(api_key=api, base_url=self.get_setting("endpoint"), default_headers=self.get_extra_headers())
-                models = client.models.list()
-                result = tuple()
-                for model in models:
-                    result += ((model.id, model.id,), )
+                with client_pool.use(api, self.get_setting("endpoint"), self.get_extra_headers()) as client:
+                    models = client.models.list()
+                    result = tuple()
+                    for model in models:
+                        result += ((model.id, model.id,), )
                 self.models = result
                 self.set_setting("models", json.dumps(result))
                 self.settings_update()
@@ -197,8 +282,6 @@ class OpenAIHandler(LLMHandler):
         return {"reasoning_effort": thinking_effort} 
 
     def generate_text(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = []) -> str:
-        from openai import OpenAI
-        
         native_tool_calling = self.get_setting("native_tool_calling", False, True)
         if native_tool_calling:
             tools_list, system_prompt = extract_tools_from_prompts(system_prompt)
@@ -213,53 +296,46 @@ class OpenAIHandler(LLMHandler):
         messages = self.convert_history(history, system_prompt)
         if native_tool_calling:
             messages = balance_native_tool_call_responses(messages)
-        api = self.get_setting("api")
-        if api == "":
-            api = "nokey"
-        
-        client = OpenAI(
-            api_key=api,
-            base_url=self.get_setting("endpoint")
-        )
+        headers = self.get_extra_headers()
         top_p, temperature, presence_penalty, frequency_penalty = self.get_advanced_params()
         thinking_params = self.get_thinking_params()
         extra_body = self.get_extra_body()
         extra_body.update(thinking_params)
 
-        try:
-            kwargs = {
-                "model": self.get_setting("model"),
-                "messages": messages,
-                "top_p": top_p,
-                "temperature": temperature,
-                "presence_penalty": presence_penalty,
-                "frequency_penalty": frequency_penalty,
-                "extra_body": extra_body,
-                "extra_headers": self.get_extra_headers(),
-            }
-            if tools_list:
-                kwargs["tools"] = tools_list
-            response = client.chat.completions.create(**kwargs)
-            if not hasattr(response, "choices") or response.choices is None or len(response.choices) == 0:
-                raise Exception(str(response))
+        with self.use_client(headers) as client:
+            try:
+                kwargs = {
+                    "model": self.get_setting("model"),
+                    "messages": messages,
+                    "top_p": top_p,
+                    "temperature": temperature,
+                    "presence_penalty": presence_penalty,
+                    "frequency_penalty": frequency_penalty,
+                    "extra_body": extra_body,
+                    "extra_headers": headers,
+                }
+                if tools_list:
+                    kwargs["tools"] = tools_list
+                response = client.chat.completions.create(**kwargs)
+                if not hasattr(response, "choices") or response.choices is None or len(response.choices) == 0:
+                    raise Exception(str(response))
             
-            content = response.choices[0].message.content or ""
-            if hasattr(response.choices[0].message, "tool_calls") and response.choices[0].message.tool_calls is not None:
-                for tool_call in response.choices[0].message.tool_calls:
-                    tool = tool_call.function
-                    tool_call_dict = {"tool": tool.name, "arguments": json.loads(tool.arguments) if tool.arguments else {}}
-                    tc_id = getattr(tool_call, "id", None)
-                    if tc_id:
-                        tool_call_dict["id"] = tc_id
-                    content += "```json\n" + json.dumps(tool_call_dict) + "\n```\n"
-
-            return content.strip()
-        except Exception as e:
-            raise e
+                content = response.choices[0].message.content or ""
+                if hasattr(response.choices[0].message, "tool_calls") and response.choices[0].message.tool_calls is not None:
+                    for tool_call in response.choices[0].message.tool_calls:
+                        tool = tool_call.function
+                        tool_call_dict = {"tool": tool.name, "arguments": json.loads(tool.arguments) if tool.arguments else {}}
+                        tc_id = getattr(tool_call, "id", None)
+                        if tc_id:
+                            tool_call_dict["id"] = tc_id
+                        content += "```json\n" + json.dumps(tool_call_dict) + "\n```\n"
+
+                return content.strip()
+            except Exception as e:
+                raise e
     
     def generate_text_stream(self, prompt: str, history: list[dict[str, str]] = [], system_prompt: list[str] = [], on_update: Callable[[str], Any] = lambda _: None, extra_args: list = []) -> str:
         self.running = True
-        from openai import OpenAI
         
         native_tool_calling = self.get_setting("native_tool_calling", False, True)
         if native_tool_calling:
@@ -275,109 +351,104 @@ class OpenAIHandler(LLMHandler):
         messages = self.convert_history(history, system_prompt)
         if native_tool_calling:
             messages = balance_native_tool_call_responses(messages)
-        api = self.get_setting("api")
-        if api == "":
-            api = "nokey"
-        client = OpenAI(
-            api_key=api,
-            base_url=self.get_setting("endpoint")
-        )
+        headers = self.get_extra_headers()
         top_p, temperature, presence_penalty, frequency_penalty = self.get_advanced_params()
         thinking_params = self.get_thinking_params()
         extra_body = self.get_extra_body()
         extra_body.update(thinking_params)
 
-        try:
-            kwargs = {
-                "model": self.get_setting("model"),
-                "messages": messages,
-                "top_p": top_p,
-                "temperature": temperature,
-                "presence_penalty": presence_penalty,
-                "frequency_penalty": frequency_penalty,
-                "stream": True,
-                "extra_headers": self.get_extra_headers(),
-                "extra_body": extra_body,
-            }
-            if tools_list:
-                kwargs["tools"] = tools_list
-            response = client.chat.completions.create(**kwargs)
-            full_message = ""
-            prev_message = ""
-            is_reasoning = False
-            # Track ongoing tool calls
-            tool_calls = {}
-
-            for chunk in response:
-                if not self.running:
-                    response.close()
-                    break
-                if len(chunk.choices) == 0:
-                    continue
+        with self.use_client(headers) as client:
+            try:
+                kwargs = {
+                    "model": self.get_setting("model"),
+                    "messages": messages,
+                    "top_p": top_p,
+                    "temperature": temperature,
+                    "presence_penalty": presence_penalty,
+                    "frequency_penalty": frequency_penalty,
+                    "stream": True,
+                    "extra_headers": headers,
+                    "extra_body": extra_body,
+                }
+                if tools_list:
+                    kwargs["tools"] = tools_list
+                response = client.chat.completions.create(**kwargs)
+                full_message = ""
+                prev_message = ""
+                is_reasoning = False
+                # Track ongoing tool calls
+                tool_calls = {}
+
+                for chunk in response:
+                    if not self.running:
+                        response.close()
+                        break
+                    if len(chunk.choices) == 0:
+                        continue
                 
-                delta = chunk.choices[0].delta
-                if delta.content:
-                    if is_reasoning:
-                        full_message += "</think>\n"
-                        is_reasoning = False
-                    full_message += delta.content
-                    args = (full_message.strip(), ) + tuple(extra_args)
-                    if len(full_message) - len(prev_message) > 1:
-                        on_update(*args)
-                        prev_message = full_message
-                elif hasattr(delta, "reasoning") and delta.reasoning is not None:
-                    if not is_reasoning:
-                        full_message += "<think>"
-                    is_reasoning = True
-                    full_message += delta.reasoning
-                    if len(full_message) - len(prev_message) > 1:
-                        args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
-                        prev_message = full_message
-                elif hasattr(delta, "reasoning_content") and delta.reasoning_content is not None:
-                    if not is_reasoning:
-                        full_message += "<think>"
-                    is_reasoning = True
-                    full_message += delta.reasoning_content
-                    if len(full_message) - len(prev_message) > 1:
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        if is_reasoning:
+                            full_message += "</think>\n"
+                            is_reasoning = False
+                        full_message += delta.content
                         args = (full_message.strip(), ) + tuple(extra_args)
-                        on_update(*args)
-                        prev_message = full_message
-                elif hasattr(delta, "tool_calls") and delta.tool_calls is not None:
-                    if is_reasoning:
-                        full_message += "</think>"
-                        is_reasoning = False
+                        if len(full_message) - len(prev_message) > 1:
+                            on_update(*args)
+                            prev_message = full_message
+                    elif hasattr(delta, "reasoning") and delta.reasoning is not None:
+                        if not is_reasoning:
+                            full_message += "<think>"
+                        is_reasoning = True
+                        full_message += delta.reasoning
+                        if len(full_message) - len(prev_message) > 1:
+                            args = (full_message.strip(), ) + tuple(extra_args)
+                            on_update(*args)
+                            prev_message = full_message
+                    elif hasattr(delta, "reasoning_content") and delta.reasoning_content is not None:
+                        if not is_reasoning:
+                            full_message += "<think>"
+                        is_reasoning = True
+                        full_message += delta.reasoning_content
+                        if len(full_message) - len(prev_message) > 1:
+                            args = (full_message.strip(), ) + tuple(extra_args)
+                            on_update(*args)
+                            prev_message = full_message
+                    elif hasattr(delta, "tool_calls") and delta.tool_calls is not None:
+                        if is_reasoning:
+                            full_message += "</think>"
+                            is_reasoning = False
                     
-                    for tc_delta in delta.tool_calls:
-                        if tc_delta.index not in tool_calls:
-                            tool_calls[tc_delta.index] = {"name": "", "arguments": "", "id": ""}
-
-                        if getattr(tc_delta, "id", None):
-                            tool_calls[tc_delta.index]["id"] += tc_delta.id
-                        if tc_delta.function.name:
-                            tool_calls[tc_delta.index]["name"] += tc_delta.function.name
-                        if tc_delta.function.arguments:
-                            tool_calls[tc_delta.index]["arguments"] += tc_delta.function.arguments
+                        for tc_delta in delta.tool_calls:
+                            if tc_delta.index not in tool_calls:
+                                tool_calls[tc_delta.index] = {"name": "", "arguments": "", "id": ""}
+
+                            if getattr(tc_delta, "id", None):
+                                tool_calls[tc_delta.index]["id"] += tc_delta.id
+                            if tc_delta.function.name:
+                                tool_calls[tc_delta.index]["name"] += tc_delta.function.name
+                            if tc_delta.function.arguments:
+                                tool_calls[tc_delta.index]["arguments"] += tc_delta.function.arguments
             
-            # After stream finishes, append any tool calls to full_message
-            if tool_calls:
-                if is_reasoning:
-                    full_message += "</think>"
-                for index in sorted(tool_calls.keys()):
-                    tc = tool_calls[index]
-                    try:
-                        args = json.loads(tc["arguments"])
-                    except:
-                        args = tc["arguments"]
-                    tool_call_dict = {"tool": tc["name"], "arguments": args}
-                    tid = (tc.get("id") or "").strip()
-                    if tid:
-                        tool_call_dict["id"] = tid
-                    full_message += "\n```json\n" + json.dumps(tool_call_dict) + "\n```\n"
+                # After stream finishes, append any tool calls to full_message
+                if tool_calls:
+                    if is_reasoning:
+                        full_message += "</think>"
+                    for index in sorted(tool_calls.keys()):
+                        tc = tool_calls[index]
+                        try:
+                            args = json.loads(tc["arguments"])
+                        except:
+                            args = tc["arguments"]
+                        tool_call_dict = {"tool": tc["name"], "arguments": args}
+                        tid = (tc.get("id") or "").strip()
+                        if tid:
+                            tool_call_dict["id"] = tid
+                        full_message += "\n```json\n" + json.dumps(tool_call_dict) + "\n```\n"
             
-            return full_message.strip()
-        except Exception as e:
-            raise e
+                return full_message.strip()
+            except Exception as e:
+                raise e
 
     def get_extra_body(self):
         body = self.get_setting("custom_body")
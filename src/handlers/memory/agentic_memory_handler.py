@@ -2,7 +2,9 @@ import os
 from datetime import datetime
 from typing import List, Optional
 import json
+import hashlib
 import threading
+import numpy as np
 
 from .memory_handler import MemoryHandler
 from ...handlers.embeddings.embedding import EmbeddingHandler
@@ -16,16 +18,186 @@ from ...utility.strings import clean_prompt, remove_thinking_blocks
 
 class MemoryChunk:
     """Represents a chunk of memory with metadata"""
-    def __init__(self, content: str, file_path: str, line_start: int, line_end: int, embedding=None):
+    def __init__(self, content: str, file_path: str, line_start: int, line_end: int):
         self.content = content
         self.file_path = file_path
         self.line_start = line_start
         self.line_end = line_end
-        self.embedding = embedding
+
+    def to_dict(self) -> dict:
+        return {
+            'content': self.content,
+            'file_path': self.file_path,
+            'line_start': self.line_start,
+            'line_end': self.line_end
+        }
+
+
+class MemoryIndex:
+    """Vector index of memory chunks
+
+    Embeddings are kept normalized in one contiguous float32 matrix, the chunk
+    metadata in a table with the same row order. New chunks are appended to both
+    files on disk, the whole index is only rewritten when chunks are removed.
+    """
+    VERSION = 2
+
+    def __init__(self, path: str):
+        self.vectors_file = os.path.join(path, "index.f32")
+        self.chunks_file = os.path.join(path, "index.jsonl")
+        self.meta_file = os.path.join(path, "index.json")
+        self.model = None
+        self.chunks: List[MemoryChunk] = []
+        # Indexed files, path -> info used to detect changes
+        self.files: dict[str, dict] = {}
+        self._data = np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized embeddings of the chunks, one row for each chunk"""
+        return self._data[:len(self.chunks)]
+
+    def load(self, model: str) -> bool:
+        """Load the index from disk
+
+        Args:
+            model: identifier of the embedding model, the index is discarded if it was built with another one
+
+        Returns:
+            bool: True if the index was loaded
+        """
+        if not os.path.exists(self.meta_file):
+            return False
+        try:
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+            if meta.get('version') != self.VERSION or meta.get('model') != model:
+                return False
+            dim = int(meta['dim'])
+            chunks = []
+            if os.path.exists(self.chunks_file):
+                with open(self.chunks_file, 'r') as f:
+                    chunks = [MemoryChunk(**json.loads(line)) for line in f if line.strip()]
+            data = np.fromfile(self.vectors_file, dtype=np.float32) if os.path.exists(self.vectors_file) else np.zeros(0, dtype=np.float32)
+            if data.size != len(chunks) * dim or (dim == 0 and chunks):
+                # Interrupted write, the index has to be rebuilt
+                return False
+            self._set(model, chunks, data.reshape(len(chunks), dim), meta.get('files', {}))
+            return True
+        except Exception as e:
+            print(f"Error loading memory index: {e}")
+            return False
+
+    def reset(self, model: str):
+        """Empty the index and set the embedding model used to build it"""
+        self._set(model, [], np.zeros((0, 0), dtype=np.float32), {})
+        self.save()
+
+    def add(self, file_path: str, state: dict, chunks: List[MemoryChunk], embeddings: np.ndarray):
+        """Append chunks of a file to the index and record the state of the file
+
+        The state is only recorded once the chunks are stored, so that they are indexed again on failure.
+
+        Args:
+            file_path: path of the file the chunks come from
+            state: state of the file including the chunks
+            chunks: chunks to add
+            embeddings: embeddings of the chunks, one row for each chunk
+        """
+        if not chunks:
+            self.files[file_path] = state
+            self._save_meta()
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(chunks), -1))
+        count = len(self.chunks)
+        if count == 0 and self._data.shape[1] != vectors.shape[1]:
+            self._data = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        if count + len(chunks) > len(self._data):
+            # Grow geometrically so that appending stays amortized constant time
+            data = np.zeros((max(count + len(chunks), len(self._data) * 2, 64), vectors.shape[1]), dtype=np.float32)
+            data[:count] = self._data[:count]
+            self._data = data
+        self._data[count:count + len(chunks)] = vectors
+        self.chunks.extend(chunks)
+        with open(self.vectors_file, 'ab') as f:
+            vectors.tofile(f)
+        with open(self.chunks_file, 'a') as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk.to_dict()) + "\n")
+        self.files[file_path] = state
+        self._save_meta()
+
+    def remove_file(self, file_path: str):
+        """Remove all the chunks of a file from the index"""
+        self.files.pop(file_path, None)
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk.file_path != file_path]
+        if len(keep) == len(self.chunks):
+            self._save_meta()
+            return
+        self._set(self.model, [self.chunks[i] for i in keep], self.matrix[keep], self.files)
+        self.save()
+
+    def search(self, query_embedding: np.ndarray, k: int, threshold: float) -> list[tuple[MemoryChunk, float]]:
+        """Find the chunks most similar to the query
+
+        Args:
+            query_embedding: embedding of the query
+            k: maximum number of results
+            threshold: minimum cosine similarity
+
+        Returns:
+            list[tuple[MemoryChunk, float]]: chunks and their similarity, most similar first
+        """
+        if not self.chunks or k <= 0:
+            return []
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        if not query.any() or len(query) != self.matrix.shape[1]:
+            return []
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] >= threshold]
+
+    def save(self):
+        """Write the whole index to disk"""
+        os.makedirs(os.path.dirname(self.meta_file), exist_ok=True)
+        self.matrix.tofile(self.vectors_file + ".tmp")
+        with open(self.chunks_file + ".tmp", 'w') as f:
+            for chunk in self.chunks:
+                f.write(json.dumps(chunk.to_dict()) + "\n")
+        os.replace(self.vectors_file + ".tmp", self.vectors_file)
+        os.replace(self.chunks_file + ".tmp", self.chunks_file)
+        self._save_meta()
+
+    def _save_meta(self):
+        meta = {
+            'version': self.VERSION,
+            'model': self.model,
+            'dim': int(self._data.shape[1]),
+            'files': self.files
+        }
+        with open(self.meta_file + ".tmp", 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.meta_file + ".tmp", self.meta_file)
+
+    def _set(self, model: str, chunks: List[MemoryChunk], matrix: np.ndarray, files: dict):
+        self.model = model
+        self.chunks = chunks
+        self._data = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.files = files
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
 
 
 class AgenticMemoryHandler(MemoryHandler):
     key = "agentic_memory_handler"
+    # Bytes at the end of the indexed content compared to detect rewritten files
+    TAIL_CHECK_SIZE = 4096
 
     def __init__(self, settings, path):
         super().__init__(settings, path)
@@ -34,6 +206,7 @@ class AgenticMemoryHandler(MemoryHandler):
         self.cache_dir = os.path.join(os.path.abspath(os.path.join(self.path, os.pardir)), "cache")
         self.memory_dir = os.path.join(self.cache_dir, "memories")
         self.memory_file = os.path.join(self.memory_dir, "MEMORY.md")
+        self.interactions_file = os.path.join(self.memory_dir, "INTERACTIONS.md")
         self.daily_notes_dir = os.path.join(self.memory_dir, "memory")
         self.index_dir = os.path.join(self.memory_dir, "llamaindex_index")
 
@@ -41,7 +214,8 @@ class AgenticMemoryHandler(MemoryHandler):
         self.llm: Optional[LLMHandler] = None
         self.rag: Optional[RAGHandler] = None
         self.memory_index = None  # RAGIndex from self.rag.build_index
-        self.chunks: List[MemoryChunk] = []
+        self.vector_index = MemoryIndex(self.memory_dir)  # Fallback index without RAG
+        self.indexed_files: dict[str, dict] = {}  # Files in memory_index, path -> state from _get_file_state
         self._lock = threading.Lock()
         self._index_loaded = False
         self._loading_thread = None
@@ -147,7 +321,7 @@ Recent conversations:
         if os.path.exists(self.memory_dir):
             shutil.rmtree(self.memory_dir)
         self._ensure_directories()
-        self.chunks = []
+        self.vector_index = MemoryIndex(self.memory_dir)
         self.memory_index = None
         self._index_loaded = False
 
@@ -209,22 +383,29 @@ Recent conversations:
 
         return chunks
 
-    def _get_memory_documents(self) -> list[str]:
-        """Get list of memory files as documents for RAG indexing"""
-        documents = []
+    def _get_memory_files(self) -> list[str]:
+        """Get list of memory files to index"""
+        files = []
 
         # Process MEMORY.md
         if os.path.exists(self.memory_file):
-            documents.append(f"file:{self.memory_file}")
+            files.append(self.memory_file)
+
+        # Process stored interactions
+        if os.path.exists(self.interactions_file):
+            files.append(self.interactions_file)
 
         # Process daily notes
         if os.path.exists(self.daily_notes_dir):
             for filename in os.listdir(self.daily_notes_dir):
                 if filename.endswith('.md'):
-                    file_path = os.path.join(self.daily_notes_dir, filename)
-                    documents.append(f"file:{file_path}")
+                    files.append(os.path.join(self.daily_notes_dir, filename))
+
+        return files
 
-        return documents
+    def _get_memory_documents(self) -> list[str]:
+        """Get list of memory files as documents for RAG indexing"""
+        return [f"file:{file_path}" for file_path in self._get_memory_files()]
 
     def _load_index(self):
         """Load the memory index using RAG handler"""
@@ -239,8 +420,7 @@ Recent conversations:
                     time.sleep(0.1)
 
                 # Build index from memory files using RAG handler
-                memory_documents = self._get_memory_documents()
-                self.memory_index = self.rag.build_index(memory_documents)
+                self._build_rag_index()
                 self._index_loaded = True
             except Exception as e:
                 print(f"Error loading memory index: {e}")
@@ -256,67 +436,119 @@ Recent conversations:
             if self._index_loaded:
                 return
 
-            self.chunks = []
+            # Generate embeddings if embedding handler is available
+            if self.embedding:
+                model = self.embedding.key + ":" + self.embedding.get_cache_model()
+                try:
+                    if not self.vector_index.load(model):
+                        self.vector_index.reset(model)
+                    self._sync_index_simple()
+                except Exception as e:
+                    print(f"Error building simple memory index: {e}")
+
+            self._index_loaded = True
+
+    def _sync_index_simple(self):
+        """Update the simple index with the memory files changed since they were indexed"""
+        files = self._get_memory_files()
+        for file_path in list(self.vector_index.files):
+            if file_path not in files:
+                self.vector_index.remove_file(file_path)
+        for file_path in files:
+            try:
+                self._index_file_simple(file_path)
+            except Exception as e:
+                # The state of the file is unchanged, it is indexed again on the next update
+                print(f"Error indexing memory file {file_path}: {e}")
+
+    def _index_file_simple(self, file_path: str):
+        """Index the content of a memory file written since it was indexed"""
+        state = self.vector_index.files.get(file_path)
+        appended = self._read_appended_content(file_path, state)
+        if appended is None:
+            # The file was modified, index it again from the beginning
+            self.vector_index.remove_file(file_path)
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            content, line_offset, state = data.decode('utf-8', errors='replace'), 0, self._get_file_state(file_path, data)
+        else:
+            content, line_offset, state = appended
+        chunks = []
+        if content.strip():
             chunk_size = int(self.get_setting("chunk_size", return_value=500))
+            chunks = self._split_markdown_into_chunks(content, file_path, chunk_size)
+            for chunk in chunks:
+                chunk.line_start += line_offset
+                chunk.line_end += line_offset
+        # The state is only advanced once the chunks are embedded and stored
+        self.vector_index.add(file_path, state, chunks, self._generate_embeddings(chunks))
 
-            # Process MEMORY.md
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    content = f.read()
-                if content.strip():
-                    self.chunks.extend(self._split_markdown_into_chunks(content, self.memory_file, chunk_size))
+    def _get_file_state(self, file_path: str, data: bytes) -> dict:
+        """Get the state of a memory file, used to find the content appended after indexing
 
-            # Process daily notes
-            if os.path.exists(self.daily_notes_dir):
-                for filename in os.listdir(self.daily_notes_dir):
-                    if filename.endswith('.md'):
-                        file_path = os.path.join(self.daily_notes_dir, filename)
-                        with open(file_path, 'r') as f:
-                            content = f.read()
-                        if content.strip():
-                            self.chunks.extend(self._split_markdown_into_chunks(content, file_path, chunk_size))
+        Args:
+            file_path: path of the file
+            data: indexed content of the file
 
-            # Generate embeddings if embedding handler is available
-            if self.embedding and self.chunks:
-                self._generate_embeddings()
-                self._save_index_simple()
+        Returns:
+            dict: indexed size, number of lines, modification time and hash of the last bytes
+        """
+        return {
+            'size': len(data),
+            'lines': data.count(b'\n'),
+            'mtime': os.stat(file_path).st_mtime,
+            'tail': hashlib.sha1(data[-self.TAIL_CHECK_SIZE:]).hexdigest()
+        }
 
-            self._index_loaded = True
+    def _read_appended_content(self, file_path: str, state: Optional[dict]) -> Optional[tuple[str, int, dict]]:
+        """Read the content appended to a memory file since it was indexed
+
+        Only the last bytes of the indexed content are read to check that the file was not modified.
+
+        Args:
+            file_path: path of the file
+            state: state of the file when it was indexed, from _get_file_state
+
+        Returns:
+            tuple[str, int, dict] | None: appended content, line of the file where it starts and new state,
+                None if the file was modified and must be indexed again
+        """
+        if state is None or 'tail' not in state:
+            return None
+        stat = os.stat(file_path)
+        if stat.st_size == state['size'] and stat.st_mtime == state['mtime']:
+            return "", state['lines'], state
+        if stat.st_size < state['size']:
+            return None
+        with open(file_path, 'rb') as f:
+            start = max(0, state['size'] - self.TAIL_CHECK_SIZE)
+            f.seek(start)
+            tail = f.read(state['size'] - start)
+            if hashlib.sha1(tail).hexdigest() != state['tail']:
+                return None
+            data = f.read()
+        new_state = {
+            'size': state['size'] + len(data),
+            'lines': state['lines'] + data.count(b'\n'),
+            'mtime': os.stat(file_path).st_mtime,
+            'tail': hashlib.sha1((tail + data)[-self.TAIL_CHECK_SIZE:]).hexdigest()
+        }
+        return data.decode('utf-8', errors='replace'), state['lines'], new_state
 
     def _save_index_simple(self):
         """Save the memory index to disk (fallback for simple implementation)"""
         try:
-            index_file = os.path.join(self.memory_dir, "index.json")
-            index_data = {
-                'chunks': [],
-                'version': 1
-            }
-
-            for chunk in self.chunks:
-                index_data['chunks'].append({
-                    'content': chunk.content,
-                    'file_path': chunk.file_path,
-                    'line_start': chunk.line_start,
-                    'line_end': chunk.line_end,
-                    'embedding': chunk.embedding
-                })
-
-            os.makedirs(self.memory_dir, exist_ok=True)
-            with open(index_file, 'w') as f:
-                json.dump(index_data, f)
+            self.vector_index.save()
         except Exception as e:
             print(f"Error saving simple index: {e}")
 
-    def _generate_embeddings(self):
-        """Generate embeddings for all chunks"""
-        if not self.embedding:
-            return
-
-        texts = [chunk.content for chunk in self.chunks]
-        embeddings = self.embedding.get_embedding(texts)
+    def _generate_embeddings(self, chunks: List[MemoryChunk]) -> np.ndarray:
+        """Generate embeddings for the given chunks"""
+        if not self.embedding or not chunks:
+            return np.zeros((0, 0), dtype=np.float32)
 
-        for i, chunk in enumerate(self.chunks):
-            chunk.embedding = embeddings[i].tolist() if hasattr(embeddings[i], 'tolist') else list(embeddings[i])
+        texts = [chunk.content for chunk in chunks]
+        return np.asarray(self.embedding.get_embedding(texts), dtype=np.float32)
 
     def _save_index(self):
         """Save the memory index to disk"""
@@ -346,7 +578,7 @@ Recent conversations:
         if not self.embedding or not self._index_loaded:
             self._load_index()
 
-        if not self.chunks:
+        if not self.vector_index.chunks:
             return r
 
         # Get search results using semantic search with context threshold
@@ -401,7 +633,7 @@ Recent conversations:
                 f.write(entry)
 
             # Update memory index if available
-            if self.memory_index is not None and self.rag:
+            if self._index_loaded:
                 self._update_llamaindex(daily_note_path)
         except Exception as e:
             print(f"Error writing to daily note: {e}")
@@ -415,7 +647,7 @@ Recent conversations:
 
     def _store_interaction(self, user_msg: str, bot_response: str):
         """Store full user interaction in INTERACTIONS.md for vector search"""
-        interactions_file = os.path.join(self.memory_dir, "INTERACTIONS.md")
+        interactions_file = self.interactions_file
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         entry = f"\n## {timestamp}\n\n**User:** {user_msg}\n\n**Assistant:** {bot_response}\n\n---\n"
@@ -425,28 +657,64 @@ Recent conversations:
                 f.write(entry)
 
             # Update memory index if available
-            if self.memory_index is not None and self.rag:
+            if self._index_loaded:
                 self._update_llamaindex(interactions_file)
         except Exception as e:
             print(f"Error writing to interactions file: {e}")
 
-    def _update_llamaindex(self, file_path: str):
-        """Update memory index with a new or modified file"""
+    def _update_llamaindex(self, file_path: str, rewritten: bool = False):
+        """Update memory index with the content written to a file since it was indexed
+
+        Args:
+            file_path: path of the memory file
+            rewritten: if the file was overwritten instead of appended to
+        """
         try:
-            if not os.path.exists(file_path):
+            file_path = os.path.normpath(file_path)
+            if not os.path.exists(file_path) or file_path not in self._get_memory_files():
                 return
 
-            # Rebuild index with updated files
+            with self._lock:
+                if rewritten:
+                    self.indexed_files.pop(file_path, None)
+                    self.vector_index.files.pop(file_path, None)
+                if self.memory_index is None:
+                    # Simple index
+                    if self._index_loaded:
+                        self._index_file_simple(file_path)
+                    return
+                appended = self._read_appended_content(file_path, self.indexed_files.get(file_path))
+                if appended is not None:
+                    # Only embed the new section
+                    content, _, state = appended
+                    if content.strip():
+                        self.memory_index.insert([f"section:{file_path}\n{content}"])
+                    self.indexed_files[file_path] = state
+                    return
+            # The file was rewritten, rebuild index with updated files
             self._rebuild_index()
         except Exception as e:
             print(f"Error updating memory index: {e}")
 
+    def _build_rag_index(self):
+        """Build the memory index from all memory files using the RAG handler"""
+        states = {}
+        for file_path in self._get_memory_files():
+            with open(file_path, 'rb') as f:
+                states[file_path] = self._get_file_state(file_path, f.read())
+        self.memory_index = self.rag.build_index([f"file:{file_path}" for file_path in states])
+        self.indexed_files = states
+
     def _rebuild_index(self):
         """Rebuild the memory index from all memory files"""
         try:
-            if self.rag:
-                memory_documents = self._get_memory_documents()
-                self.memory_index = self.rag.build_index(memory_documents)
+            if self.memory_index is None and self._index_loaded:
+                # Simple index, only changed files are embedded again
+                with self._lock:
+                    self._sync_index_simple()
+            elif self.rag:
+                with self._lock:
+                    self._build_rag_index()
         except Exception as e:
             print(f"Error rebuilding memory index: {e}")
 
@@ -529,8 +797,8 @@ Recent conversations:
             with open(self.memory_file, 'a') as f:
                 f.write(entry)
 
-            # Rebuild index
-            self._rebuild_index()
+            # Index the consolidated memories
+            self._update_llamaindex(self.memory_file)
         except Exception as e:
             print(f"Error in LLM memory consolidation: {e}")
 
@@ -582,8 +850,8 @@ Recent conversations:
             with open(self.memory_file, 'a') as f:
                 f.write(entry)
 
-            # Rebuild index
-            self._rebuild_index()
+            # Index the consolidated memories
+            self._update_llamaindex(self.memory_file)
         except Exception as e:
             print(f"Error in RAG memory consolidation: {e}")
 
@@ -616,40 +884,15 @@ Recent conversations:
 
     def _semantic_search_simple(self, query: str, threshold: float) -> List[str]:
         """Simple semantic search using numpy (fallback when RAG is not available)"""
-        if not self.chunks:
+        if not self.vector_index.chunks:
             return []
 
         max_results = int(self.get_setting("max_results", return_value=5))
 
-        # Generate query embedding
+        # Generate query embedding and find the most similar chunks
         query_embedding = self.embedding.get_embedding([query])[0]
-        if hasattr(query_embedding, 'tolist'):
-            query_embedding = query_embedding.tolist()
-
-        # Calculate cosine similarity
-        import numpy as np
-        similarities = []
-
-        for chunk in self.chunks:
-            if chunk.embedding is None:
-                continue
-            chunk_emb = np.array(chunk.embedding)
-            query_emb = np.array(query_embedding)
-
-            # Cosine similarity
-            dot_product = np.dot(chunk_emb, query_emb)
-            norm_chunk = np.linalg.norm(chunk_emb)
-            norm_query = np.linalg.norm(query_emb)
-
-            if norm_chunk > 0 and norm_query > 0:
-                similarity = dot_product / (norm_chunk * norm_query)
-                similarities.append((chunk, similarity))
-
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
-
         results = []
-        for chunk, similarity in similarities[:max_results]:
+        for chunk, similarity in self.vector_index.search(query_embedding, max_results, threshold):
             if similarity >= threshold:
                 # Format result with file info
                 rel_path = os.path.relpath(chunk.file_path, self.memory_dir)
@@ -733,8 +976,8 @@ Recent conversations:
             with open(file_path, 'w') as f:
                 f.write(content)
 
-            # Rebuild index to include new content
-            self._rebuild_index()
+            # Update index to include new content
+            self._update_llamaindex(file_path, rewritten=True)
 
             return f"Successfully wrote to {path_display}"
         except Exception as e:
@@ -765,8 +1008,8 @@ Recent conversations:
                 if not content.endswith('\n'):
                     f.write('\n')
 
-            # Rebuild index to include new content
-            self._rebuild_index()
+            # Update index to include new content
+            self._update_llamaindex(file_path)
 
             return f"Successfully appended to {path_display}"
         except Exception as e:
@@ -781,7 +1024,8 @@ Recent conversations:
                 self.memory_search,
                 title="Memory Search",
                 tools_group="Memory",
-                icon_name="system-search-symbolic"
+                icon_name="system-search-symbolic",
+                side_effect_free=True
             ),
             create_io_tool(
                 "memory_get",
@@ -789,7 +1033,8 @@ Recent conversations:
                 self.memory_get,
                 title="Memory Read",
                 tools_group="Memory",
-                icon_name="document-open-symbolic"
+                icon_name="document-open-symbolic",
+                side_effect_free=True
             ),
             create_io_tool(
                 "memory_write",
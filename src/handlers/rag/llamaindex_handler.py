@@ -531,11 +531,15 @@ class LlamaIndexHanlder(RAGHandler):
         urls = []
         for document in documents:
             if document.startswith("file:") or os.path.exists(document):
-                path = document.lstrip("file:")
+                path = document.removeprefix("file:")
                 document_list.extend(SimpleDirectoryReader(input_files=[path]).load_data())
             elif document.startswith("text:"):
-                text = document.lstrip("text:")
+                text = document.removeprefix("text:")
                 document_list.append(Document(text=text))
+            elif document.startswith("section:"):
+                # Part of a file, indexed with the path of the file it comes from
+                path, _, text = document.removeprefix("section:").partition("\n")
+                document_list.append(Document(text=text, metadata={"file_path": path}))
             elif document.startswith("url:") or document.startswith("http://") or document.startswith("https://"):
                 url = document.lstrip("url:")
                 urls.append(url)
@@ -623,7 +627,8 @@ class LlamaIndexHanlder(RAGHandler):
                 func=self._tool_search_files,
                 title="RAG Search Files",
                 default_on=True,
-                tools_group="RAG"
+                tools_group="RAG",
+                side_effect_free=True
             ),
         ]
         if self.settings.get_boolean("rag-on"):
@@ -634,7 +639,8 @@ class LlamaIndexHanlder(RAGHandler):
                     func=self._tool_search_index,
                     title="RAG Search Index",
                     default_on=True,
-                    tools_group="RAG"
+                    tools_group="RAG",
+                    side_effect_free=True
                 ),
             ]
         return r
@@ -175,6 +175,7 @@ class RAGHandler(Handler):
             documents: List of documents to query, can be in this format:
                 file:path/to/file
                 text:text of the content to index
+                section:path/to/file followed by a newline and a part of the file content
                 url:https://url
             chunk_size: Chunk size for the query 
 
@@ -1,7 +1,7 @@
 import os
 import gettext
 _ = gettext.gettext
-from .stt import STTHandler
+from .stt import STTHandler, audio_to_pcm16
 from ...utility.pip import install_module, find_module
 from ..handler import ErrorSeverity
 from ..extra_settings import ExtraSettings
@@ -19,6 +19,8 @@ class OpenWakeWordHandler(STTHandler):
         "hey_mycroft": "hey_mycroft",
         "hey_rhasspy": "hey_rhasspy",
     }
+    # Samples analyzed by every prediction in streaming mode
+    FRAME_SAMPLES = 1280
     
     def __init__(self, settings, path):
         super().__init__(settings, path)
@@ -111,31 +113,62 @@ class OpenWakeWordHandler(STTHandler):
             return None
         
         try:
-            model = self._get_model()
             audio_data, rate = self._read_audio_file(path)
+        except Exception as e:
+            print(f"OpenWakeWord error: {e}")
+            return ""
+        return self.recognize_audio(audio_data, rate)
+
+    def recognize_audio(self, audio, sample_rate: int = 16000) -> str | None:
+        try:
+            model = self._get_model()
+            audio_data = np.frombuffer(audio_to_pcm16(audio), dtype=np.int16)
             
             predictions_list = model.predict_clip(audio_data, padding=1)
             
             max_scores = {}
             for frame_preds in predictions_list:
-                for word, score in frame_preds.items():
-                    if word not in max_scores or score > max_scores[word]:
-                        max_scores[word] = score
-            
-            detected_words = []
-            for word, score in max_scores.items():
-                print(word, score)
-                if score > self.get_setting("sensitivity"):
-                    detected_words.append(word)
- 
-            if detected_words:
-                return ', '.join(detected_words)
+                self._update_scores(max_scores, frame_preds)
             
+            return self._get_detected_words(max_scores, True)
+        except Exception as e:
+            print(f"OpenWakeWord error: {e}")
             return ""
+
+    def recognize_stream(self, chunks, sample_rate: int = 16000, on_partial=None) -> str | None:
+        try:
+            model = self._get_model()
+            model.reset()
+            max_scores = {}
+            pending = np.zeros(0, dtype=np.int16)
+            for chunk in chunks:
+                pending = np.concatenate((pending, np.frombuffer(audio_to_pcm16(chunk), dtype=np.int16)))
+                # The model works on frames of 80 ms
+                frames = len(pending) // self.FRAME_SAMPLES
+                for i in range(frames):
+                    self._update_scores(max_scores, model.predict(pending[i * self.FRAME_SAMPLES:(i + 1) * self.FRAME_SAMPLES]))
+                pending = pending[frames * self.FRAME_SAMPLES:]
+                if on_partial is not None and frames > 0:
+                    on_partial(self._get_detected_words(max_scores))
+            return self._get_detected_words(max_scores, True)
         except Exception as e:
             print(f"OpenWakeWord error: {e}")
             return ""
 
+    def _update_scores(self, max_scores: dict, predictions: dict):
+        for word, score in predictions.items():
+            if word not in max_scores or score > max_scores[word]:
+                max_scores[word] = score
+
+    def _get_detected_words(self, max_scores: dict, log: bool = False) -> str:
+        detected_words = []
+        for word, score in max_scores.items():
+            if log:
+                print(word, score)
+            if score > self.get_setting("sensitivity"):
+                detected_words.append(word)
+        return ', '.join(detected_words)
+
 
     def set_setting(self, key: str, value):
         super().set_setting(key, value)
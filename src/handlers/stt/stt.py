@@ -1,8 +1,50 @@
 from abc import abstractmethod
+from typing import Callable, Iterable
+import io
+import os
+import tempfile
+import wave
+import numpy as np
 from ...utility.pip import find_module
 from ..handler import Handler
 
 
+def audio_to_pcm16(audio: bytes | np.ndarray) -> bytes:
+    """Convert mono audio to 16-bit PCM bytes
+
+    Args:
+        audio: 16-bit PCM bytes, or a numpy array of int16 samples or float samples in [-1, 1]
+
+    Returns:
+        bytes: 16-bit little endian PCM
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return bytes(audio)
+    audio = np.asarray(audio)
+    if np.issubdtype(audio.dtype, np.floating):
+        audio = np.clip(audio * 32768.0, -32768, 32767)
+    return audio.astype("<i2", copy=False).tobytes()
+
+
+def pcm16_to_wav(audio: bytes | np.ndarray, sample_rate: int = 16000) -> bytes:
+    """Wrap mono audio in an in-memory WAV container
+
+    Args:
+        audio: audio accepted by audio_to_pcm16
+        sample_rate: sample rate of the audio
+
+    Returns:
+        bytes: WAV file content
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(audio_to_pcm16(audio))
+    return buffer.getvalue()
+
+
 class STTHandler(Handler):
     """Every STT Handler should extend this class"""
     key = ""
@@ -33,4 +75,46 @@ class STTHandler(Handler):
         """Recognize a given audio file"""
         pass
 
+    def recognize_audio(self, audio: bytes | np.ndarray, sample_rate: int = 16000) -> str | None:
+        """Recognize mono audio held in memory
+
+        Handlers that can decode raw samples should override this, the default
+        implementation writes a temporary WAV file and calls recognize_file.
+
+        Args:
+            audio: 16-bit PCM bytes, or a numpy array of int16 samples or float samples in [-1, 1]
+            sample_rate: sample rate of the audio
+
+        Returns:
+            str | None: the recognized text
+        """
+        fd, path = tempfile.mkstemp(suffix=".wav", prefix="newelle_stt_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm16_to_wav(audio, sample_rate))
+            return self.recognize_file(path)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def recognize_stream(self, chunks: Iterable[bytes | np.ndarray], sample_rate: int = 16000,
+                         on_partial: Callable[[str], None] | None = None) -> str | None:
+        """Recognize mono audio as it is produced
+
+        Handlers that support streaming recognition should override this and call
+        on_partial with intermediate results, the default implementation waits for
+        the end of the stream and calls recognize_audio.
+
+        Args:
+            chunks: audio chunks, in the formats accepted by recognize_audio
+            sample_rate: sample rate of the audio
+            on_partial: called with the partial transcription while audio is received
+
+        Returns:
+            str | None: the recognized text
+        """
+        return self.recognize_audio(b"".join(audio_to_pcm16(chunk) for chunk in chunks), sample_rate)
+
 
@@ -1,10 +1,15 @@
 import json
-from .stt import STTHandler
+from .stt import STTHandler, audio_to_pcm16
 
 
 class VoskHandler(STTHandler): 
     key = "vosk"
 
+    def __init__(self, settings, path):
+        super().__init__(settings, path)
+        self.model = None
+        self.model_path = None
+
     @staticmethod
     def get_extra_requirements() -> list:
         return ["vosk", "speechrecognition"]
@@ -27,8 +32,7 @@ class VoskHandler(STTHandler):
         r = sr.Recognizer()
         with sr.AudioFile(path) as source:
             audio = r.record(source)
-        path = self.get_setting("path")
-        r.vosk_model = Model(path)
+        r.vosk_model = self._get_model()
         try:
             res = json.loads(r.recognize_vosk(audio))["text"]
         except sr.UnknownValueError:
@@ -38,3 +42,32 @@ class VoskHandler(STTHandler):
             return None
         return res
 
+    def _get_model(self):
+        """Load the VOSK model, reusing it until the model path changes"""
+        from vosk import Model
+        path = self.get_setting("path")
+        if self.model is None or self.model_path != path:
+            self.model = Model(path)
+            self.model_path = path
+        return self.model
+
+    def recognize_audio(self, audio, sample_rate: int = 16000):
+        return self.recognize_stream([audio], sample_rate)
+
+    def recognize_stream(self, chunks, sample_rate: int = 16000, on_partial=None):
+        from vosk import KaldiRecognizer
+        try:
+            recognizer = KaldiRecognizer(self._get_model(), sample_rate)
+            text = []
+            for chunk in chunks:
+                if recognizer.AcceptWaveform(audio_to_pcm16(chunk)):
+                    text.append(json.loads(recognizer.Result()).get("text", ""))
+                elif on_partial is not None:
+                    partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                    on_partial(" ".join(t for t in text + [partial] if t))
+            text.append(json.loads(recognizer.FinalResult()).get("text", ""))
+        except Exception as e:
+            print(e)
+            return None
+        res = " ".join(t for t in text if t)
+        return res if res else None
@@ -1,7 +1,7 @@
 import gettext
 from ...utility.strings import quote_string
 from ...utility.system import get_spawn_command, can_escape_sandbox, is_flatpak
-from .stt import STTHandler
+from .stt import STTHandler, pcm16_to_wav
 from ...handlers import ErrorSeverity, ExtraSettings
 from ...ui.model_library import ModelLibraryWindow, LibraryModel
 import os
@@ -309,8 +309,22 @@ class WhisperCPPHandler(STTHandler):
             print("Using CLI mode")
             return self._recognize_with_cli(path)
 
-    def _recognize_with_server(self, path):
-        """Recognize using the whisper-server HTTP API"""
+    def recognize_audio(self, audio, sample_rate: int = 16000):
+        self._start_process()
+
+        if self._use_server and self._process is not None and self._process.poll() is None:
+            # Send the samples wrapped in an in-memory WAV, without touching the disk
+            return self._recognize_with_server(audio_data=pcm16_to_wav(audio, sample_rate))
+        # The CLI only reads files
+        return super().recognize_audio(audio, sample_rate)
+
+    def _recognize_with_server(self, path=None, audio_data=None):
+        """Recognize using the whisper-server HTTP API
+
+        Args:
+            path: path of the audio file
+            audio_data: content of a WAV file, used instead of path
+        """
         import urllib.request
         import urllib.error
         import json
@@ -318,10 +332,12 @@ class WhisperCPPHandler(STTHandler):
         try:
             boundary = '----WebKitFormBoundary7MA4YWxkTrZu0gW'
 
-            with open(path, 'rb') as f:
-                audio_data = f.read()
-
-            filename = os.path.basename(path)
+            if audio_data is None:
+                with open(path, 'rb') as f:
+                    audio_data = f.read()
+                filename = os.path.basename(path)
+            else:
+                filename = "audio.wav"
 
             body = []
             body.append(f'--{boundary}'.encode())
@@ -31,15 +31,10 @@ class EspeakHandler(TTSHandler):
         self.voices = voices
         return voices
 
-    def play_audio(self, message):
-        self._play_lock.acquire()
-        check_output(get_spawn_command() + ["espeak", "-v" + str(self.get_current_voice()), message])
-        self._play_lock.release()
-
     def save_audio(self, message, file):
-        r = check_output(get_spawn_command() + ["espeak", "-f", "-v" + str(self.get_current_voice()), message, "--stdout"])
-        f = open(file, "wb")
-        f.write(r)
+        r = check_output(get_spawn_command() + ["espeak", "-v" + str(self.get_current_voice()), "--stdout", message])
+        with open(file, "wb") as f:
+            f.write(r)
 
     def is_installed(self):
         if not can_escape_sandbox():
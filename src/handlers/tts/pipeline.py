@@ -0,0 +1,241 @@
+import os
+import queue
+import re
+import threading
+from typing import TYPE_CHECKING
+
+from ...utility.strings import clean_message_tts
+
+if TYPE_CHECKING:
+    from .tts import TTSHandler
+
+SENTENCE_PUNCTUATION = ".!?;:。！？…"
+# Position right after the end of a sentence or a line
+SENTENCE_END = re.compile("[" + re.escape(SENTENCE_PUNCTUATION) + r"]+[\"')\]]*\s+|\n+")
+# Code fences and thinking tags, the text inside them is not spoken until they are closed
+BLOCK_MARKER = re.compile(r"```|</?think>")
+SAFE_END_TOKEN = re.compile(BLOCK_MARKER.pattern + "|" + SENTENCE_END.pattern)
+# Characters at the end of the text scanned again on the next feed, a token may be split between feeds
+SCAN_OVERLAP = 16
+# Sentences shorter than this are merged with the next one
+MIN_SENTENCE_LENGTH = 20
+
+
+class TTSPipeline:
+    """Speaks a message while it is being generated
+
+    Text is split into sentences as it is fed. A synthesis thread converts each
+    sentence to audio while a playback thread plays the previous one. At most
+    prefetch synthesized sentences wait for playback.
+    """
+
+    def __init__(self, tts: "TTSHandler", prefetch: int = 2):
+        self.tts = tts
+        self.text = ""
+        self.message = ""
+        self.message_spoken = ""
+        self.consumed = 0
+        # Scan state of text[:scanned]: last safe sentence end and the blocks opened before it
+        self.scanned = 0
+        self.safe_end = 0
+        self.fences = 0
+        self.thinks_opened = 0
+        self.thinks_closed = 0
+        self.pending = ""
+        self.sentences = queue.Queue()
+        self.audio = queue.Queue(maxsize=max(1, prefetch))
+        self.stopped = threading.Event()
+        self.done = threading.Event()
+        self.started = False
+        self.synthesis_thread = threading.Thread(target=self._synthesis_loop, daemon=True)
+        self.playback_thread = threading.Thread(target=self._playback_loop, daemon=True)
+        self.synthesis_thread.start()
+        self.playback_thread.start()
+
+    def feed(self, text: str):
+        """Add text generated by the LLM, complete sentences are queued for synthesis
+
+        Args:
+            text: new text, appended to the one already fed
+        """
+        if self.stopped.is_set():
+            return
+        self.text += text
+        end = self._find_safe_end()
+        if end > self.consumed:
+            self._queue_text(self.text[self.consumed:end])
+            self.consumed = end
+
+    def update(self, message: str):
+        """Update the pipeline with the whole message generated so far
+
+        Args:
+            message: the message, a message not starting with the previous one is spoken after it
+        """
+        if not message.startswith(self.message):
+            # A new message started, for example after a tool call
+            self.feed("\n")
+            self.message = ""
+            self.message_spoken = ""
+        self.feed(message[len(self.message):])
+        self.message = message
+
+    def finish(self, message: str | None = None):
+        """Signal that the message is complete, the remaining text is spoken
+
+        Args:
+            message: final version of the last message, the streamed updates may miss its end
+        """
+        if self.stopped.is_set():
+            return
+        remaining = clean_message_tts(self.text[self.consumed:])
+        if message is not None:
+            spoken = " ".join(self.message_spoken.split())
+            final = " ".join(clean_message_tts(message).split())
+            if final.startswith(spoken):
+                remaining = final[len(spoken):]
+        self._queue_text(remaining, True, False)
+        self.consumed = len(self.text)
+        self.sentences.put(None)
+
+    def wait(self):
+        """Wait until every sentence has been played or the pipeline is stopped"""
+        self.done.wait()
+
+    def stop(self):
+        """Stop synthesis and playback, discarding the queued sentences"""
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.sentences.put(None)
+        # Unblock the synthesis thread if it waits for free space
+        for path in self._drain(self.audio):
+            self._remove(path)
+        try:
+            self.audio.put_nowait(None)
+        except queue.Full:
+            pass
+        self.tts.stop_playback()
+
+    def _find_safe_end(self) -> int:
+        """Get the end of the last complete sentence that is not inside a code or thinking block
+
+        Only the text fed since the last call is scanned, the open blocks are counted incrementally.
+        """
+        scanned = self.scanned
+        for match in SAFE_END_TOKEN.finditer(self.text, self.scanned):
+            token = match.group(0)
+            if token == "```":
+                self.fences += 1
+            elif token == "<think>":
+                self.thinks_opened += 1
+            elif token == "</think>":
+                self.thinks_closed += 1
+            elif self.fences % 2 == 0 and self.thinks_opened <= self.thinks_closed:
+                self.safe_end = match.end()
+            scanned = match.end()
+        self.scanned = max(scanned, len(self.text) - SCAN_OVERLAP)
+        return max(self.safe_end, self.consumed)
+
+    def _queue_text(self, text: str, final: bool = False, clean: bool = True):
+        if clean:
+            text = clean_message_tts(text)
+        self.message_spoken += " " + text
+        parts = [p.strip() for p in SENTENCE_END.split(text)] if text else []
+        # Keep the punctuation removed by split
+        ends = [m.group(0).strip() for m in SENTENCE_END.finditer(text)] if text else []
+        for i, part in enumerate(parts):
+            if not part:
+                continue
+            sentence = part + (ends[i] if i < len(ends) else "")
+            if self.pending and self.pending[-1] not in SENTENCE_PUNCTUATION:
+                # Pause between lines merged in the same clip
+                self.pending += "."
+            self.pending = (self.pending + " " + sentence).strip()
+            if len(self.pending) >= MIN_SENTENCE_LENGTH:
+                self.sentences.put(self.pending)
+                self.pending = ""
+        if final and self.pending:
+            self.sentences.put(self.pending)
+            self.pending = ""
+
+    def _synthesis_loop(self):
+        while not self.stopped.is_set():
+            sentence = self.sentences.get()
+            if sentence is None:
+                break
+            path = os.path.join(self.tts.path, self.tts.get_tempname("wav"))
+            try:
+                self.tts.save_audio(sentence, path)
+            except Exception as e:
+                print("Error synthesizing audio: " + str(e))
+                self._remove(path)
+                continue
+            if self.stopped.is_set():
+                self._remove(path)
+                break
+            self.audio.put(path)
+            if self.stopped.is_set():
+                # Stopped while waiting for free space
+                for path in self._drain(self.audio):
+                    self._remove(path)
+                break
+        if not self.stopped.is_set():
+            self.audio.put(None)
+
+    def _playback_loop(self):
+        # Clip queued on the audio sink, the next one is queued before it ends to avoid gaps
+        playing = None
+        try:
+            while True:
+                path = self.audio.get()
+                if path is None or self.stopped.is_set():
+                    self._remove(path)
+                    break
+                if not self.started:
+                    self.started = True
+                    self.tts._play_lock.acquire()
+                    self.tts.on_start()
+                item = self.tts.queue_file(path)
+                self.tts.play_item = item
+                self._wait_clip(playing)
+                playing = (item, path)
+        finally:
+            self._wait_clip(playing)
+            if self.started:
+                self.tts.on_stop()
+                self.tts._play_lock.release()
+            # Remove the files synthesized after a stop
+            for path in self._drain(self.audio):
+                self._remove(path)
+            self.done.set()
+
+    def _wait_clip(self, clip: tuple | None):
+        if clip is None:
+            return
+        item, path = clip
+        if self.stopped.is_set():
+            item.cancel()
+        # Wake up regularly to cancel the clip queued after it on stop
+        while not item.wait(0.1):
+            if self.stopped.is_set():
+                item.cancel()
+        self._remove(path)
+
+    @staticmethod
+    def _drain(q: queue.Queue) -> list:
+        items = []
+        while True:
+            try:
+                items.append(q.get_nowait())
+            except queue.Empty:
+                return items
+
+    @staticmethod
+    def _remove(path: str | None):
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except Exception:
+            pass
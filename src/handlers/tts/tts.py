@@ -1,11 +1,36 @@
 from abc import abstractmethod
+from functools import wraps
 from typing import Callable
 
-from subprocess import Popen
 import threading 
 import time
 import os
-from ..handler import Handler
+from ..handler import Handler, SettingsCache
+from .pipeline import TTSPipeline
+from .tts_cache import TTSCache, normalize_text
+from ...utility.audio_sink import get_audio_sink, PlaybackItem
+
+_caches : dict[str, TTSCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cached_audio(save_audio):
+    """Wrap a save_audio implementation to use the TTS cache"""
+    @wraps(save_audio)
+    def wrapper(self, message, file):
+        cache = self.get_cache()
+        if cache is None:
+            return save_audio(self, message, file)
+        key = self.get_cache_key(message)
+        if cache.get_file(key, file):
+            return
+        result = save_audio(self, message, file)
+        if os.path.exists(file):
+            cache.put(key, file)
+        return result
+    wrapper.cached = True
+    return wrapper
+
 
 class TTSHandler(Handler):
     """Every TTS handler should extend this class."""
@@ -13,6 +38,16 @@ class TTSHandler(Handler):
     schema_key = "tts-voice"
     voices : tuple
     _play_lock : threading.Semaphore = threading.Semaphore(1)
+    # Settings that do not change the synthesized audio, ignored by the cache
+    cache_ignored_settings : tuple = ("api", "api_key", "key", "voices")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every implementation of save_audio goes through the TTS cache
+        save_audio = cls.__dict__.get("save_audio")
+        if save_audio is not None and not getattr(save_audio, "cached", False):
+            cls.save_audio = cached_audio(save_audio)
+
     def __init__(self, settings, path):
         super().__init__(settings, path)
         self.settings = settings
@@ -21,6 +56,8 @@ class TTSHandler(Handler):
         self.on_start = lambda : None
         self.on_stop  = lambda : None
         self.play_process = None
+        self.play_item = None
+        self.pipeline = None
 
     def get_extra_settings(self) -> list:
         """Get extra settings for the TTS"""
@@ -83,22 +120,60 @@ class TTSHandler(Handler):
         self.stop()
         self._play_lock.acquire()
         self.on_start()
+        self.play_file(path)
+        self.on_stop()
+        self._play_lock.release()
+
+    def play_file(self, path):
+        """Play an audio file, blocking until it ends, without emitting signals"""
         try:
-            p = Popen(["ffplay", "-nodisp", "-autoexit", "-hide_banner", path])
-            self.play_process = p
-            p.wait()
-            p.terminate()
+            self.play_item = self.queue_file(path)
+            self.play_item.wait()
         except Exception as e:
             print("Error playing the audio: " + str(e))
-            pass
-        self.on_stop()
-        self.play_process = None
-        self._play_lock.release()
-     
-    def stop(self):
+        self.play_item = None
+
+    def queue_file(self, path) -> PlaybackItem:
+        """Queue an audio file on the audio sink, it is played after the clips already queued
+
+        Args:
+            path: path of the file, it must exist until the clip has been played
+
+        Returns:
+            PlaybackItem: the queued clip
+        """
+        return get_audio_sink().enqueue_file(path)
+
+    def create_pipeline(self, prefetch: int = 2) -> TTSPipeline:
+        """Start speaking a message while it is being generated
+
+        Feed the generated text to the returned pipeline with feed() and call
+        finish() when the message is complete. The next sentences are synthesized
+        while the current one is playing.
+
+        Args:
+            prefetch: maximum number of synthesized sentences waiting to be played
+
+        Returns:
+            TTSPipeline: the pipeline
+        """
+        self.stop()
+        self.pipeline = TTSPipeline(self, prefetch)
+        return self.pipeline
+
+    def stop_playback(self):
+        """Stop the clip that is currently playing"""
+        if self.play_item is not None:
+            self.play_item.cancel()
         if self.play_process is not None:
             self.play_process.terminate()
 
+    def stop(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        self.stop_playback()
+
     def get_current_voice(self):
         """Get the current selected voice"""
         voice = self.get_setting("voice")
@@ -126,81 +201,65 @@ class TTSHandler(Handler):
     def play_audio_stream(self, message):
         """Play audio from the given message using streaming.
 
-        Drives ``get_audio_stream(message)`` through an ffmpeg → ffplay pipeline.
-        The format is determined by ``get_stream_format_args()``.  Subclasses only
-        need to override ``get_audio_stream`` and ``get_stream_format_args``; the
-        playback machinery is handled here.
+        Feeds ``get_audio_stream(message)`` to the audio sink, which decodes it
+        while it is produced. The format is determined by ``get_stream_format_args()``.
+        Subclasses only need to override ``get_audio_stream`` and
+        ``get_stream_format_args``; the playback machinery is handled here.
         """
-        import subprocess
-
-        stop_event = threading.Event()
-
         self.stop()
         self._play_lock.acquire()
         self.on_start()
-
-        ffmpeg_process = None
-        ffplay_process = None
-
-        def monitor_ffplay():
-            if ffplay_process:
-                ffplay_process.wait()
-                stop_event.set()
-
         try:
-            fmt_args = self.get_stream_format_args()
-
-            ffmpeg_process = Popen(
-                ["ffmpeg"] + fmt_args + ["-i", "-", "-f", "wav", "-"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-            )
-            ffplay_process = Popen(
-                ["ffplay", "-nodisp", "-autoexit", "-hide_banner", "-i", "pipe:0"],
-                stdin=ffmpeg_process.stdout,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            self.play_process = ffplay_process
-            ffmpeg_process.stdout.close()
-
-            threading.Thread(target=monitor_ffplay, daemon=True).start()
-
-            try:
-                for chunk in self.get_audio_stream(message):
-                    if stop_event.is_set():
-                        break
-                    ffmpeg_process.stdin.write(chunk)
-            except BrokenPipeError:
-                pass
-            finally:
-                try:
-                    ffmpeg_process.stdin.close()
-                except Exception:
-                    pass
-
+            cache = self.get_cache()
+            key = self.get_cache_key(message, "stream") if cache is not None else None
+            entry = cache.get(key) if cache is not None else None
+            if entry is not None:
+                path, fmt_args = entry
+                self.play_item = get_audio_sink().enqueue_stream(self._read_cached(path), fmt_args)
+            else:
+                self.play_item = get_audio_sink().enqueue_stream(
+                    self._cache_stream(self.get_audio_stream(message), cache, key), self.get_stream_format_args()
+                )
+            self.play_item.wait()
         except Exception as e:
             print("Error playing streaming audio: " + str(e))
         finally:
-            stop_event.set()
-            for proc in (ffmpeg_process, ffplay_process):
-                if proc is not None:
-                    try:
-                        proc.wait()
-                        proc.terminate()
-                    except Exception:
-                        pass
-            self.play_process = None
+            self.play_item = None
             self.on_stop()
             self._play_lock.release()
 
+    def _cache_stream(self, chunks, cache: TTSCache | None, key: str | None):
+        """Yield the audio chunks, adding the audio to the cache when the stream is complete"""
+        if cache is None:
+            yield from chunks
+            return
+        data = bytearray()
+        for chunk in chunks:
+            data += chunk
+            yield chunk
+        # Not reached if the playback was interrupted
+        if len(data) > 0:
+            cache.put(key, data=bytes(data), format_args=self.get_stream_format_args())
+
+    @staticmethod
+    def _read_cached(path: str):
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(65536)
+                    if not chunk:
+                        break
+                    yield chunk
+        except OSError as e:
+            print("Error reading cached audio: " + str(e))
+
     def get_stream_format_args(self) -> list:
-        """Return ffmpeg/ffplay input format arguments for the audio produced by get_audio_stream.
+        """Return ffmpeg input format arguments for the audio produced by get_audio_stream.
 
-        These are prepended before ``-i pipe:0`` in ffmpeg and before ``-i -`` in ffplay so
-        that the tools know how to interpret the raw byte stream.  For WAV output (the
-        default) no arguments are needed because ffmpeg auto-detects the container.
+        These are prepended before ``-i pipe:0`` in ffmpeg so that it knows how to
+        interpret the raw byte stream.  Raw ``s16le`` audio is played without ffmpeg.
+        For WAV output (the default) no arguments are needed because ffmpeg
+        auto-detects the container.
         Override in subclasses that produce a specific raw format (e.g. mp3, s16le).
 
         Returns:
@@ -236,5 +295,46 @@ class TTSHandler(Handler):
             except Exception:
                 pass
 
+    def get_cache(self) -> TTSCache | None:
+        """Get the on-disk cache of synthesized audio, shared by every TTS handler
+
+        Returns:
+            TTSCache | None: the cache, None if it can not be opened
+        """
+        path = os.path.join(self.path, "tts_cache")
+        with _caches_lock:
+            if path not in _caches:
+                try:
+                    _caches[path] = TTSCache(path)
+                except Exception as e:
+                    print(f"Could not open TTS cache: {e}")
+                    return None
+            return _caches[path]
+
+    def get_cache_key(self, message: str, kind: str = "file") -> str:
+        """Get the cache key of a message for the current handler, voice and settings
+
+        Args:
+            message: text to synthesize
+            kind: kind of audio, "file" for save_audio and "stream" for get_audio_stream
+
+        Returns:
+            str: cache key
+        """
+        stored = SettingsCache.get_instance(self.settings).get_json(self.schema_key).get(self.key, {})
+        settings = {k: v for k, v in stored.items() if k not in self.cache_ignored_settings}
+        return TTSCache.make_key(self.key, kind, self.get_current_voice(), settings, normalize_text(message))
+
+    def get_cache_stats(self) -> dict:
+        """Get the statistics of the TTS cache
+
+        Returns:
+            dict: cache hits, misses, hit rate, number of entries and size in bytes
+        """
+        cache = self.get_cache()
+        if cache is None:
+            return {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0, "size": 0}
+        return cache.get_stats()
+
     def destroy(self):
         self.stop()
@@ -0,0 +1,173 @@
+import os
+import json
+import shutil
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+
+# Default maximum size of the cached audio, in bytes
+DEFAULT_CACHE_SIZE = 128 * 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a text so that equivalent messages share the same cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TTSCache:
+    """Content addressed on-disk cache of synthesized audio
+
+    Every entry is a file named after the hash of its key, a SQLite index keeps
+    the size and the last use of every file. When the size limit is reached the
+    least recently used files are removed.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, "index.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, format TEXT, used INTEGER NOT NULL) WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self.db.commit()
+        self.clock = self.db.execute("SELECT COALESCE(MAX(used), 0) FROM entries").fetchone()[0]
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Get the key of an entry from the values that determine the audio"""
+        data = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str) -> tuple[str, list | None] | None:
+        """Get the cached audio for a key
+
+        Args:
+            key: key of the entry, see make_key
+
+        Returns:
+            tuple[str, list | None] | None: path of the audio file and its format arguments, None if not cached
+        """
+        with self.lock:
+            row = self.db.execute("SELECT format FROM entries WHERE hash = ?", (key,)).fetchone()
+            path = self._get_path(key)
+            if row is None or not os.path.exists(path):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.clock += 1
+            self.db.execute("UPDATE entries SET used = ? WHERE hash = ?", (self.clock, key))
+            self.db.commit()
+            return path, json.loads(row[0]) if row[0] is not None else None
+
+    def get_file(self, key: str, file: str) -> bool:
+        """Copy the cached audio for a key to a file
+
+        Args:
+            key: key of the entry, see make_key
+            file: destination path
+
+        Returns:
+            bool: True if the audio was cached
+        """
+        entry = self.get(key)
+        if entry is None:
+            return False
+        try:
+            shutil.copyfile(entry[0], file)
+        except OSError:
+            # Evicted in the meantime
+            return False
+        return True
+
+    def put(self, key: str, file: str | None = None, data: bytes | None = None, format_args: list | None = None):
+        """Add audio to the cache, evicting the least recently used entries if needed
+
+        Args:
+            key: key of the entry, see make_key
+            file: path of the audio file to copy in the cache
+            data: audio content, used instead of file
+            format_args: ffmpeg format arguments of the audio, see TTSHandler.get_stream_format_args
+        """
+        path = self._get_path(key)
+        tmp = path + ".tmp" + str(threading.get_ident())
+        try:
+            if data is not None:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+            else:
+                shutil.copyfile(file, tmp)
+            size = os.path.getsize(tmp)
+            if size == 0 or size > self.max_size:
+                os.remove(tmp)
+                return
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Could not cache audio: {e}")
+            return
+        with self.lock:
+            old = self.db.execute("SELECT size FROM entries WHERE hash = ?", (key,)).fetchone()
+            if old is not None:
+                self.size -= old[0]
+            self.clock += 1
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, size, json.dumps(format_args) if format_args is not None else None, self.clock)
+            )
+            self.size += size
+            if self.size > self.max_size:
+                evicted = []
+                for hash, entry_size in self.db.execute("SELECT hash, size FROM entries WHERE hash != ? ORDER BY used", (key,)):
+                    if self.size <= self.max_size:
+                        break
+                    evicted.append(hash)
+                    self.size -= entry_size
+                self.db.executemany("DELETE FROM entries WHERE hash = ?", [(hash,) for hash in evicted])
+                for hash in evicted:
+                    try:
+                        os.remove(self._get_path(hash))
+                    except OSError:
+                        pass
+            self.db.commit()
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self.lock:
+            for (hash,) in self.db.execute("SELECT hash FROM entries").fetchall():
+                try:
+                    os.remove(self._get_path(hash))
+                except OSError:
+                    pass
+            self.db.execute("DELETE FROM entries")
+            self.db.commit()
+            self.size = 0
+
+    def get_stats(self) -> dict:
+        """Get cache statistics
+
+        Returns:
+            dict: number of hits and misses, hit rate, cached entries and size on disk in bytes
+        """
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests > 0 else 0.0,
+            "entries": entries,
+            "size": self.size,
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".audio")
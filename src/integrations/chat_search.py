@@ -0,0 +1,44 @@
+from ..extensions import NewelleExtension
+from ..tools import Tool, ToolResult
+
+
+class ChatSearchIntegration(NewelleExtension):
+    id = "chat_search"
+    name = "Chat Search"
+
+    @property
+    def controller(self):
+        return self.ui_controller.window.controller
+
+    def search_chats(self, query: str, max_results: int = 10, semantic: bool = False):
+        result = ToolResult()
+        results = self.controller.search_chats(query, max(1, min(max_results, 50)), semantic)
+        if not results:
+            result.set_output("No messages found for: " + query)
+            return result
+        lines = []
+        for found in results:
+            lines.append(
+                f"- Chat {found['chat_id']} \"{found['chat_name']}\", message {found['position']} "
+                f"({found['role']}): {found['snippet']}"
+            )
+        result.set_output("\n".join(lines))
+        return result
+
+    def get_tools(self) -> list:
+        return [
+            Tool(
+                name="search_chats",
+                description=(
+                    "Search the messages of all the previous chats with the user. "
+                    "Returns the chat, the position and a snippet of the matching messages. "
+                    "Set semantic=true to also find messages with a similar meaning, it is slower."
+                ),
+                func=self.search_chats,
+                title="Search Chats",
+                default_on=True,
+                icon_name="system-search-symbolic",
+                tools_group=_("Agent"),
+                side_effect_free=True,
+            )
+        ]
@@ -1183,7 +1183,8 @@ class FileEditingIntegration(NewelleExtension):
                 restore_func=self.read_file_restore,
                 default_on=True,
                 icon_name="document-open-symbolic",
-                tools_group="File Operations"
+                tools_group="File Operations",
+                side_effect_free=True
             ),
             Tool(
                 name="write_file",
@@ -1213,7 +1214,8 @@ class FileEditingIntegration(NewelleExtension):
                 restore_func=self.glob_restore,
                 default_on=True,
                 icon_name="folder-saved-search-symbolic",
-                tools_group="File Operations"
+                tools_group="File Operations",
+                side_effect_free=True
             ),
             Tool(
                 name="list_directory",
@@ -1224,6 +1226,7 @@ class FileEditingIntegration(NewelleExtension):
                 default_on=True,
                 icon_name="folder-open-symbolic",
                 tools_group="File Operations",
+                side_effect_free=True,
                 schema={
                     "type": "object",
                     "properties": {
@@ -1249,6 +1252,7 @@ class FileEditingIntegration(NewelleExtension):
                 default_on=True,
                 icon_name="edit-find-symbolic",
                 tools_group="File Operations",
+                side_effect_free=True,
                 schema={
                     "type": "object",
                     "properties": {
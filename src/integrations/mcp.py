@@ -4,38 +4,43 @@ import threading
 import json 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from gi.repository import GLib
 from ..utility.system import is_flatpak
+from .mcp_sessions import MCPSessionPool
 
 
 class _CachedTool:
     """Lightweight stand-in for an MCP SDK tool object loaded from the cache."""
 
-    __slots__ = ("name", "description", "inputSchema")
+    __slots__ = ("name", "description", "inputSchema", "read_only")
 
-    def __init__(self, name: str, description: str, input_schema: dict):
+    def __init__(self, name: str, description: str, input_schema: dict, read_only: bool = False):
         self.name = name
         self.description = description
         self.inputSchema = input_schema
+        self.read_only = read_only
 
 
 class MCPIntegration(NewelleExtension):
     id = "mcp"
     name = "MCP"
+    # Seconds to wait for the tool list of a single server
+    DISCOVERY_TIMEOUT = 30
 
     def __init__(self, pip_path, extension_path, settings):
         super().__init__(pip_path, extension_path, settings)
         self.mcp_servers = json.loads(self.settings.get_string("mcp-servers"))
         self.tools = []
         self.tools_dict = {}  # Maps tool_name -> server_info dict
-        self.stdio_sessions = {}  # Keep stdio sessions alive
+        self.server_tools = {}  # Maps server identifier -> (server_info, tools)
+        self._tools_lock = threading.Lock()
+        self.sessions = MCPSessionPool()  # Keep one session per server alive
         self._cache_path = os.path.join(extension_path, "mcp_tool_cache.json")
 
-        if self._load_from_cache():
-            # Cache hit -- refresh in background so next startup stays fresh
-            threading.Thread(target=self._background_refresh, daemon=True).start()
-        else:
-            self.update_tools()
+        # Serve cached tools immediately, then refresh every server in background
+        self._load_from_cache()
+        self.update_tools()
 
     def _get_config_dir(self):
         """Return the Newelle config directory (where OAuth creds are stored)."""
@@ -125,29 +130,34 @@ class MCPIntegration(NewelleExtension):
             entry = cache.get(identifier)
             if not entry or "tools" not in entry:
                 continue
-            for td in entry["tools"]:
-                stub = _CachedTool(td["name"], td.get("description", ""), td.get("inputSchema", {}))
-                self.tools.append(stub)
-                self.tools_dict[stub.name] = server_info
+            tools = [
+                _CachedTool(td["name"], td.get("description", ""), td.get("inputSchema", {}), td.get("readOnly", False))
+                for td in entry["tools"]
+            ]
+            with self._tools_lock:
+                self.server_tools[identifier] = (server_info, tools)
             loaded_any = True
 
+        if loaded_any:
+            self._rebuild_tools()
         return loaded_any
 
     def _save_cache(self):
         """Persist current tool metadata so future startups can skip connections."""
         cache: dict = {}
+        with self._tools_lock:
+            server_tools = list(self.server_tools.items())
         # Group tools by server identifier
-        for tool in self.tools:
-            server_info = self.tools_dict.get(tool.name, {})
-            identifier = self._get_server_identifier(server_info)
-            if identifier not in cache:
-                cache[identifier] = {"tools": [], "cached_at": time.time()}
-            schema = tool.inputSchema if hasattr(tool, "inputSchema") else {}
-            cache[identifier]["tools"].append({
-                "name": tool.name,
-                "description": tool.description,
-                "inputSchema": schema,
-            })
+        for identifier, (server_info, tools) in server_tools:
+            cache[identifier] = {"tools": [], "cached_at": time.time()}
+            for tool in tools:
+                schema = tool.inputSchema if hasattr(tool, "inputSchema") else {}
+                cache[identifier]["tools"].append({
+                    "name": tool.name,
+                    "description": tool.description,
+                    "inputSchema": schema,
+                    "readOnly": self._is_read_only(tool),
+                })
         try:
             os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
             with open(self._cache_path, "w") as f:
@@ -155,17 +165,47 @@ class MCPIntegration(NewelleExtension):
         except OSError as e:
             print(f"MCP cache write error: {e}")
 
-    def _background_refresh(self):
-        """Re-fetch tools from all servers and update the cache."""
-        old_tools = self.tools
-        old_dict = self.tools_dict
-        self.tools = []
-        self.tools_dict = {}
-        self.async_get_tools()
-        if not self.tools:
-            # Restore from previous state if refresh fails entirely
-            self.tools = old_tools
-            self.tools_dict = old_dict
+    @staticmethod
+    def _is_read_only(tool) -> bool:
+        """Return True if the server declares that the tool does not modify its environment."""
+        if isinstance(tool, _CachedTool):
+            return tool.read_only
+        annotations = getattr(tool, "annotations", None)
+        return bool(annotations is not None and getattr(annotations, "readOnlyHint", False))
+
+    def _get_tools_signature(self, tools) -> list:
+        """Return a comparable description of a tool list, used to detect changes."""
+        return [
+            (tool.name, tool.description, json.dumps(getattr(tool, "inputSchema", {}), sort_keys=True, default=str), self._is_read_only(tool))
+            for tool in tools
+        ]
+
+    def _rebuild_tools(self):
+        """Rebuild the tool list and the tool -> server map from the tools of every server."""
+        tools = []
+        tools_dict = {}
+        with self._tools_lock:
+            for server_info, server_tools in self.server_tools.values():
+                for tool in server_tools:
+                    tools.append(tool)
+                    tools_dict[tool.name] = server_info
+        # Replace the objects at once so that readers never see a partial list
+        self.tools_dict = tools_dict
+        self.tools = tools
+
+    def _set_server_tools(self, server_info, tools) -> bool:
+        """Set the tools of a server.
+
+        Returns True if the tool list of the server changed.
+        """
+        identifier = self._get_server_identifier(server_info)
+        with self._tools_lock:
+            old = self.server_tools.get(identifier)
+            changed = old is None or self._get_tools_signature(old[1]) != self._get_tools_signature(tools)
+            self.server_tools[identifier] = (server_info, tools)
+        if changed:
+            self._rebuild_tools()
+        return changed
 
     def add_mcp_server(self, url=None, title=None, bearer_token=None, client_id=None, custom_headers=None,
                        server_type="http", command=None, args=None, env=None, oauth_mode=False):
@@ -195,14 +235,13 @@ class MCPIntegration(NewelleExtension):
                 }
                 tools = self.sync_get_tools(url, server_info=server_info, client_id=client_id)
             
-            self.tools.extend(tools)
-            for tool in tools:
-                self.tools_dict[tool.name] = server_info
+            self._set_server_tools(server_info, tools)
             self.ui_controller.require_tool_update()
         except Exception as e:
             raise
         
         self.mcp_servers.append(server_info)
+        self._save_cache()
         return True
 
     def remove_mcp_server(self, identifier):
@@ -222,45 +261,69 @@ class MCPIntegration(NewelleExtension):
                 break
         if server_to_remove:
             self.mcp_servers.remove(server_to_remove)
-        self.tools = []
-        self.tools_dict = {}
-        self.update_tools()
+            self.sessions.close(identifier)
+        with self._tools_lock:
+            self.server_tools.pop(identifier, None)
+        self._rebuild_tools()
         self._save_cache()
         if hasattr(self, "ui_controller"):
             self.ui_controller.require_tool_update()
         return True
 
     def update_tools(self):
-        t = threading.Thread(target=self.async_get_tools)
+        t = threading.Thread(target=self.async_get_tools, daemon=True)
         t.start()
 
+    def _fetch_server_tools(self, server_info) -> list:
+        """Get the tools of a server, waiting at most DISCOVERY_TIMEOUT seconds."""
+        if server_info.get("type") == "stdio":
+            return self.sync_get_tools_stdio(
+                server_info["command"],
+                server_info.get("args") or [],
+                server_info.get("env"),
+                timeout=self.DISCOVERY_TIMEOUT
+            )
+        return self.sync_get_tools(
+            server_info["url"],
+            server_info=server_info,
+            client_id=server_info.get("client_id"),
+            timeout=self.DISCOVERY_TIMEOUT
+        )
+
     def async_get_tools(self) -> list:
-        for server in self.mcp_servers:
-            server_info = self._get_server_info(server)
-            identifier = self._get_server_identifier(server_info)
-            print(f"Loading tools from: {identifier}")
-            try:
-                if server_info.get("type") == "stdio":
-                    tools = self.sync_get_tools_stdio(
-                        server_info["command"], 
-                        server_info.get("args") or [], 
-                        server_info.get("env")
-                    )
-                else:
-                    tools = self.sync_get_tools(
-                        server_info["url"],
-                        server_info=server_info,
-                        client_id=server_info.get("client_id")
-                    )
-                print(tools)
-                self.tools.extend(tools)
-                for tool in tools:
-                    self.tools_dict[tool.name] = server_info
-            except Exception as e:
-                print(f"Error fetching tools from {identifier}: {e}")
-        self._save_cache()
-        if hasattr(self, "ui_controller"):
-            self.ui_controller.require_tool_update()
+        """Fetch the tools of every server concurrently, merging each result as it arrives.
+
+        Servers that fail or time out keep the tools loaded from the cache.
+        """
+        servers = [self._get_server_info(server) for server in self.mcp_servers]
+        # Forget servers that are no longer configured
+        identifiers = {self._get_server_identifier(server_info) for server_info in servers}
+        with self._tools_lock:
+            removed = [identifier for identifier in self.server_tools if identifier not in identifiers]
+            for identifier in removed:
+                del self.server_tools[identifier]
+        changed = len(removed) > 0
+        if changed:
+            self._rebuild_tools()
+        if servers:
+            with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+                futures = {executor.submit(self._fetch_server_tools, server_info): server_info for server_info in servers}
+                for future in as_completed(futures):
+                    server_info = futures[future]
+                    identifier = self._get_server_identifier(server_info)
+                    try:
+                        tools = future.result()
+                    except Exception as e:
+                        print(f"Error fetching tools from {identifier}: {e}")
+                        continue
+                    if self._set_server_tools(server_info, tools):
+                        changed = True
+                        if hasattr(self, "ui_controller"):
+                            self.ui_controller.require_tool_update()
+        if changed:
+            self._save_cache()
+            if removed and hasattr(self, "ui_controller"):
+                self.ui_controller.require_tool_update()
         return self.tools
 
     def execute_tool(self, name) -> str:
@@ -315,6 +378,7 @@ class MCPIntegration(NewelleExtension):
             tools.append(Tool(
                 tool.name, tool.description, self.execute_tool(tool.name),
                 tool.inputSchema, tools_group=tools_group, default_lazy_load=True,
+                side_effect_free=self._is_read_only(tool),
             ))
         if tools:
             tool_search = Tool(
@@ -334,6 +398,7 @@ class MCPIntegration(NewelleExtension):
                 tools_group="Agent",
                 default_lazy_load=False,
                 icon_name="system-search-symbolic",
+                side_effect_free=True,
             )
             tools.append(tool_search)
         return tools
@@ -351,12 +416,8 @@ class MCPIntegration(NewelleExtension):
         result = self.sync_call_tool(tool_name, args)
         return result
 
-    def sync_get_tools(self, url, headers=None, client_id=None, server_info=None):
-        """Synchronous wrapper to get available tools (HTTP)"""
-        import asyncio
-        from mcp import ClientSession
-        from mcp.client.streamable_http import streamablehttp_client
-        
+    def _get_http_session_params(self, url, headers=None, server_info=None):
+        """Return the identifier, connection info and resolved headers of an HTTP server"""
         if headers is None:
             headers = {}
         resolved_headers = self._build_headers(
@@ -365,82 +426,42 @@ class MCPIntegration(NewelleExtension):
             server_info
         )
         request_url = (self._get_mcp_url_for_request(server_info) or url) if server_info else url
-        
-        async def _async_get_tools():
-            client_kwargs = {"url": request_url, "headers": resolved_headers}
-            async with streamablehttp_client(**client_kwargs) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    tools = await session.list_tools()
-                    return tools.tools
-        return asyncio.run(_async_get_tools())
+        identifier = self._get_server_identifier(server_info) if server_info else url
+        return identifier, {"type": "http", "url": request_url}, resolved_headers
+
+    def _get_stdio_session_params(self, command, args=None, env=None):
+        """Return the identifier and connection info of a stdio server"""
+        server_info = {"type": "stdio", "command": command, "args": args or [], "env": env}
+        return self._get_server_identifier(server_info), server_info
+
+    @staticmethod
+    async def _list_tools(session):
+        tools = await session.list_tools()
+        return tools.tools
+
+    def sync_get_tools(self, url, headers=None, client_id=None, server_info=None, timeout=None):
+        """Synchronous wrapper to get available tools (HTTP)"""
+        identifier, connection_info, resolved_headers = self._get_http_session_params(url, headers, server_info)
+        return self.sessions.run(identifier, connection_info, self._list_tools, resolved_headers, timeout=timeout)
 
     def sync_call_tool(self, url, tool_name, arguments, headers=None, client_id=None, server_info=None):
         """Synchronous wrapper to call a tool"""
-        import asyncio
-        from mcp import ClientSession
-        from mcp.client.streamable_http import streamablehttp_client
-        
-        if headers is None:
-            headers = {}
-        resolved_headers = self._build_headers(
-            server_info.get("bearer_token") if server_info else None,
-            server_info.get("custom_headers") if server_info else headers,
-            server_info
+        identifier, connection_info, resolved_headers = self._get_http_session_params(url, headers, server_info)
+        return self.sessions.run(
+            identifier, connection_info,
+            lambda session: session.call_tool(tool_name, arguments=arguments),
+            resolved_headers
         )
-        request_url = (self._get_mcp_url_for_request(server_info) or url) if server_info else url
-        
-        async def _async_call_tool():
-            client_kwargs = {"url": request_url, "headers": resolved_headers}
-            async with streamablehttp_client(**client_kwargs) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(tool_name, arguments=arguments)
-                    return result
-        return asyncio.run(_async_call_tool())
-
-    def sync_get_tools_stdio(self, command, args=None, env=None):
+
+    def sync_get_tools_stdio(self, command, args=None, env=None, timeout=None):
         """Synchronous wrapper to get available tools from stdio server"""
-        import asyncio
-        from mcp.client.stdio import stdio_client, StdioServerParameters
-        from mcp import ClientSession
-        
-        if args is None:
-            args = []
-        
-        async def _async_get_tools():
-            server_params = StdioServerParameters(
-                command=command,
-                args=args,
-                env=env
-            )
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    tools = await session.list_tools()
-                    return tools.tools
-        
-        return asyncio.run(_async_get_tools())
+        identifier, connection_info = self._get_stdio_session_params(command, args, env)
+        return self.sessions.run(identifier, connection_info, self._list_tools, timeout=timeout)
 
     def sync_call_tool_stdio(self, command, args, env, tool_name, arguments):
         """Synchronous wrapper to call a tool on stdio server"""
-        import asyncio
-        from mcp.client.stdio import stdio_client, StdioServerParameters
-        from mcp import ClientSession
-        
-        if args is None:
-            args = []
-        
-        async def _async_call_tool():
-            server_params = StdioServerParameters(
-                command=command,
-                args=args,
-                env=env
-            )
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(tool_name, arguments=arguments)
-                    return result
-        
-        return asyncio.run(_async_call_tool())
+        identifier, connection_info = self._get_stdio_session_params(command, args, env)
+        return self.sessions.run(
+            identifier, connection_info,
+            lambda session: session.call_tool(tool_name, arguments=arguments)
+        )
@@ -0,0 +1,204 @@
+"""
+Pool of long-lived MCP client sessions.
+
+A background asyncio loop owns one initialized ClientSession per server, so tool
+calls only cost a request round-trip instead of a process spawn (stdio) or a new
+connection (HTTP) plus the initialize handshake.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+# Seconds to wait for a server to start and complete the handshake
+CONNECT_TIMEOUT = 30
+# Sessions idle for longer than this are pinged before being reused
+HEALTH_CHECK_INTERVAL = 60
+# Seconds to wait for the answer to a ping
+PING_TIMEOUT = 5
+
+
+class _ServerConnection:
+    """A session kept open by a task running on the pool loop.
+
+    Transport and session context managers must be entered and exited by the
+    same task, so the task holds them until close() is called.
+    """
+
+    def __init__(self, server_info: dict, headers: dict | None):
+        self.server_info = server_info
+        self.headers = headers
+        self.session = None
+        self.closed = False
+        self.last_used = time.monotonic()
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    def _open_transport(self):
+        if self.server_info.get("type") == "stdio":
+            from mcp.client.stdio import stdio_client, StdioServerParameters
+            params = StdioServerParameters(
+                command=self.server_info["command"],
+                args=self.server_info.get("args") or [],
+                env=self.server_info.get("env")
+            )
+            return stdio_client(params)
+        from mcp.client.streamable_http import streamablehttp_client
+        return streamablehttp_client(url=self.server_info["url"], headers=self.headers or {})
+
+    async def _run(self):
+        from mcp import ClientSession
+        try:
+            async with self._open_transport() as streams:
+                read, write = streams[0], streams[1]
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self.ready.set_result(session)
+                    await self._closing.wait()
+        except BaseException as e:
+            if not self.ready.done():
+                self.ready.set_exception(e if isinstance(e, Exception) else ConnectionError("MCP session cancelled"))
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.session = None
+            if not self.ready.done():
+                self.ready.set_exception(ConnectionError("MCP session closed"))
+
+    def is_alive(self) -> bool:
+        return not self.closed and not self.task.done() and not self._closing.is_set()
+
+    async def close(self):
+        self._closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self.task), CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """Keeps one initialized MCP session per server on a background event loop
+
+    Requests from any thread are multiplexed over the shared sessions. Dead or
+    unresponsive sessions are detected and reopened transparently.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._connections: dict[str, _ServerConnection] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="mcp-sessions")
+                self._thread.start()
+                # Let stdio servers shut down cleanly
+                atexit.register(self.close)
+            return self._loop
+
+    def run(self, identifier: str, server_info: dict, request: Callable[[Any], Awaitable[Any]],
+            headers: dict | None = None, timeout: float | None = None) -> Any:
+        """Run a request on the session of a server, opening it if needed
+
+        Args:
+            identifier: unique identifier of the server
+            server_info: server configuration, see MCPIntegration._get_server_info
+            request: coroutine function called with the ClientSession
+            headers: HTTP headers, the session is reopened when they change
+            timeout: maximum time to wait for the result, None for no limit
+
+        Returns:
+            The result of the request
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._run_request(identifier, server_info, request, headers), self._get_loop()
+        )
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def _run_request(self, identifier, server_info, request, headers):
+        import anyio
+        from mcp.shared.exceptions import McpError
+        from mcp.types import CONNECTION_CLOSED
+        for attempt in range(2):
+            connection = await self._get_connection(identifier, server_info, headers, fresh=attempt > 0)
+            try:
+                result = await request(connection.session)
+                connection.last_used = time.monotonic()
+                return result
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                # The session died before the request was sent, retry once on a new one
+                connection.closed = True
+                if attempt > 0:
+                    raise
+            except McpError as e:
+                if e.error.code == CONNECTION_CLOSED:
+                    # The request may have been executed, reconnect only for the next one
+                    connection.closed = True
+                raise
+        raise ConnectionError(f"Could not connect to MCP server {identifier}")
+
+    async def _get_connection(self, identifier, server_info, headers, fresh=False) -> _ServerConnection:
+        lock = self._locks.setdefault(identifier, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(identifier)
+            if connection is not None and (fresh or not await self._is_healthy(connection, server_info, headers)):
+                await connection.close()
+                connection = None
+            if connection is None:
+                connection = _ServerConnection(server_info, headers)
+                self._connections[identifier] = connection
+                try:
+                    await asyncio.wait_for(asyncio.shield(connection.ready), CONNECT_TIMEOUT)
+                except BaseException:
+                    self._connections.pop(identifier, None)
+                    await connection.close()
+                    raise
+            return connection
+
+    async def _is_healthy(self, connection: _ServerConnection, server_info: dict, headers: dict | None) -> bool:
+        if not connection.is_alive() or connection.session is None:
+            return False
+        if json.dumps(connection.server_info, sort_keys=True) != json.dumps(server_info, sort_keys=True) or connection.headers != headers:
+            return False
+        if time.monotonic() - connection.last_used > HEALTH_CHECK_INTERVAL:
+            try:
+                await asyncio.wait_for(connection.session.send_ping(), PING_TIMEOUT)
+            except Exception:
+                return False
+            connection.last_used = time.monotonic()
+        return True
+
+    def close(self, identifier: str | None = None):
+        """Close the session of a server, or all sessions if identifier is None"""
+        if self._loop is None:
+            return
+
+        async def _close():
+            identifiers = list(self._connections) if identifier is None else [identifier]
+            for key in identifiers:
+                connection = self._connections.pop(key, None)
+                if connection is not None:
+                    await connection.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), self._loop).result(CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"Error closing MCP sessions: {e}")
@@ -129,7 +129,7 @@ class Command:
         return func_to_call(**kwargs)
 
 class Tool:
-    def __init__(self, name: str, description: str, func: Callable, schema: Dict[str, Any] = None, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False):
+    def __init__(self, name: str, description: str, func: Callable, schema: Dict[str, Any] = None, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False, side_effect_free: bool = False):
         self.name = name
         self.description = description
         self.func = func
@@ -142,6 +142,8 @@ class Tool:
         self.tools_group = tools_group
         self.icon_name = icon_name
         self.default_lazy_load = default_lazy_load
+        # Tools that only read data can run concurrently with other tool calls
+        self.side_effect_free = side_effect_free
 
     def restore(self, **kwargs):
         if self.restore_func is not None:
@@ -290,14 +292,14 @@ class ToolRegistry:
         return f"<tools>\n{tools_json}\n</tools>"
 
 
-def tool(name: str, description: str, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None):
+def tool(name: str, description: str, run_on_main_thread: bool = False, title: str = None, prompt_editable: bool = True, restore_func: Callable = None, default_on: bool = True, tools_group: str = None, icon_name: str = None, side_effect_free: bool = False):
     """Decorator to register a function as a tool."""
     def decorator(func):
-        t = Tool(name, description, func, run_on_main_thread=run_on_main_thread, title=title, prompt_editable=prompt_editable, restore_func=restore_func, default_on=default_on, tools_group=tools_group, icon_name=icon_name)
+        t = Tool(name, description, func, run_on_main_thread=run_on_main_thread, title=title, prompt_editable=prompt_editable, restore_func=restore_func, default_on=default_on, tools_group=tools_group, icon_name=icon_name, side_effect_free=side_effect_free)
         return t
     return decorator
 
-def create_io_tool(name: str, description: str, func: Callable, title: str = None, create_separate_process=False, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False) -> Tool:
+def create_io_tool(name: str, description: str, func: Callable, title: str = None, create_separate_process=False, default_on: bool = True, tools_group: str = None, icon_name: str = None, default_lazy_load: bool = False, side_effect_free: bool = False) -> Tool:
     def wrapper(**kwargs):
         result = ToolResult()
         def th():
@@ -306,7 +308,7 @@ def create_io_tool(name: str, description: str, func: Callable, title: str = Non
         GLib.idle_add(t.start)
         return result
 
-    t = Tool(name, description, wrapper, title=title, default_on=default_on, tools_group=tools_group, icon_name=icon_name, restore_func=None, default_lazy_load=default_lazy_load)
+    t = Tool(name, description, wrapper, title=title, default_on=default_on, tools_group=tools_group, icon_name=icon_name, restore_func=None, default_lazy_load=default_lazy_load, side_effect_free=side_effect_free)
     schema = t._generate_schema_from_func(func)
     t.schema = schema
     return t
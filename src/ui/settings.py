@@ -411,6 +411,17 @@ class Settings(Adw.PreferencesWindow):
         self.settings.bind("hide-history-on-launch", switch, 'active', Gio.SettingsBindFlags.DEFAULT)
         self.interface.add(row)
 
+        chats_cache_spin = Adw.SpinRow(
+            title=_("Chats kept in memory"),
+            subtitle=_("Number of recently used chats whose messages are kept in memory, the others are loaded when opened"),
+            adjustment=Gtk.Adjustment(lower=1, upper=500, value=self.settings.get_int("chats-cache-size"), step_increment=1, page_increment=10),
+        )
+        def update_chats_cache_size(spin, _input):
+            self.settings.set_int("chats-cache-size", int(spin.get_value()))
+            return False
+        chats_cache_spin.connect("input", update_chats_cache_size)
+        self.interface.add(chats_cache_spin)
+
         row = Adw.ActionRow(title=_("Remember assistant profile per chat"), subtitle=_("When changing chat, the profile corresponding to the last generation is selected"))
         switch = Gtk.Switch(valign=Gtk.Align.CENTER)
         row.add_suffix(switch)
@@ -2,7 +2,6 @@ from gi.repository import Gtk, Adw, GLib, Gio, GObject, Gdk
 import threading
 import time
 import os
-import wave
 import struct
 import math
 import gettext
@@ -882,27 +881,14 @@ class CallPanel(Gtk.Box):
         if not self.speech_buffer:
             return
         
-        # Save audio to temp file
-        temp_path = os.path.join(self.controller.cache_dir, "call_recording.wav")
-        try:
-            wf = wave.open(temp_path, 'wb')
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(self.sample_rate)
-            wf.writeframes(b''.join(self.speech_buffer))
-            wf.close()
-        except Exception as e:
-            print(f"Error saving audio: {e}")
-            return
-        
         # Recognize speech
         threading.Thread(
             target=self._recognize_and_respond,
-            args=(temp_path,),
+            args=(b''.join(self.speech_buffer),),
             daemon=True
         ).start()
     
-    def _recognize_and_respond(self, audio_path):
+    def _recognize_and_respond(self, audio):
         """Recognize speech and get AI response"""
         try:
             # Get STT handler
@@ -917,7 +903,7 @@ class CallPanel(Gtk.Box):
                 return
 
             # Recognize
-            text = stt.recognize_file(audio_path)
+            text = stt.recognize_audio(audio, self.sample_rate)
             if not text or text.strip() == "":
                 return
 
@@ -940,13 +926,19 @@ class CallPanel(Gtk.Box):
     
     def _get_ai_response(self, user_message):
         """Get AI response and play TTS using run_llm_with_tools"""
+        pipeline = None
         try:
             if self.chat_id is None:
                 self.chat_id = self.controller.create_call_chat()
             streaming_text = ""
+            # Speak every sentence as soon as it is generated
+            pipeline = self._create_tts_pipeline()
             def on_message_callback(text):
                 nonlocal streaming_text
                 streaming_text += text
+                if pipeline is not None:
+                    # Streaming handlers pass the whole message generated so far
+                    pipeline.update(text)
 
             def on_tool_result_callback(tool_name, result):
                 tool_output = result.get_output() if result else "Tool executed"
@@ -973,9 +965,15 @@ class CallPanel(Gtk.Box):
 
             if response:
                 GLib.idle_add(self._add_message_to_history, self.profile_name, response, False)
-                if self.call_active:
-                    response = clean_message_tts(response) 
-                    self._play_tts(response)
+            if pipeline is not None:
+                if response and self.call_active:
+                    pipeline.finish()
+                    pipeline.wait()
+                else:
+                    pipeline.stop()
+            elif response and self.call_active:
+                response = clean_message_tts(response) 
+                self._play_tts(response)
 
         except Exception as e:
             import traceback
@@ -983,6 +981,8 @@ class CallPanel(Gtk.Box):
             print(f"LLM error: {e}")
             # Ensure flag is reset
             self.controller.is_call_request = False
+            if pipeline is not None:
+                pipeline.stop()
             GLib.idle_add(
                 self._add_message_to_history,
                 "System",
@@ -999,15 +999,8 @@ class CallPanel(Gtk.Box):
         response = remove_emoji(response) 
         return response.strip()
     
-    def _play_tts(self, text):
-        """Play TTS for the response"""
-        if not text or not self.call_active:
-            return
-
-        tts = self.controller.handlers.tts
-        if not tts:
-            return
-
+    def _connect_tts(self, tts):
+        """Show the assistant as speaking while TTS is playing"""
         def on_tts_start():
             if self.call_active:
                 GLib.idle_add(self._set_assistant_speaking, True)
@@ -1019,6 +1012,29 @@ class CallPanel(Gtk.Box):
         tts.connect("start", on_tts_start)
         tts.connect("stop", on_tts_stop)
 
+    def _create_tts_pipeline(self):
+        """Create a TTS pipeline to speak the response while it is generated"""
+        tts = self.controller.handlers.tts
+        if not tts or not self.call_active:
+            return None
+        self._connect_tts(tts)
+        try:
+            return tts.create_pipeline()
+        except Exception as e:
+            print(f"TTS error: {e}")
+            return None
+
+    def _play_tts(self, text):
+        """Play TTS for the response"""
+        if not text or not self.call_active:
+            return
+
+        tts = self.controller.handlers.tts
+        if not tts:
+            return
+
+        self._connect_tts(tts)
+
         try:
             tts.play(text)
         except Exception as e:
@@ -15,6 +15,9 @@ SCHEMA_ID = "io.github.qwersyk.Newelle"
 
 
 class ChatHistory(Gtk.Box):
+    # Messages of the chat, unloaded when they are far from the view
+    WINDOWED_MESSAGE_TYPES = ("User", "Assistant", "Command", "File", "Folder")
+
     __gsignals__ = {
         "focus-input": (GObject.SignalFlags.RUN_LAST, None, ()),
         "branch-requested": (GObject.SignalFlags.RUN_LAST, None, (GObject.TYPE_INT,)),
@@ -39,8 +42,10 @@ class ChatHistory(Gtk.Box):
         self.lazy_loaded_start = 0  # First loaded message index
         self.lazy_loaded_end = 0  # Last loaded message index (exclusive)
         self.lazy_loading_in_progress = False
+        self.lazy_load_max_messages = 4 * self.lazy_load_batch_size  # Messages kept loaded, the farthest from the view are unloaded
         self.scroll_handler_id = None  # Store scroll handler ID to disconnect when needed
         self._preamble_row_count = 0  # Number of warning/disclaimer rows at the top
+        self.message_rows = []  # (message index, row) of the loaded chat messages, in display order
 
         self.messages_box = []
         self.edit_entries = {}
@@ -164,7 +169,7 @@ class ChatHistory(Gtk.Box):
                                 if result and result.widget is not None:
                                     self.add_message("Command", result.widget, id_message=i, editable=True)
                 elif self.chat[i]["User"] in ["File", "Folder"]:
-                    self.add_message(self.chat[i]["User"], self.get_file_button(self.chat[i]["Message"][1 : len(self.chat[i]["Message"])]))
+                    self.add_message(self.chat[i]["User"], self.get_file_button(self.chat[i]["Message"][1 : len(self.chat[i]["Message"])]), id_message=i)
         GLib.timeout_add(200, self.scrolled_chat)
         GLib.idle_add(self.update_button_text)
 
@@ -479,6 +484,24 @@ class ChatHistory(Gtk.Box):
         Returns:
            message box
         """
+        # Only rows of messages in the chat are windowed, their id is the message index
+        is_chat_message = user in self.WINDOWED_MESSAGE_TYPES and id_message >= 0
+        if is_chat_message and self.lazy_load_enabled and not self.lazy_loading_in_progress and id_message > self.lazy_loaded_end:
+            # The messages before the new one were unloaded, load them back first
+            self.lazy_loading_in_progress = True
+            start = max(self.lazy_loaded_end, id_message - self.lazy_load_max_messages + 1)
+            if start > self.lazy_loaded_end:
+                # The loaded messages would be unloaded right away, only load the last ones like show_chat
+                rows = []
+                row = self.message_rows[0][1] if self.message_rows else None
+                while row is not None:
+                    rows.append(row)
+                    row = row.get_next_sibling()
+                self._remove_rows(self.message_rows, rows)
+                self.message_rows = []
+                self.lazy_loaded_start = start
+            self._load_message_range(start, id_message)
+            self.lazy_loading_in_progress = False
         box = Gtk.Box(
             css_classes=["card"],
             margin_top=10,
@@ -683,6 +706,10 @@ class ChatHistory(Gtk.Box):
         elif message is not None:
             content_box.append(message)
         self.chat_list_block.append(box)
+        if is_chat_message:
+            self.message_rows.append((id_message, box.get_parent()))
+            if not self.lazy_loading_in_progress:
+                self._unload_messages(oldest=True)
         return box
 
     def build_edit_box(self, box, id, has_prompt: bool = True):
@@ -866,6 +893,7 @@ class ChatHistory(Gtk.Box):
             del self.chat[idx]
 
         try:
+            self.message_rows = [(i, row) for i, row in self.message_rows if row is not box.get_parent()]
             self.chat_list_block.remove(box.get_parent())
             self.messages_box.remove(box)
         except Exception:
@@ -1173,6 +1201,7 @@ class ChatHistory(Gtk.Box):
                     self.get_file_button(
                         self.chat[i]["Message"][1 : len(self.chat[i]["Message"])]
                     ),
+                    id_message=i,
                 )
     
     def _on_scroll_changed(self, adjustment):
@@ -1250,7 +1279,7 @@ class ChatHistory(Gtk.Box):
                 new_messages_box_items.append(wrapper_box)
                 row = Gtk.ListBoxRow()
                 row.set_child(wrapper_box)
-                new_rows.append(row)
+                new_rows.append((i, row))
                 continue
             elif self.chat[i]["User"] in ["File", "Folder"]:
                 # For file/folder messages, create the wrapper box manually
@@ -1270,20 +1299,23 @@ class ChatHistory(Gtk.Box):
             new_messages_box_items.append(wrapper_box)
             row = Gtk.ListBoxRow()
             row.set_child(wrapper_box)
-            new_rows.append(row)
+            new_rows.append((i, row))
         
         # Insert rows at the correct position
-        for idx, row in enumerate(new_rows):
+        for idx, (i, row) in enumerate(new_rows):
             self.chat_list_block.insert(row, insert_position + idx)
+        self.message_rows[:0] = new_rows
         
         # Prepend to messages_box to maintain order
         for box in reversed(new_messages_box_items):
             self.messages_box.insert(0, box)
         
         self.lazy_loaded_start = new_start
+        # Newest messages are below the view, no scroll adjustment is needed
+        self._unload_messages(oldest=False)
         
-        # Restore scroll position (adjust for new content height)
-        GLib.idle_add(lambda: self._restore_scroll_position(current_value, current_upper))
+        # Restore scroll position (adjust for new content height) once the messages are parsed and rendered
+        self.controller.chunk_cache.submit(GLib.idle_add, lambda: self._restore_scroll_position(current_value, current_upper))
         self.lazy_loading_in_progress = False
     
     def _load_newer_messages(self):
@@ -1301,7 +1333,61 @@ class ChatHistory(Gtk.Box):
         self._load_message_range(self.lazy_loaded_end, new_end)
         
         self.lazy_loaded_end = new_end
-        self.lazy_loading_in_progress = False 
+        self._unload_messages(oldest=True)
+        self.lazy_loading_in_progress = False
+
+    def _unload_messages(self, oldest: bool):
+        """Remove the loaded messages farthest from the view, keeping at most lazy_load_max_messages
+
+        Unloaded messages are loaded again when scrolling back to them, destroying their
+        widgets frees code blocks, latex and mermaid renders.
+
+        Args:
+            oldest: remove the oldest messages, otherwise the newest
+        """
+        excess = len(self.message_rows) - self.lazy_load_max_messages
+        if not self.lazy_load_enabled or excess <= 0:
+            return
+        if oldest:
+            removed = self.message_rows[:excess]
+            del self.message_rows[:excess]
+            self.lazy_loaded_start = self.message_rows[0][0]
+            rows = [row for index, row in removed]
+            # Keep the visible messages in place
+            adjustment = self.chat_scroll.get_vadjustment()
+            removed_height = sum(row.get_height() for row in rows)
+            adjustment.set_value(max(adjustment.get_lower(), adjustment.get_value() - removed_height))
+        else:
+            if not self.status:
+                # The last message is being generated
+                return
+            removed = self.message_rows[-excess:]
+            del self.message_rows[-excess:]
+            self.lazy_loaded_end = removed[0][0]
+            # Remove errors and other rows shown after the unloaded messages too
+            rows = []
+            row = removed[0][1]
+            while row is not None:
+                rows.append(row)
+                row = row.get_next_sibling()
+        self._remove_rows(removed, rows)
+
+    def _remove_rows(self, removed: list, rows: list):
+        """Remove rows from the chat
+
+        Args:
+            removed: (message index, row) of the unloaded messages
+            rows: rows to remove, including the rows of the unloaded messages
+        """
+        for row in rows:
+            box = row.get_child()
+            if box in self.messages_box:
+                self.messages_box.remove(box)
+            if box is self.last_error_box:
+                self.last_error_box = None
+            self.chat_list_block.remove(row)
+        for index, row in removed:
+            self.edit_entries.pop(index, None)
     # File button
     def get_file_button(self, path):
         """Get the button for the file
@@ -1409,6 +1495,7 @@ class ChatHistory(Gtk.Box):
         # Clear existing messages from UI
         self.chat_list_block.remove_all()
         self.messages_box.clear()
+        self.message_rows = []
         self.last_error_box = None
         if len(self.chat) == 0:
             self.show_placeholder()
@@ -1423,8 +1510,17 @@ class ChatHistory(Gtk.Box):
                 self.add_message("Disclaimer")
             self._preamble_row_count = 1
 
-        # Re-populate the chat with all messages
-        for i in range(len(self.chat)):
+        # Reset lazy loading state
+        total_messages = len(self.chat)
+        if self.lazy_load_enabled and total_messages > self.lazy_load_batch_size:
+            self.lazy_loaded_start = max(0, total_messages - self.lazy_load_batch_size)
+            self.lazy_loaded_end = total_messages
+        else:
+            self.lazy_loaded_start = 0
+            self.lazy_loaded_end = total_messages
+
+        # Re-populate the chat with the last messages, older ones are loaded when scrolling up
+        for i in range(self.lazy_loaded_start, total_messages):
             if self.chat[i]["User"] == "User":
                 self.show_message(self.chat[i]["Message"], True, id_message=i, is_user=True)
             elif self.chat[i]["User"] == "Assistant":
@@ -1432,7 +1528,7 @@ class ChatHistory(Gtk.Box):
             elif self.chat[i]["User"] == "Console" and self.chat[i].get("skill_name"):
                 self._add_skill_message(i)
             elif self.chat[i]["User"] in ["File", "Folder"]:
-                self.add_message(self.chat[i]["User"], self.get_file_button(self.chat[i]["Message"][1 : len(self.chat[i]["Message"])]))
+                self.add_message(self.chat[i]["User"], self.get_file_button(self.chat[i]["Message"][1 : len(self.chat[i]["Message"])]), id_message=i)
             elif self.chat[i]["User"] == "Command":
                 cmd_name = self.chat[i]["Message"]
                 cmd = self.controller.get_command(cmd_name)
@@ -1440,16 +1536,7 @@ class ChatHistory(Gtk.Box):
                     if cmd.restore is not None:
                         r = cmd.restore()
                         if r.widget is not None:
-                            self.add_message("Command", r.widget)
-                        
-        # Reset lazy loading state
-        total_messages = len(self.chat)
-        if self.lazy_load_enabled and total_messages > self.lazy_load_batch_size:
-            self.lazy_loaded_start = max(0, total_messages - self.lazy_load_batch_size)
-            self.lazy_loaded_end = total_messages
-        else:
-            self.lazy_loaded_start = 0
-            self.lazy_loaded_end = total_messages
+                            self.add_message("Command", r.widget, id_message=i)
 
         # Update UI state
         GLib.idle_add(self.scrolled_chat)
@@ -1512,6 +1599,7 @@ class ChatHistory(Gtk.Box):
                 break
             self.chat_list_block.remove(child)
         self.messages_box = []
+        self.message_rows = []
         self.edit_entries = {}
         self.lazy_loaded_start = 0
         self.lazy_loaded_end = 0
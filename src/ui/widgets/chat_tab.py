@@ -48,6 +48,7 @@ class ChatTab(Gtk.Box):
         self.window = window
         self._chat_id = chat_id
         self.controller = window.controller
+        self.controller.pin_chat(chat_id)
         self.tab_page = None  # Will be set after tab is added to TabView
         
         # Streaming state - isolated per tab
@@ -56,6 +57,8 @@ class ChatTab(Gtk.Box):
         self.streaming_pending = False
         self.streaming_lock = threading.Lock()
         self.streamed_content = ""
+        self.tts_pipeline = None  # Speaks the streamed message while it is generated
+        self.tts_lock = threading.Lock()  # Guards tts_pipeline, used by the generation thread
         self.is_thinking = False
         self.thinking_text = ""
         self.main_text = ""
@@ -535,7 +538,9 @@ class ChatTab(Gtk.Box):
         self.history_stack.set_transition_duration(300)
         
         # Update internal chat_id
+        self.controller.unpin_chat(self._chat_id)
         self._chat_id = chat_id
+        self.controller.pin_chat(chat_id)
         
         # Update tab title
         self._update_tab_title()
@@ -643,6 +648,9 @@ class ChatTab(Gtk.Box):
             self.streaming_label = None
             self.last_update = time.time()
             self.stream_thinking = False
+            pipeline = self.take_tts_pipeline()
+            if pipeline is not None:
+                pipeline.stop()
             GLib.idle_add(self.create_streaming_message_label)
             
         def run_generation():
@@ -660,6 +668,9 @@ class ChatTab(Gtk.Box):
                     GLib.idle_add(self.reload_message, data)
                 elif status == 'error':
                     def handle_error_ui():
+                        pipeline = self.take_tts_pipeline()
+                        if pipeline is not None:
+                            pipeline.stop()
                         self.chat_history.show_message(data, False, -1, False, False, True)
                         self.remove_send_button_spinner()
                         self.status = True
@@ -700,9 +711,9 @@ class ChatTab(Gtk.Box):
             
             final_message = message_label
             
-            def finalize_stream():
-                streaming_widget.update_content(final_message, is_streaming=False)
-                streaming_widget.finish_streaming()
+            current_stream = self.stream_number_variable
+
+            def on_stream_finished():
                 self.chat_history._finalize_message_display()
                 self.save_chat()
                 
@@ -710,7 +721,6 @@ class ChatTab(Gtk.Box):
                 if streaming_widget.state.get("has_terminal_command", False):
                     threads = streaming_widget.state.get("running_threads", [])
                     parallel = self.controller.newelle_settings.parallel_tool_execution
-                    current_stream = self.stream_number_variable
                     
                     def wait_and_continue():
                         if not parallel:
@@ -732,8 +742,10 @@ class ChatTab(Gtk.Box):
                     threading.Thread(target=wait_and_continue).start()
                 else:
                     GLib.idle_add(self.chat_history.scrolled_chat)
-            
-            finalize_stream()
+
+            streaming_widget.update_content(final_message, is_streaming=False)
+            # The final content is rendered without blocking, the tools run when it is ready
+            streaming_widget.finish_streaming(on_stream_finished)
             self.current_streaming_message = None
         else:
             # No streaming, standard display
@@ -761,7 +773,12 @@ class ChatTab(Gtk.Box):
         
         # TTS
         tts_thread = None
-        if self.tts_enabled:
+        pipeline = self.take_tts_pipeline()
+        if pipeline is not None:
+            pipeline.finish(message_label)
+            tts_thread = threading.Thread(target=pipeline.wait)
+            tts_thread.start()
+        elif self.tts_enabled:
             message = clean_message_tts(message_label)
             if message.strip() and not message.isspace():
                 tts_thread = threading.Thread(
@@ -805,10 +822,29 @@ class ChatTab(Gtk.Box):
             pass
         self.streaming_box.set_overflow(Gtk.Overflow.VISIBLE)
         
+    def take_tts_pipeline(self):
+        """Detach the pipeline speaking the streamed message, None if there is none"""
+        with self.tts_lock:
+            pipeline = self.tts_pipeline
+            self.tts_pipeline = None
+            return pipeline
+
     def update_message(self, message, stream_number_variable, *args):
         """Update message label when streaming (thread-safe)."""
         if self.stream_number_variable != stream_number_variable:
             return
+
+        if self.tts_enabled:
+            with self.tts_lock:
+                pipeline = self.tts_pipeline
+                if pipeline is None:
+                    pipeline = self.tts.create_pipeline()
+                    if self.stream_number_variable != stream_number_variable:
+                        # Stopped while the pipeline was created
+                        pipeline.stop()
+                        return
+                    self.tts_pipeline = pipeline
+            pipeline.update(message)
         
         if time.time() - self.last_update >= 0.2:
             self.last_update = time.time()
@@ -913,12 +949,16 @@ class ChatTab(Gtk.Box):
         
     def stop_chat(self):
         """Stop the current generation."""
+        # Invalidate the stream first, so that late updates do not create a new pipeline
+        self.stream_number_variable += 1
         self.model.stop()
+        pipeline = self.take_tts_pipeline()
+        if pipeline is not None:
+            pipeline.stop()
         for tool_result in self.active_tool_results:
             tool_result.cancel()
         self.active_tool_results = []
         self.status = True
-        self.stream_number_variable += 1
 
         # Persist the incomplete streamed message to chat so that
         # tool outputs (Console messages) aren't orphaned when the user
@@ -9,7 +9,7 @@ import tempfile
 import socket
 from gi.repository import Gtk, GLib, Pango, GdkPixbuf, Gio, Gdk
 
-from ...utility.message_chunk import get_message_chunks, MessageChunk
+from ...utility.message_chunk import get_message_chunks, MessageChunk, MessageChunker
 from ...utility.strings import markwon_to_pango, remove_thinking_blocks, simple_markdown_to_pango, quote_string
 from pylatexenc.latex2text import LatexNodes2Text
 
@@ -39,6 +39,8 @@ class Message(Gtk.Box):
         # State tracking
         self.widgets_map = [] # List of tuples (chunk_type, widget, chunk_data)
         self.streaming = False
+        # Parses only the new text while the message is streamed
+        self.chunker = None
         self.state = {
             "codeblock_id": -1,
             "id_message": id_message,
@@ -65,20 +67,49 @@ class Message(Gtk.Box):
         self.update_content(message)
 
     def update_content(self, message: str, is_streaming: bool = False):
-        """Update the message content safely from any thread."""
+        """Update the message content safely from any thread.
+
+        The message is parsed on the chunk cache thread, only the widgets are updated on the main loop.
+        """
         self.message = message
         self.streaming = is_streaming
         self._render_serial = getattr(self, '_render_serial', 0) + 1
-        GLib.idle_add(self._ui_sync_content, message, self._render_serial)
+        cache = self.controller.chunk_cache
+        if not is_streaming:
+            key = cache.make_key(message, self.chunk_uuid, self.controller.newelle_settings.display_latex)
+            chunks = cache.get(key, disk=False)
+            if chunks is not None:
+                GLib.idle_add(self._ui_sync_content, chunks, self._render_serial)
+                return
+        cache.submit(self._parse_content, message, is_streaming, self._render_serial)
+
+    def _parse_content(self, message: str, is_streaming: bool, serial: int):
+        """Parse the message and schedule the UI update (chunk cache thread only)."""
+        if serial != self._render_serial:
+            return
+        GLib.idle_add(self._ui_sync_content, self._get_chunks(message, is_streaming), serial)
+
+    def _get_chunks(self, message: str, is_streaming: bool) -> list[MessageChunk]:
+        """Get the chunks of the message, incrementally while streaming (chunk cache thread only)."""
+        allow_latex = self.controller.newelle_settings.display_latex
+        if is_streaming or (self.chunker is not None and message.startswith(self.chunker.message)):
+            if self.chunker is None or self.chunker.allow_latex != allow_latex:
+                self.chunker = MessageChunker(allow_latex=allow_latex)
+            chunks = self.chunker.update(message)
+            if not is_streaming:
+                self.controller.chunk_cache.put(self.controller.chunk_cache.make_key(message, self.chunk_uuid, allow_latex), chunks)
+                self.chunker = None
+        else:
+            chunks = self.controller.chunk_cache.get_chunks(message, self.chunk_uuid, allow_latex)
+        return chunks
 
-    def _ui_sync_content(self, message: str, serial: int = -1):
+    def _ui_sync_content(self, chunks: list[MessageChunk], serial: int = -1):
         """Internal method to synchronize UI (Main Thread only)."""
         if serial != getattr(self, '_render_serial', 0):
             return False
         if not self.get_display(): 
             return False
 
-        chunks = get_message_chunks(message, allow_latex=self.controller.newelle_settings.display_latex)
         current_widget_idx = 0
         temp_state = self.state.copy()
         temp_state["codeblock_id"] = -1 
@@ -822,8 +853,16 @@ class Message(Gtk.Box):
             # Run immediately (restore or not streaming)
             func()
 
-    def finish_streaming(self):
-        """Called when streaming finishes to execute pending side effects."""
+    def finish_streaming(self, callback=None):
+        """Called when streaming finishes to execute pending side effects.
+
+        Pending executions need the state of the final content: they run once it is
+        rendered, right away if its chunks are cached or else after the chunk cache
+        thread parsed it, without blocking the main loop.
+
+        Args:
+            callback: function called on the main loop after the pending executions
+        """
         self.streaming = False
         
         if self.thinking_widget:
@@ -831,12 +870,34 @@ class Message(Gtk.Box):
             self.thinking_widget = None
         
         self._render_serial = getattr(self, '_render_serial', 0) + 1
-        self._ui_sync_content(self.message, self._render_serial)
-        
+        serial = self._render_serial
+        cache = self.controller.chunk_cache
+        allow_latex = self.controller.newelle_settings.display_latex
+        chunks = cache.get(cache.make_key(self.message, self.chunk_uuid, allow_latex), disk=False)
+        if chunks is not None:
+            self._complete_streaming(chunks, serial, callback)
+            return
+
+        def on_parsed(future):
+            try:
+                chunks = future.result()
+            except Exception as e:
+                print(f"Error parsing message: {e}")
+                chunks = get_message_chunks(self.message, allow_latex)
+            GLib.idle_add(self._complete_streaming, chunks, serial, callback)
+
+        cache.submit(self._get_chunks, self.message, False).add_done_callback(on_parsed)
+
+    def _complete_streaming(self, chunks: list[MessageChunk], serial: int, callback=None):
+        """Render the final content and run the pending executions (Main Thread only)."""
+        self._ui_sync_content(chunks, serial)
         if "pending_executions" in self.state:
             for func in self.state["pending_executions"]:
                 func()
             self.state["pending_executions"] = []
+        if callback is not None:
+            callback()
+        return False
 
     def _run_console_command(self, cmd, restore, console_reply, expander, state):
          # Logic from window.py _process_console_codeblock closure
@@ -5,7 +5,7 @@ from gi.repository import Gtk, Adw, GLib
 from .markuptextview import MarkupTextView
 from .copybox import CopyBox
 from .tool import ToolWidget
-from ...utility.message_chunk import get_message_chunks
+from ...utility.message_chunk import MessageChunker
 
 
 class SubagentWidget(Gtk.ListBox):
@@ -21,6 +21,7 @@ class SubagentWidget(Gtk.ListBox):
         self._task_summary = task_summary
         self._current_message = ""
         self.widgets_map = []
+        self._chunker = MessageChunker(allow_latex=False)
         self._state_lock = threading.Lock()
         self._pending_message = None
         self._message_update_queued = False
@@ -128,7 +129,7 @@ class SubagentWidget(Gtk.ListBox):
         if not self.get_display():
             return GLib.SOURCE_REMOVE
 
-        chunks = get_message_chunks(full_text, allow_latex=False)
+        chunks = self._chunker.update(full_text)
         current_widget_idx = 0
 
         for chunk in chunks:
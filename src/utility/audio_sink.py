@@ -0,0 +1,460 @@
+"""Long-lived audio playback service
+
+Every clip played by Newelle goes through a single AudioSink that keeps one
+output stream open. Clips, encoded streams and raw PCM are decoded to 16-bit
+mono PCM at SAMPLE_RATE and written back to back, so consecutive clips play
+without gaps and without opening the audio device again.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+import wave
+from typing import Iterable
+
+import numpy as np
+
+# Format of the output stream
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+# Audio written to the output at once, small blocks make interruptions fast
+BLOCK_SAMPLES = SAMPLE_RATE // 50
+# Seconds without audio after which the output stream is closed
+IDLE_TIMEOUT = 60
+
+
+def resample_pcm(data: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """Convert 16-bit PCM to the mono output format
+
+    Args:
+        data: 16-bit little endian PCM
+        sample_rate: sample rate of the data
+        channels: number of interleaved channels
+
+    Returns:
+        bytes: mono 16-bit PCM at SAMPLE_RATE
+    """
+    if sample_rate == SAMPLE_RATE and channels == 1:
+        return data
+    samples = np.frombuffer(data, dtype="<i2", count=len(data) // (2 * channels) * channels)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if sample_rate != SAMPLE_RATE and len(samples) > 0:
+        length = int(round(len(samples) * SAMPLE_RATE / sample_rate))
+        samples = np.interp(
+            np.arange(length) * (sample_rate / SAMPLE_RATE),
+            np.arange(len(samples)),
+            samples
+        )
+    return samples.astype("<i2").tobytes()
+
+
+class AudioOutput:
+    """Device receiving the decoded audio"""
+
+    def write(self, data: bytes):
+        """Play 16-bit mono PCM at SAMPLE_RATE, blocking while the device buffer is full"""
+        pass
+
+    def flush(self):
+        """Drop the audio that is buffered but not played yet"""
+        pass
+
+    def drain(self):
+        """Wait until the buffered audio has been played"""
+        pass
+
+    def close(self):
+        pass
+
+
+class PyAudioOutput(AudioOutput):
+    """Output stream on the default device using PyAudio"""
+
+    def __init__(self):
+        import pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=SAMPLE_RATE,
+            output=True,
+            frames_per_buffer=BLOCK_SAMPLES
+        )
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+
+    def flush(self):
+        # Stopping the stream discards the pending buffers
+        self.stream.stop_stream()
+        self.stream.start_stream()
+
+    def close(self):
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        finally:
+            self.audio.terminate()
+
+
+class FfplayOutput(AudioOutput):
+    """Output stream using a single ffplay process reading raw PCM, used when PyAudio is missing"""
+
+    def __init__(self):
+        self.process = None
+        self.written = 0
+        self.started = 0.0
+        self._start()
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            ["ffplay", "-nodisp", "-hide_banner", "-loglevel", "error",
+             "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        self.written = 0
+        self.started = time.monotonic()
+
+    def write(self, data: bytes):
+        if self.process.poll() is not None:
+            self._start()
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+        self.written += len(data)
+        # ffplay reads the pipe as fast as possible, pace the writes to keep interruptions fast
+        ahead = self.written / (SAMPLE_RATE * SAMPLE_WIDTH) - (time.monotonic() - self.started)
+        if ahead > 0.2:
+            time.sleep(ahead - 0.2)
+        elif ahead < 0:
+            # Underrun, the next audio starts now
+            self.written = 0
+            self.started = time.monotonic()
+
+    def flush(self):
+        self.close()
+        self._start()
+
+    def drain(self):
+        ahead = self.written / (SAMPLE_RATE * SAMPLE_WIDTH) - (time.monotonic() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def close(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except Exception:
+                pass
+            self.process.terminate()
+            self.process = None
+
+
+class NullOutput(AudioOutput):
+    """Output that discards the audio, for tests and systems without audio devices
+
+    Args:
+        realtime: if True, writes take as long as playing the audio would
+    """
+
+    def __init__(self, realtime: bool = False):
+        self.realtime = realtime
+        self.written = 0
+
+    def write(self, data: bytes):
+        self.written += len(data)
+        if self.realtime:
+            time.sleep(len(data) / (SAMPLE_RATE * SAMPLE_WIDTH))
+
+
+def create_default_output() -> AudioOutput:
+    """Open the best available output device"""
+    try:
+        return PyAudioOutput()
+    except Exception as e:
+        print(f"AudioSink: PyAudio output not available ({e}), using ffplay")
+    try:
+        return FfplayOutput()
+    except Exception as e:
+        print(f"AudioSink: ffplay not available ({e}), audio is discarded")
+    return NullOutput()
+
+
+class PlaybackItem:
+    """A clip queued in the sink"""
+
+    def __init__(self, source: Iterable[bytes]):
+        self.source = source
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    def cancel(self):
+        """Stop the clip, or skip it if it is not playing yet"""
+        self.cancelled.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until the clip has been played or cancelled
+
+        Returns:
+            bool: False if the timeout expired
+        """
+        return self.done.wait(timeout)
+
+
+class AudioSink:
+    """Plays queued clips one after another on a single output stream
+
+    Args:
+        output_factory: function opening the output, called again after the stream is closed for inactivity
+    """
+
+    def __init__(self, output_factory=create_default_output):
+        self.output_factory = output_factory
+        self.output = None
+        self.queue = queue.Queue()
+        self.current = None
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True, name="audio-sink")
+        self.thread.start()
+
+    def enqueue_file(self, path: str) -> PlaybackItem:
+        """Queue an audio file in any format supported by ffmpeg
+
+        Args:
+            path: path of the file, it must exist until the clip has been decoded
+
+        Returns:
+            PlaybackItem: the queued clip
+        """
+        return self._enqueue(self._decode_file(path))
+
+    def enqueue_pcm(self, data: bytes | np.ndarray, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> PlaybackItem:
+        """Queue raw 16-bit PCM
+
+        Args:
+            data: 16-bit little endian PCM, or a numpy array of int16 samples or float samples in [-1, 1]
+            sample_rate: sample rate of the audio
+            channels: number of interleaved channels
+
+        Returns:
+            PlaybackItem: the queued clip
+        """
+        if isinstance(data, np.ndarray):
+            if np.issubdtype(data.dtype, np.floating):
+                data = np.clip(data * 32768.0, -32768, 32767)
+            data = data.astype("<i2").tobytes()
+        return self._enqueue(iter([resample_pcm(bytes(data), sample_rate, channels)]))
+
+    def enqueue_stream(self, chunks: Iterable[bytes], format_args: list | None = None) -> PlaybackItem:
+        """Queue audio produced while it is played
+
+        Args:
+            chunks: audio bytes, consumed by the playback thread
+            format_args: ffmpeg input arguments describing the audio, see TTSHandler.get_stream_format_args.
+                Raw s16le is handled without ffmpeg, an empty list means a container detected by ffmpeg.
+
+        Returns:
+            PlaybackItem: the queued clip
+        """
+        return self._enqueue(self._decode_stream(chunks, format_args or []))
+
+    def stop(self):
+        """Interrupt the current clip and drop the queued ones"""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.cancel()
+                item.done.set()
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+
+    def is_playing(self) -> bool:
+        return self.current is not None or not self.queue.empty()
+
+    def close(self):
+        """Stop playback and close the output stream"""
+        self.stop()
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(5)
+
+    def _enqueue(self, source: Iterable[bytes]) -> PlaybackItem:
+        item = PlaybackItem(source)
+        if self.closed:
+            item.done.set()
+            return item
+        self.queue.put(item)
+        return item
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=IDLE_TIMEOUT)
+            except queue.Empty:
+                self._close_output()
+                continue
+            if item is None:
+                break
+            with self.lock:
+                self.current = item
+            try:
+                self._play(item)
+            except Exception as e:
+                print(f"AudioSink: error playing audio: {e}")
+            finally:
+                close = getattr(item.source, "close", None)
+                if close is not None:
+                    close()
+                with self.lock:
+                    self.current = None
+                item.done.set()
+            if self.queue.empty() and self.output is not None:
+                try:
+                    self.output.drain()
+                except Exception:
+                    pass
+        self._close_output()
+
+    def _play(self, item: PlaybackItem):
+        pending = b""
+        block = BLOCK_SAMPLES * SAMPLE_WIDTH
+        for data in item.source:
+            if item.cancelled.is_set():
+                break
+            if self.output is None:
+                self.output = self.output_factory()
+            pending += data
+            offset = 0
+            while len(pending) - offset >= block and not item.cancelled.is_set():
+                self.output.write(pending[offset:offset + block])
+                offset += block
+            pending = pending[offset:]
+        if item.cancelled.is_set():
+            if self.output is not None:
+                self.output.flush()
+        elif len(pending) >= SAMPLE_WIDTH and self.output is not None:
+            self.output.write(pending[:len(pending) - len(pending) % SAMPLE_WIDTH])
+
+    def _close_output(self):
+        if self.output is not None:
+            try:
+                self.output.close()
+            except Exception as e:
+                print(f"AudioSink: error closing output: {e}")
+            self.output = None
+
+    def _decode_file(self, path: str):
+        with open(path, "rb") as f:
+            header = f.read(12)
+        if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+            try:
+                with wave.open(path, "rb") as wf:
+                    if wf.getsampwidth() == SAMPLE_WIDTH and wf.getcomptype() == "NONE":
+                        yield from self._decode_wav(wf)
+                        return
+            except wave.Error:
+                pass
+        yield from self._decode_stream(self._read_file(path), [])
+
+    def _decode_wav(self, wf: wave.Wave_read):
+        rate = wf.getframerate()
+        channels = wf.getnchannels()
+        frames = max(1, rate // 10)
+        while True:
+            data = wf.readframes(frames)
+            if not data:
+                break
+            yield resample_pcm(data, rate, channels)
+
+    @staticmethod
+    def _read_file(path: str):
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(65536)
+                if not data:
+                    break
+                yield data
+
+    def _decode_stream(self, chunks: Iterable[bytes], format_args: list):
+        raw = self._get_raw_format(format_args)
+        if raw is not None:
+            rate, channels = raw
+            pending = b""
+            frame = SAMPLE_WIDTH * channels
+            for chunk in chunks:
+                pending += chunk
+                usable = len(pending) - len(pending) % frame
+                if usable > 0:
+                    yield resample_pcm(pending[:usable], rate, channels)
+                    pending = pending[usable:]
+            return
+        yield from self._decode_with_ffmpeg(chunks, format_args)
+
+    @staticmethod
+    def _get_raw_format(format_args: list) -> tuple[int, int] | None:
+        """Get sample rate and channels if the arguments describe 16-bit PCM"""
+        args = dict(zip(format_args[::2], format_args[1::2]))
+        if args.get("-f") != "s16le":
+            return None
+        try:
+            return int(args.get("-ar", SAMPLE_RATE)), int(args.get("-ac", 1))
+        except ValueError:
+            return None
+
+    def _decode_with_ffmpeg(self, chunks: Iterable[bytes], format_args: list):
+        process = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error"] + format_args +
+            ["-i", "pipe:0", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "pipe:1"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+        def feed():
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            except (BrokenPipeError, ValueError, OSError):
+                pass
+            except Exception as e:
+                print(f"AudioSink: error reading audio stream: {e}")
+            finally:
+                try:
+                    process.stdin.close()
+                except Exception:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            while True:
+                data = process.stdout.read1(BLOCK_SAMPLES * SAMPLE_WIDTH * 5)
+                if not data:
+                    break
+                yield data
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.terminate()
+            process.wait()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_audio_sink() -> AudioSink:
+    """Get the audio sink shared by the whole application"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = AudioSink()
+        return _sink
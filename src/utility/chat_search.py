@@ -0,0 +1,291 @@
+import pickle
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+# Roles whose messages are indexed
+INDEXED_ROLES = ("User", "Assistant")
+# Row ids are chat_id << POSITION_BITS | position, so the rows of a chat are a contiguous range
+POSITION_BITS = 24
+# Messages embedded at most in a single indexing pass
+EMBEDDING_BATCH_SIZE = 64
+# Characters of a message used to compute its embedding
+EMBEDDING_TEXT_LENGTH = 2000
+# Most recent matching messages ranked by relevance, bounds the time of queries matching most messages
+SEARCH_CANDIDATES = 2000
+# Characters shown around the first match in a snippet
+SNIPPET_CONTEXT = 60
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+_THINK_PATTERN = re.compile(r"<think>.*?(?:</think>|\Z)", re.DOTALL)
+
+
+def get_row_id(chat_id: int, position: int) -> int:
+    return (chat_id << POSITION_BITS) | position
+
+
+def get_indexed_text(message: dict) -> str | None:
+    """Get the text of a message to index, None if the message is not indexed"""
+    if message.get("User") not in INDEXED_ROLES:
+        return None
+    text = message.get("Message")
+    if not isinstance(text, str):
+        return None
+    text = _THINK_PATTERN.sub("", text).strip()
+    return text or None
+
+
+def build_match_query(query: str) -> str | None:
+    """Convert a user query to an FTS5 query matching all its words, the last one as a prefix
+
+    Returns:
+        str | None: the query, None if it has no words
+    """
+    words = _WORD_PATTERN.findall(query)
+    if not words:
+        return None
+    terms = ['"' + word + '"' for word in words]
+    # Single letters are not prefix indexed and would match most messages
+    if len(words[-1]) > 1:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def make_snippet(text: str, query: str) -> str:
+    """Get the part of a text around the first word of the query it contains"""
+    lower = text.lower()
+    positions = [lower.find(word.lower()) for word in _WORD_PATTERN.findall(query)]
+    start = min((p for p in positions if p >= 0), default=0)
+    begin = max(0, start - SNIPPET_CONTEXT)
+    if begin > 0:
+        # Do not cut the first word
+        space = text.find(" ", begin, start)
+        begin = space + 1 if space >= 0 else begin
+    end = min(len(text), start + 2 * SNIPPET_CONTEXT)
+    snippet = " ".join(text[begin:end].split())
+    return ("…" if begin > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def merge_results(result_lists: list[list[dict]], limit: int = 20, k: int = 60) -> list[dict]:
+    """Merge rankings of search results with reciprocal rank fusion
+
+    Args:
+        result_lists: lists of results, each from the most relevant
+        limit: maximum number of results
+        k: rank offset, higher values give less weight to the first results
+
+    Returns:
+        list[dict]: merged results, score is the fused score
+    """
+    merged = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            key = (result["chat_id"], result["position"])
+            if key not in merged:
+                merged[key] = dict(result, score=0.0)
+            merged[key]["score"] += 1 / (k + rank + 1)
+    return sorted(merged.values(), key=lambda result: result["score"], reverse=True)[:limit]
+
+
+class ChatSearchIndex:
+    """Full-text index of the chat messages, with optional embedding vectors
+
+    The index lives in the chat store database and is updated in the same
+    transactions that save the messages. Vectors are computed lazily by
+    index_embeddings and dropped when their message changes.
+
+    Attributes:
+        conn: connection to the chat store database
+        lock: lock of the chat store, held around every query
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+        # Normalized vectors and their row ids, loaded on the first semantic search
+        self._vectors = None
+        self._vector_ids = None
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                "text, role UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS message_vectors (id INTEGER PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def update_message(self, cur, chat_id: int, position: int, message: dict):
+        """Index a message written by the chat store"""
+        row_id = get_row_id(chat_id, position)
+        cur.execute("DELETE FROM messages_fts WHERE rowid = ?", (row_id,))
+        if cur.execute("DELETE FROM message_vectors WHERE id = ?", (row_id,)).rowcount:
+            self._vectors = None
+        text = get_indexed_text(message)
+        if text is not None:
+            cur.execute(
+                "INSERT INTO messages_fts (rowid, text, role) VALUES (?, ?, ?)", (row_id, text, message["User"])
+            )
+
+    def remove_messages(self, cur, chat_id: int, start: int = 0):
+        """Remove the messages of a chat from the index, starting from a position"""
+        first = get_row_id(chat_id, start)
+        last = get_row_id(chat_id + 1, 0) - 1
+        cur.execute("DELETE FROM messages_fts WHERE rowid BETWEEN ? AND ?", (first, last))
+        if cur.execute("DELETE FROM message_vectors WHERE id BETWEEN ? AND ?", (first, last)).rowcount:
+            self._vectors = None
+
+    def is_built(self) -> bool:
+        """Return True if the messages saved before the index existed have been indexed"""
+        with self.lock:
+            return self._get_meta("search_index_built", False)
+
+    def build(self, load_message, batch_size: int = 1000):
+        """Index the messages already in the database, in batches so that saves are not blocked
+
+        Args:
+            load_message: function that decodes a message row of the chat store
+            batch_size: messages indexed per transaction
+        """
+        last = (-1, -1)
+        while True:
+            with self.lock, self.conn:
+                rows = self.conn.execute(
+                    "SELECT chat_id, position, data FROM messages WHERE (chat_id, position) > (?, ?) "
+                    "ORDER BY chat_id, position LIMIT ?", (*last, batch_size)
+                ).fetchall()
+                cur = self.conn.cursor()
+                for chat_id, position, data in rows:
+                    self.update_message(cur, chat_id, position, load_message(data))
+                if len(rows) < batch_size:
+                    self._set_meta(cur, "search_index_built", True)
+                    return
+                last = rows[-1][:2]
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Search messages containing all the words of a query
+
+        Args:
+            query: words to search, the last one is matched as a prefix
+            limit: maximum number of results
+
+        Returns:
+            list[dict]: results from the most relevant, with chat_id, position, role, snippet and score
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+        with self.lock:
+            try:
+                # Rows are read from the most recent and bm25 is only computed for the candidates
+                candidates = self.conn.execute(
+                    "SELECT rowid, bm25(messages_fts) FROM messages_fts WHERE messages_fts MATCH ? "
+                    "ORDER BY rowid DESC LIMIT ?", (match, SEARCH_CANDIDATES)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                print(f"Chat search error: {e}")
+                return []
+            candidates.sort(key=lambda candidate: candidate[1])
+            results = []
+            for row_id, score in candidates[:limit]:
+                role, text = self.conn.execute(
+                    "SELECT role, text FROM messages_fts WHERE rowid = ?", (row_id,)
+                ).fetchone()
+                results.append(self._make_result(row_id, role, make_snippet(text, query), -score))
+        return results
+
+    def index_embeddings(self, get_embedding, model: str, limit: int = EMBEDDING_BATCH_SIZE) -> int:
+        """Compute the vectors of indexed messages that do not have one
+
+        Args:
+            get_embedding: function returning the embeddings of a list of texts, see EmbeddingHandler.get_embedding
+            model: identifier of the embedding model, vectors of another model are dropped
+            limit: maximum number of messages to embed
+
+        Returns:
+            int: number of messages embedded
+        """
+        with self.lock, self.conn:
+            if self._get_meta("search_embedding_model") != model:
+                self.conn.execute("DELETE FROM message_vectors")
+                self._set_meta(self.conn, "search_embedding_model", model)
+                self._vectors = None
+            rows = self.conn.execute(
+                "SELECT f.rowid, substr(f.text, 1, ?) FROM messages_fts f LEFT JOIN message_vectors v ON v.id = f.rowid "
+                "WHERE v.id IS NULL LIMIT ?", (EMBEDDING_TEXT_LENGTH, limit)
+            ).fetchall()
+        if not rows:
+            return 0
+        vectors = np.asarray(get_embedding([text for _, text in rows]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self.lock, self.conn:
+            # Skip messages changed while they were embedded
+            current = {row_id for (row_id,) in self.conn.execute(
+                f"SELECT rowid FROM messages_fts WHERE rowid IN ({','.join('?' * len(rows))})", [r[0] for r in rows]
+            )}
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO message_vectors (id, vector) VALUES (?, ?)",
+                [(row_id, vector.tobytes()) for (row_id, _), vector in zip(rows, vectors) if row_id in current]
+            )
+            self._vectors = None
+        return len(rows)
+
+    def semantic_search(self, query_vector, limit: int = 20) -> list[dict]:
+        """Search the messages whose vector is the most similar to the query
+
+        Args:
+            query_vector: embedding of the query
+            limit: maximum number of results
+
+        Returns:
+            list[dict]: results from the most similar, with chat_id, position, role, snippet and score
+        """
+        with self.lock:
+            if self._vectors is None:
+                ids, blobs = [], []
+                for row_id, blob in self.conn.execute("SELECT id, vector FROM message_vectors"):
+                    ids.append(row_id)
+                    blobs.append(blob)
+                self._vector_ids = np.array(ids, dtype=np.int64)
+                self._vectors = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(ids), -1) if ids else None
+            vectors, vector_ids = self._vectors, self._vector_ids
+        if vectors is None:
+            return []
+        query_vector = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        if query_vector.shape[0] != vectors.shape[1]:
+            return []
+        scores = vectors @ (query_vector / (np.linalg.norm(query_vector) or 1))
+        limit = min(limit, len(scores))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best])]
+        results = []
+        with self.lock:
+            for index in best:
+                row_id = int(vector_ids[index])
+                row = self.conn.execute("SELECT role, text FROM messages_fts WHERE rowid = ?", (row_id,)).fetchone()
+                if row is not None:
+                    results.append(self._make_result(row_id, row[0], make_snippet(row[1], ""), float(scores[index])))
+        return results
+
+    def _get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else default
+
+    @staticmethod
+    def _set_meta(cur, key: str, value):
+        cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, pickle.dumps(value)))
+
+    @staticmethod
+    def _make_result(row_id: int, role: str, snippet: str, score: float) -> dict:
+        return {
+            "chat_id": row_id >> POSITION_BITS,
+            "position": row_id & ((1 << POSITION_BITS) - 1),
+            "role": role,
+            "snippet": snippet,
+            "score": score,
+        }
@@ -0,0 +1,411 @@
+import copy
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .chat_search import ChatSearchIndex
+
+
+class ChatStore:
+    """SQLite backed storage for chats.
+
+    Every chat is stored as a header row (everything except the messages) and
+    every message as its own row, so saving only touches what changed since the
+    last save instead of rewriting the whole history.
+
+    Attributes:
+        path: path of the SQLite database
+        search_index: full-text index of the messages, None if SQLite has no FTS5 support
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        try:
+            self.search_index = ChatSearchIndex(self.conn, self.lock)
+        except sqlite3.OperationalError as e:
+            print(f"Chat search is not available: {e}")
+            self.search_index = None
+        # Snapshots of what is currently on disk, used to compute diffs
+        self._headers = {}
+        self._messages = {}
+        self._folders = None
+        self._info = {}
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS chats ("
+                "id INTEGER PRIMARY KEY, header BLOB NOT NULL, "
+                "message_count INTEGER NOT NULL DEFAULT 0, modified REAL NOT NULL DEFAULT 0)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "chat_id INTEGER NOT NULL, position INTEGER NOT NULL, data BLOB NOT NULL, "
+                "PRIMARY KEY (chat_id, position)) WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (pickle.dumps(self.SCHEMA_VERSION),)
+            )
+
+    def is_empty(self) -> bool:
+        """Return True if nothing has ever been saved in the store"""
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM meta WHERE key = 'next_chat_id'").fetchone()
+            return row is None
+
+    def _get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def load_state(self) -> dict:
+        """Load folders and counters
+
+        Returns:
+            dict: with next_chat_id, folders and next_folder_id
+        """
+        with self.lock:
+            folders = self._get_meta("folders", {})
+            self._folders = pickle.dumps(folders)
+            return {
+                "next_chat_id": self._get_meta("next_chat_id", 0),
+                "folders": folders,
+                "next_folder_id": self._get_meta("next_folder_id", 0),
+            }
+
+    def load_headers(self) -> dict[int, dict]:
+        """Load the chat headers, without messages
+
+        Returns:
+            dict[int, dict]: chat id -> header
+        """
+        headers = {}
+        with self.lock:
+            rows = self.conn.execute("SELECT id, header, message_count, modified FROM chats ORDER BY id")
+            for chat_id, blob, message_count, modified in rows:
+                header = pickle.loads(blob)
+                self._headers[chat_id] = dict(header)
+                self._info[chat_id] = (message_count, modified)
+                headers[chat_id] = header
+        return headers
+
+    def get_info(self, chat_id: int) -> tuple[int, float]:
+        """Get the stored message count and last modification time of a chat
+
+        Args:
+            chat_id: id of the chat
+
+        Returns:
+            tuple[int, float]: message count and last modified timestamp
+        """
+        return self._info.get(chat_id, (0, 0.0))
+
+    def load_messages(self, chat_id: int) -> list[dict]:
+        """Load the messages of a chat
+
+        Args:
+            chat_id: id of the chat
+
+        Returns:
+            list[dict]: the messages of the chat
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT data FROM messages WHERE chat_id = ? ORDER BY position", (chat_id,)
+            ).fetchall()
+            messages = [pickle.loads(row[0]) for row in rows]
+            self._messages[chat_id] = [dict(m) for m in messages]
+        return messages
+
+    def load_all_messages(self) -> dict[int, list[dict]]:
+        """Load the messages of every chat in a single query
+
+        Returns:
+            dict[int, list[dict]]: chat id -> messages
+        """
+        result = {}
+        with self.lock:
+            rows = self.conn.execute("SELECT chat_id, data FROM messages ORDER BY chat_id, position")
+            for chat_id, blob in rows:
+                result.setdefault(chat_id, []).append(pickle.loads(blob))
+            for chat_id, messages in result.items():
+                self._messages[chat_id] = [dict(m) for m in messages]
+        return result
+
+    def save(self, chats: dict, folders: dict, next_chat_id: int, next_folder_id: int):
+        """Write the changes since the last save
+
+        Args:
+            chats: chat id -> chat dict, with the messages in the "chat" key
+            folders: folders dict
+            next_chat_id: next chat id
+            next_folder_id: next folder id
+        """
+        with self.lock, self.conn:
+            cur = self.conn.cursor()
+            self._set_meta(cur, "next_chat_id", next_chat_id)
+            self._set_meta(cur, "next_folder_id", next_folder_id)
+            folders_blob = pickle.dumps(folders)
+            if folders_blob != self._folders:
+                self._set_meta(cur, "folders", folders)
+                self._folders = folders_blob
+
+            for chat_id in [cid for cid in self._headers if cid not in chats]:
+                self._delete_chat(cur, chat_id)
+
+            for chat_id, chat in list(chats.items()):
+                self._save_chat(cur, chat_id, chat)
+
+    def save_chat(self, chat_id: int, chat: dict):
+        """Write the changes of a single chat
+
+        Args:
+            chat_id: id of the chat
+            chat: chat dict, with the messages in the "chat" key if they are loaded
+        """
+        with self.lock, self.conn:
+            self._save_chat(self.conn.cursor(), chat_id, chat)
+
+    def _save_chat(self, cur, chat_id: int, chat: dict):
+        # Use dict methods so that chats whose messages are not loaded are not loaded from the db
+        messages = dict.get(chat, "chat")
+        header = {k: v for k, v in dict.items(chat) if k != "chat"}
+        if messages is None:
+            if chat_id in self._headers and self._headers[chat_id] != header:
+                cur.execute("UPDATE chats SET header = ? WHERE id = ?", (pickle.dumps(header), chat_id))
+                self._headers[chat_id] = header
+            return
+        messages_changed = self._save_messages(cur, chat_id, messages)
+        if messages_changed or self._headers.get(chat_id) != header:
+            modified = time.time() if messages_changed or chat_id not in self._info else self._info[chat_id][1]
+            cur.execute(
+                "INSERT OR REPLACE INTO chats (id, header, message_count, modified) VALUES (?, ?, ?, ?)",
+                (chat_id, pickle.dumps(header), len(messages), modified)
+            )
+            self._headers[chat_id] = header
+            self._info[chat_id] = (len(messages), modified)
+
+    def _set_meta(self, cur, key, value):
+        cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, pickle.dumps(value)))
+
+    def _delete_chat(self, cur, chat_id: int):
+        cur.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+        cur.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+        if self.search_index is not None:
+            self.search_index.remove_messages(cur, chat_id)
+        self._headers.pop(chat_id, None)
+        self._messages.pop(chat_id, None)
+        self._info.pop(chat_id, None)
+
+    def _save_messages(self, cur, chat_id: int, messages: list[dict]) -> bool:
+        """Write the messages that differ from the stored snapshot. Returns True if something was written"""
+        stored = self._messages.setdefault(chat_id, [])
+        changed = False
+        for position, message in enumerate(messages):
+            if position < len(stored) and stored[position] == message:
+                continue
+            cur.execute(
+                "INSERT OR REPLACE INTO messages (chat_id, position, data) VALUES (?, ?, ?)",
+                (chat_id, position, pickle.dumps(message))
+            )
+            if self.search_index is not None:
+                self.search_index.update_message(cur, chat_id, position, message)
+            snapshot = dict(message)
+            if position < len(stored):
+                stored[position] = snapshot
+            else:
+                stored.append(snapshot)
+            changed = True
+        if len(stored) > len(messages):
+            cur.execute(
+                "DELETE FROM messages WHERE chat_id = ? AND position >= ?", (chat_id, len(messages))
+            )
+            if self.search_index is not None:
+                self.search_index.remove_messages(cur, chat_id, len(messages))
+            del stored[len(messages):]
+            changed = True
+        return changed
+
+    def build_search_index(self):
+        """Index the messages saved before the search index existed, does nothing if they are already indexed"""
+        if self.search_index is not None and not self.search_index.is_built():
+            self.search_index.build(pickle.loads)
+
+    def forget_all_messages(self):
+        """Drop the in memory snapshot of all the messages"""
+        with self.lock:
+            self._messages.clear()
+
+    def forget_messages(self, chat_id: int):
+        """Drop the in memory snapshot of the messages of a chat, after its messages are unloaded"""
+        with self.lock:
+            self._messages.pop(chat_id, None)
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
+
+
+class ChatEntry(dict):
+    """Chat dict whose messages are loaded from the chat store on the first access of the "chat" key
+
+    Attributes:
+        chat_id: id of the chat
+    """
+
+    def __init__(self, collection, chat_id: int, chat: dict):
+        super().__init__(chat)
+        self._collection = collection
+        self.chat_id = chat_id
+
+    def is_loaded(self) -> bool:
+        """Return True if the messages of the chat are in memory"""
+        return dict.__contains__(self, "chat")
+
+    def __getitem__(self, key):
+        if key == "chat":
+            return self._collection.get_messages(self.chat_id)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == "chat":
+            self._collection.touch(self.chat_id)
+
+    def __contains__(self, key):
+        return key == "chat" or super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key == "chat":
+            return self["chat"]
+        return super().get(key, default)
+
+    @property
+    def message_count(self) -> int:
+        """Number of messages in the chat, without loading them"""
+        messages = dict.get(self, "chat")
+        if messages is not None:
+            return len(messages)
+        return self._collection.store.get_info(self.chat_id)[0]
+
+    @property
+    def last_modified(self) -> float:
+        """Timestamp of the last saved change of the chat"""
+        return self._collection.store.get_info(self.chat_id)[1]
+
+    def copy(self) -> dict:
+        result = dict(self)
+        result["chat"] = self["chat"]
+        return result
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+class ChatCollection(dict):
+    """Mapping of chat id to ChatEntry that keeps only the most recently used transcripts in memory
+
+    Chat headers are always in memory, the messages are loaded on demand and
+    unloaded (after being saved) when more than `capacity` chats are loaded.
+
+    Attributes:
+        store: ChatStore used to load and save messages
+        capacity: maximum number of chats with loaded messages
+        is_pinned: function that returns True if a chat must not be unloaded
+        on_unload: function called with the id of a chat whose messages are unloaded or that is deleted
+    """
+
+    def __init__(self, store: ChatStore, capacity: int = 20, is_pinned=None, on_unload=None):
+        super().__init__()
+        self.store = store
+        self.capacity = max(1, capacity)
+        self.is_pinned = is_pinned if is_pinned is not None else (lambda chat_id: False)
+        self.on_unload = on_unload if on_unload is not None else (lambda chat_id: None)
+        self.lock = threading.RLock()
+        self._lru = OrderedDict()
+
+    def load_headers(self, headers: dict[int, dict]):
+        """Add chats from their headers, without loading the messages"""
+        for chat_id, header in headers.items():
+            dict.__setitem__(self, chat_id, ChatEntry(self, chat_id, header))
+
+    def __setitem__(self, chat_id, chat):
+        if not isinstance(chat, ChatEntry) or chat._collection is not self:
+            chat = ChatEntry(self, chat_id, chat)
+        super().__setitem__(chat_id, chat)
+        if chat.is_loaded():
+            self.touch(chat_id)
+
+    def __delitem__(self, chat_id):
+        super().__delitem__(chat_id)
+        with self.lock:
+            self._lru.pop(chat_id, None)
+        self.on_unload(chat_id)
+
+    def get_messages(self, chat_id: int) -> list[dict]:
+        """Get the messages of a chat, loading them from the store if needed"""
+        with self.lock:
+            entry = dict.__getitem__(self, chat_id)
+            if not entry.is_loaded():
+                dict.__setitem__(entry, "chat", self.store.load_messages(chat_id))
+            messages = dict.__getitem__(entry, "chat")
+            self.touch(chat_id)
+            return messages
+
+    def loaded_ids(self) -> list[int]:
+        """Ids of the chats whose messages are in memory, from the least recently used"""
+        with self.lock:
+            return list(self._lru)
+
+    def touch(self, chat_id: int):
+        """Mark a chat as recently used and unload the least recently used ones"""
+        with self.lock:
+            self._lru[chat_id] = True
+            self._lru.move_to_end(chat_id)
+            self._evict()
+
+    def set_capacity(self, capacity: int):
+        """Change the maximum number of chats with loaded messages"""
+        with self.lock:
+            self.capacity = max(1, capacity)
+            self._evict()
+
+    def _evict(self):
+        if len(self._lru) <= self.capacity:
+            return
+        for chat_id in list(self._lru):
+            if len(self._lru) <= self.capacity:
+                break
+            if chat_id == next(reversed(self._lru)) or self.is_pinned(chat_id):
+                continue
+            self.unload(chat_id)
+
+    def unload(self, chat_id: int):
+        """Save and unload the messages of a chat"""
+        with self.lock:
+            self._lru.pop(chat_id, None)
+            entry = dict.get(self, chat_id)
+            if entry is None or not entry.is_loaded():
+                return
+            self.store.save_chat(chat_id, entry)
+            dict.pop(entry, "chat", None)
+            self.store.forget_messages(chat_id)
+            self.on_unload(chat_id)
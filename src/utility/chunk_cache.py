@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List
+
+from .message_chunk import MessageChunk, get_message_chunks
+
+# Parsed messages kept in memory
+DEFAULT_MEMORY_ENTRIES = 1024
+# Parsed messages kept on disk
+DEFAULT_DISK_ENTRIES = 20000
+
+
+class ChunkCache:
+    """Cache of the chunks of chat messages
+
+    Chunks are kept in memory and stored in a SQLite database, so that opening
+    a chat again does not parse its unchanged messages. Entries are keyed by
+    message UUID and content hash, and the least recently used are removed.
+
+    Parsing runs on a single worker thread: jobs complete in submission order
+    and the state of a MessageChunker is never shared between threads.
+
+    Cached chunks are shared by all the widgets showing the same message and
+    must not be modified.
+    """
+
+    def __init__(self, path: str | None = None, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_entries: int = DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.entries: OrderedDict[str, List[MessageChunk]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-parser")
+        self.db = None
+        if path is not None:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.execute("CREATE TABLE IF NOT EXISTS chunks (key TEXT PRIMARY KEY, data BLOB NOT NULL, used INTEGER NOT NULL) WITHOUT ROWID")
+                self.db.execute("CREATE INDEX IF NOT EXISTS chunks_used ON chunks (used)")
+                self.db.commit()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Could not open the chunk cache: {e}")
+                self.db = None
+        self.clock = self.db.execute("SELECT COALESCE(MAX(used), 0) FROM chunks").fetchone()[0] if self.db else 0
+        self.disk_count = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] if self.db else 0
+
+    @staticmethod
+    def make_key(message: str, uuid=0, allow_latex: bool = True) -> str:
+        """Get the key of a message
+
+        Args:
+            message: content of the message
+            uuid: UUID of the message, 0 if it has none
+            allow_latex: whether latex chunks are parsed
+
+        Returns:
+            str: the key
+        """
+        digest = hashlib.sha1(message.encode("utf-8", "surrogatepass")).hexdigest()
+        return f"{uuid}:{int(allow_latex)}:{digest}"
+
+    def get(self, key: str, disk: bool = True) -> List[MessageChunk] | None:
+        """Get the cached chunks for a key
+
+        Args:
+            key: key of the message, see make_key
+            disk: whether to look for the entry on disk if it is not in memory
+
+        Returns:
+            List[MessageChunk] | None: the chunks, None if not cached
+        """
+        with self.lock:
+            chunks = self.entries.get(key)
+            if chunks is not None:
+                self.entries.move_to_end(key)
+                return chunks
+            if self.db is None or not disk:
+                return None
+            row = self.db.execute("SELECT data FROM chunks WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                chunks = pickle.loads(row[0])
+            except Exception:
+                return None
+            self.clock += 1
+            self.db.execute("UPDATE chunks SET used = ? WHERE key = ?", (self.clock, key))
+            self.db.commit()
+            self._remember(key, chunks)
+            return chunks
+
+    def put(self, key: str, chunks: List[MessageChunk]):
+        """Add the chunks of a message to the cache"""
+        with self.lock:
+            self._remember(key, chunks)
+            if self.db is None:
+                return
+            self.clock += 1
+            exists = self.db.execute("SELECT 1 FROM chunks WHERE key = ?", (key,)).fetchone() is not None
+            self.db.execute("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", (key, pickle.dumps(chunks), self.clock))
+            if not exists:
+                self.disk_count += 1
+            if self.disk_count > self.disk_entries:
+                # Remove a tenth of the entries at once to avoid evicting on every insert
+                evicted = self.disk_count - self.disk_entries * 9 // 10
+                self.db.execute(
+                    "DELETE FROM chunks WHERE key IN (SELECT key FROM chunks ORDER BY used LIMIT ?)", (evicted,)
+                )
+                self.disk_count -= evicted
+            self.db.commit()
+
+    def get_chunks(self, message: str, uuid=0, allow_latex: bool = True) -> List[MessageChunk]:
+        """Get the chunks of a message, parsing it only if it is not cached
+
+        Args:
+            message: content of the message
+            uuid: UUID of the message, 0 if it has none
+            allow_latex: whether latex chunks are parsed
+
+        Returns:
+            List[MessageChunk]: chunks of the message
+        """
+        key = self.make_key(message, uuid, allow_latex)
+        chunks = self.get(key)
+        if chunks is None:
+            chunks = get_message_chunks(message, allow_latex)
+            self.put(key, chunks)
+        return chunks
+
+    def submit(self, function: Callable, *args) -> Future:
+        """Run a function on the parsing thread"""
+        return self.executor.submit(function, *args)
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM chunks")
+                self.db.commit()
+                self.disk_count = 0
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def _remember(self, key: str, chunks: List[MessageChunk]):
+        self.entries[key] = chunks
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.memory_entries:
+            self.entries.popitem(last=False)
@@ -1,5 +1,6 @@
-import copy
+import hashlib
 from dataclasses import dataclass, field
+import numpy as np
 from .strings import count_tokens, remove_thinking_blocks
 
 
@@ -10,6 +11,16 @@ Only output the summary, no other text.
 Messages:
 {messages}"""
 
+UPDATE_SUMMARY_PROMPT = """Update the following summary of a conversation with the new messages.
+Preserve key facts, decisions, tool results, and any information that may be needed for the ongoing conversation.
+Only output the updated summary, no other text.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
 
 @dataclass
 class TrimResult:
@@ -31,6 +42,8 @@ class ContextManager:
     TOOL_OUTPUT_MAX_CHARS = 500
     RECENT_WINDOW = 4
     TOKEN_OVERHEAD_PER_MSG = 4
+    # Last covered messages whose hashes are stored with the rolling summary to detect changes
+    SUMMARY_HASH_WINDOW = 8
 
     def __init__(
         self,
@@ -39,12 +52,26 @@ class ContextManager:
         embedding_handler=None,
         llm_handler=None,
         summarization_enabled: bool = False,
+        embedding_cache: dict | None = None,
+        summary_state: dict | None = None,
     ):
+        """
+        Args:
+            embedding_cache: Optional dict, kept by the caller across trims of the same chat,
+                mapping message content to its normalized embedding so that old messages
+                are embedded only once.
+            summary_state: Rolling summary of the chat from a previous trim, with the summary
+                text, the number of messages at the start of the history it covers and the
+                hashes of the last covered messages. After trim, summary_state holds the updated
+                state (a new dict if it changed, empty if it was dropped) to be stored with the chat.
+        """
         self.max_tokens = max_tokens
         self.suggested_tokens = suggested_tokens
         self.embedding_handler = embedding_handler
         self.llm_handler = llm_handler
         self.summarization_enabled = summarization_enabled
+        self.embedding_cache = embedding_cache
+        self.summary_state = summary_state if summary_state is not None else {}
 
     def trim(
         self,
@@ -69,7 +96,9 @@ class ContextManager:
                 max_tokens=self.max_tokens,
             )
 
-        history = copy.deepcopy(history)
+        # Messages are never modified in place (truncation returns copies), copying the list is enough
+        original_history = history
+        history = list(history)
         n = len(history)
 
         recent_start = max(0, n - self.RECENT_WINDOW)
@@ -95,9 +124,15 @@ class ContextManager:
                 max_tokens=self.max_tokens,
             )
 
+        # Messages at the start of the history represented by the rolling summary are never sent
+        summarizing = self.summarization_enabled and self.llm_handler is not None
+        covered = self._get_covered_messages(original_history, recent_start) if summarizing else 0
+        summary = self.summary_state.get("summary", "") if covered > 0 else ""
+        summary_cost = count_tokens(self._format_summary(summary)) + self.TOKEN_OVERHEAD_PER_MSG if summary else 0
+
         # Phase 3: compute similarity scores for older messages
-        recent_cost = sum(msg_tokens[recent_start:])
-        older_indices = list(range(recent_start))
+        recent_cost = sum(msg_tokens[recent_start:]) + summary_cost
+        older_indices = list(range(covered, recent_start))
 
         if self.embedding_handler is not None and current_message and older_indices:
             scores = self._compute_similarities(history, older_indices, current_message)
@@ -119,7 +154,7 @@ class ContextManager:
                 dropped_indices.append(i)
 
         # Phase 5: enforce hard max_tokens limit
-        current_total = sum(msg_tokens[i] for i in keep_set) + prompts_token_count
+        current_total = sum(msg_tokens[i] for i in keep_set) + prompts_token_count + summary_cost
         if current_total > self.max_tokens:
             kept_older_sorted = sorted(
                 [i for i in keep_set if i < recent_start],
@@ -133,24 +168,23 @@ class ContextManager:
 
         # Phase 6: optional summarization of dropped messages
         result_history = []
-        if dropped_indices:
-            dropped_indices.sort()
-            dropped_messages = [history[i] for i in dropped_indices]
-            if self.summarization_enabled and self.llm_handler is not None:
-                summary = self._summarize_dropped(dropped_messages)
-                if summary:
-                    result_history.append({
-                        "User": "User",
-                        "Message": f"[Previous conversation summary]\n{summary}",
-                    })
-
+        trimmed_tokens = prompts_token_count
+        if dropped_indices and summarizing:
+            # The summary covers a prefix of the history: fold everything up to the last dropped
+            # message, messages kept before it are left out so that they are not sent twice
+            end = max(dropped_indices) + 1
+            if self._update_rolling_summary(original_history, history, covered, end):
+                summary = self.summary_state["summary"]
+                keep_set = {i for i in keep_set if i >= end}
+        if summary:
+            summary_message = {"User": "User", "Message": self._format_summary(summary)}
+            result_history.append(summary_message)
+            trimmed_tokens += count_tokens(summary_message["Message"]) + self.TOKEN_OVERHEAD_PER_MSG
+
+        # Reuse the per-message counts instead of tokenizing the kept messages again
         for i in sorted(keep_set):
             result_history.append(history[i])
-
-        trimmed_tokens = sum(
-            count_tokens(m.get("Message", "")) + self.TOKEN_OVERHEAD_PER_MSG
-            for m in result_history
-        ) + prompts_token_count
+            trimmed_tokens += msg_tokens[i]
 
         return TrimResult(
             history=result_history,
@@ -188,31 +222,112 @@ class ContextManager:
         indices: list[int],
         query: str,
     ) -> dict[int, float]:
-        """Compute cosine similarity between older messages and the current query."""
+        """Compute cosine similarity between older messages and the current query.
+
+        Embeddings are normalized once and all candidates are scored with a single
+        matrix product. Only messages missing from the embedding cache are embedded.
+        """
         try:
+            cache = self.embedding_cache if self.embedding_cache is not None else {}
             texts = [history[i].get("Message", "") for i in indices]
-            all_texts = [query] + texts
-            embeddings = self.embedding_handler.get_embedding(all_texts)
-
-            query_emb = embeddings[0]
-            similarities = {}
-
-            for j, idx in enumerate(indices):
-                msg_emb = embeddings[j + 1]
-                dot = float(sum(a * b for a, b in zip(query_emb, msg_emb)))
-                norm_q = float(sum(a * a for a in query_emb)) ** 0.5
-                norm_m = float(sum(a * a for a in msg_emb)) ** 0.5
-                if norm_q > 0 and norm_m > 0:
-                    similarities[idx] = dot / (norm_q * norm_m)
-                else:
-                    similarities[idx] = 0.0
-
-            return similarities
+            keys = [self._embedding_key(text) for text in texts]
+            query_key = self._embedding_key(query)
+
+            missing = {}
+            for key, text in zip([query_key] + keys, [query] + texts):
+                if key not in cache and key not in missing:
+                    missing[key] = text
+            if missing:
+                embeddings = np.asarray(
+                    self.embedding_handler.get_embedding(list(missing.values())), dtype=np.float32
+                )
+                for key, vector in zip(missing.keys(), self._normalize(embeddings)):
+                    cache[key] = vector
+
+            matrix = np.stack([cache[key] for key in keys])
+            scores = matrix @ cache[query_key]
+
+            # Drop embeddings of messages that are no longer in the history
+            live_keys = set(keys)
+            live_keys.add(query_key)
+            for key in [k for k in cache if k not in live_keys]:
+                del cache[key]
+
+            return {idx: float(score) for idx, score in zip(indices, scores)}
         except Exception:
             return {i: i / max(len(indices), 1) for i in indices}
 
-    def _summarize_dropped(self, messages: list[dict]) -> str:
-        """Use the LLM to summarize dropped messages."""
+    @staticmethod
+    def _embedding_key(text: str) -> tuple[int, int]:
+        """Key of a message in the embedding cache"""
+        return (len(text), hash(text))
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        """Normalize embedding rows to unit length, zero vectors are left as they are"""
+        embeddings = embeddings.reshape(len(embeddings), -1)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+    def _get_covered_messages(self, history: list[dict], recent_start: int) -> int:
+        """Get the number of messages at the start of the history covered by the rolling summary.
+
+        The summary is dropped if it does not match the history anymore, for example
+        because a covered message was edited or deleted.
+        """
+        covered = self.summary_state.get("covered", 0)
+        if not self.summary_state.get("summary") or not isinstance(covered, int) or covered <= 0:
+            self._reset_summary()
+            return 0
+        window = self.summary_state.get("hashes", [])
+        if covered > recent_start or window != self._hash_window(history, covered):
+            self._reset_summary()
+            return 0
+        return covered
+
+    def _reset_summary(self):
+        if self.summary_state:
+            self.summary_state = {}
+
+    def _update_rolling_summary(self, original_history: list[dict], history: list[dict], start: int, end: int) -> bool:
+        """Fold the messages from start to end into the rolling summary.
+
+        Args:
+            original_history: history passed to trim, used to hash the covered messages
+            history: history with truncated tool outputs, used to summarize
+            start: first message not covered by the summary
+            end: index after the last message to cover
+
+        Returns:
+            bool: True if the summary was updated
+        """
+        updated = self._summarize_dropped(history[start:end], self.summary_state.get("summary", "") if start > 0 else "")
+        if not updated:
+            return False
+        self.summary_state = {
+            "summary": updated,
+            "covered": end,
+            "hashes": self._hash_window(original_history, end),
+        }
+        return True
+
+    def _hash_window(self, history: list[dict], covered: int) -> list[str]:
+        """Hashes of the last covered messages"""
+        return [self._message_hash(m) for m in history[max(0, covered - self.SUMMARY_HASH_WINDOW):covered]]
+
+    @staticmethod
+    def _format_summary(summary: str) -> str:
+        return f"[Previous conversation summary]\n{summary}"
+
+    @staticmethod
+    def _message_hash(message: dict) -> str:
+        """Stable hash of a message, persisted with the rolling summary"""
+        content = message.get("User", "") + "\0" + message.get("Message", "")
+        return hashlib.sha1(content.encode("utf-8", "replace")).hexdigest()[:16]
+
+    def _summarize_dropped(self, messages: list[dict], summary: str = "") -> str:
+        """Use the LLM to summarize dropped messages, updating an existing summary if given."""
         try:
             formatted = []
             for msg in messages:
@@ -226,7 +341,10 @@ class ContextManager:
             if not messages_text.strip():
                 return ""
 
-            prompt = SUMMARIZE_PROMPT.format(messages=messages_text)
+            if summary:
+                prompt = UPDATE_SUMMARY_PROMPT.format(summary=summary, messages=messages_text)
+            else:
+                prompt = SUMMARIZE_PROMPT.format(messages=messages_text)
             summary = self.llm_handler.generate_text(prompt)
             summary = remove_thinking_blocks(summary).strip()
             return summary
@@ -290,12 +290,9 @@ def find_tool_calls(text: str) -> List[MessageChunk]:
         
         if start_index < last_end:
             continue
-        
-        if start_index > last_end:
-            chunks.append(MessageChunk(type="text", text=text[last_end:start_index]))
             
         stack = 0
-        found = False
+        tool_obj = None
         for i in range(start_index, len(text)):
             if text[i] == '{':
                 stack += 1
@@ -306,34 +303,28 @@ def find_tool_calls(text: str) -> List[MessageChunk]:
                     # Use shared helper to validate
                     tool_obj = parse_potential_tool_json(candidate)
                     if tool_obj:
-                        tool_name = tool_obj.get("name", tool_obj.get("tool", tool_obj.get("function")))
-                        tool_args = tool_obj.get("arguments", tool_obj.get("arguements", tool_obj.get("parameters", {})))
-                        
-                        chunks.append(MessageChunk(
-                            type="tool_call",
-                            text=candidate,
-                            tool_name=tool_name,
-                            tool_args=tool_args
-                        ))
-                        last_end = i + 1
-                        found = True
+                        end = i + 1
                         break
         
-        if not found and stack > 0:
+        if not tool_obj and stack > 0:
             candidate = text[start_index:] + "}" * stack
             tool_obj = parse_potential_tool_json(candidate)
-            if tool_obj:
-                tool_name = tool_obj.get("name", tool_obj.get("tool", tool_obj.get("function")))
-                tool_args = tool_obj.get("arguments", tool_obj.get("arguements", tool_obj.get("parameters", {})))
-                
-                chunks.append(MessageChunk(
-                    type="tool_call",
-                    text=candidate,
-                    tool_name=tool_name,
-                    tool_args=tool_args
-                ))
-                last_end = len(text)
-                found = True
+            end = len(text)
+
+        if tool_obj:
+            # Text before the tool call, kept in the remainder if the JSON is not a tool call
+            if start_index > last_end:
+                chunks.append(MessageChunk(type="text", text=text[last_end:start_index]))
+            tool_name = tool_obj.get("name", tool_obj.get("tool", tool_obj.get("function")))
+            tool_args = tool_obj.get("arguments", tool_obj.get("arguements", tool_obj.get("parameters", {})))
+            
+            chunks.append(MessageChunk(
+                type="tool_call",
+                text=candidate,
+                tool_name=tool_name,
+                tool_args=tool_args
+            ))
+            last_end = end
 
     if last_end < len(text):
         chunks.append(MessageChunk(type="text", text=text[last_end:]))
@@ -349,7 +340,21 @@ def get_message_chunks(message: str, allow_latex: bool = True) -> List[MessageCh
     Main function to parse message into chunks.
     Priority: Thinking Blocks OR CodeBlocks (by order of appearance) -> Naked Tools -> Markdown/Latex.
     """
+    flat_chunks, _, _ = _get_flat_chunks(message, allow_latex)
+    return _group_inline_chunks(flat_chunks)
+
+
+def _get_flat_chunks(message: str, allow_latex: bool) -> tuple[List[MessageChunk], int, int]:
+    """
+    Parse a message into ungrouped chunks.
+
+    Returns:
+        The chunks, the end of the last closed code or thinking block (0 if none)
+        and the start of the unclosed block at the end of the message (its length if none).
+    """
     flat_chunks = []
+    closed_end = 0
+    open_start = len(message)
     
     # We will iterate through the message looking for the next "Major" chunk
     # Major chunks are: CodeBlocks, ThinkingBlocks.
@@ -421,6 +426,13 @@ def get_message_chunks(message: str, allow_latex: bool = True) -> List[MessageCh
                     ))
                 else:
                     flat_chunks.append(MessageChunk(type="codeblock", text=code_content, lang=lang))
+
+            # Blocks closed by their end tag can not change when text is appended
+            content_group = 1 if match_type == "think" else 2
+            if next_match.end(content_group) < end:
+                closed_end = end
+            else:
+                open_start = start
             
             pos = end
         else:
@@ -435,7 +447,7 @@ def get_message_chunks(message: str, allow_latex: bool = True) -> List[MessageCh
                         flat_chunks.extend(process_text_segment(chunk.text, allow_latex))
             pos = length
 
-    return _group_inline_chunks(flat_chunks)
+    return flat_chunks, closed_end, open_start
 
 
 def _group_inline_chunks(flat_chunks: List[MessageChunk]) -> List[MessageChunk]:
@@ -503,3 +515,121 @@ def _group_inline_chunks(flat_chunks: List[MessageChunk]) -> List[MessageChunk]:
     _finalize_sequence()
 
     return [c for c in grouped_chunks if c.type != "text" or c.text != ""]
+
+
+# ============================================================
+# Incremental Parsing
+# ============================================================
+
+# Blank lines between two lines of text, where the text can be split
+_PARAGRAPH_BREAK_PATTERN = re.compile(r'(?<=[^\n])\n{2,}(?=[^\n])')
+
+# Line of plain text, parsed as a standalone text chunk whatever follows it
+_PLAIN_LINE_PATTERN = re.compile(r'[^\n|$\\{}<>`]*\w[^\n|$\\{}<>`]*')
+
+# Plain line put in front of the unfinalized text when it starts after a paragraph break
+_SENTINEL_LINE = "x"
+
+
+class MessageChunker:
+    """
+    Incremental version of get_message_chunks for messages that are being streamed.
+
+    Chunks that can not change anymore are parsed once: the text up to the last closed
+    code or thinking block, or up to the last paragraph break after a line of plain text.
+    Only the text after it is parsed again on every update. The result is always the
+    same as get_message_chunks on the whole message.
+    """
+
+    def __init__(self, allow_latex: bool = True):
+        self.allow_latex = allow_latex
+        self.reset()
+
+    def reset(self):
+        """Forget the message parsed so far"""
+        self.message = ""
+        # Chunks of message[:self.pos]
+        self.final_chunks: List[MessageChunk] = []
+        self.pos = 0
+        # Text parsed in front of message[self.pos:] to get the same chunks as in the whole message
+        self.prefix = ""
+        self.tail_chunks: List[MessageChunk] = []
+
+    def feed(self, delta: str) -> List[MessageChunk]:
+        """Append text to the message
+
+        Args:
+            delta: text to append
+
+        Returns:
+            List[MessageChunk]: chunks of the whole message
+        """
+        return self.update(self.message + delta)
+
+    def update(self, message: str) -> List[MessageChunk]:
+        """Set the whole message, only the part after the finalized chunks is parsed again
+
+        Args:
+            message: the message, it is parsed from scratch if it does not start with the previous one
+
+        Returns:
+            List[MessageChunk]: chunks of the whole message
+        """
+        if message == self.message:
+            return self.get_chunks()
+        if not message.startswith(self.message):
+            self.reset()
+        self.message = message
+        tail = self.prefix + message[self.pos:]
+        flat_chunks, closed_end, open_start = _get_flat_chunks(tail, self.allow_latex)
+
+        split, prefix = self._find_paragraph_split(tail, closed_end, open_start)
+        if split is None and closed_end > len(self.prefix):
+            split, prefix = closed_end, ""
+        if split is not None:
+            self.final_chunks.extend(self._parse(tail[:split]))
+            self.pos += split - len(self.prefix)
+            self.prefix = prefix
+            tail = prefix + message[self.pos:]
+            flat_chunks, _, _ = _get_flat_chunks(tail, self.allow_latex)
+
+        self.tail_chunks = _group_inline_chunks(flat_chunks)[1 if self.prefix else 0:]
+        return self.get_chunks()
+
+    def get_chunks(self) -> List[MessageChunk]:
+        """Get the chunks of the message parsed so far"""
+        return self.final_chunks + self.tail_chunks
+
+    def _parse(self, text: str) -> List[MessageChunk]:
+        flat_chunks, _, _ = _get_flat_chunks(text, self.allow_latex)
+        # Drop the chunk of the sentinel line
+        return _group_inline_chunks(flat_chunks)[1 if self.prefix else 0:]
+
+    def _find_paragraph_split(self, tail: str, start: int, end: int) -> tuple[Optional[int], str]:
+        """Find the last paragraph break in the text after the last closed block
+
+        Text before the break can not span over it as long as it has no display latex
+        or tool call, and the line before the break is parsed the same way as the sentinel.
+
+        Returns:
+            tuple[Optional[int], str]: position after the break, or None, and the prefix to parse the text after it with
+        """
+        limit = end
+        for pattern in ("$$", "\\["):
+            index = tail.find(pattern, start, end)
+            if index != -1:
+                limit = min(limit, index)
+        tool_match = _TOOL_START_PATTERN.search(tail, start, end)
+        if tool_match:
+            limit = min(limit, tool_match.start())
+
+        split = None
+        for match in _PARAGRAPH_BREAK_PATTERN.finditer(tail, start, limit):
+            if match.end() >= limit:
+                break
+            line_start = tail.rfind("\n", 0, match.start()) + 1
+            if _PLAIN_LINE_PATTERN.fullmatch(tail, line_start, match.start()):
+                split = match
+        if split is None or split.end() <= len(self.prefix):
+            return None, ""
+        return split.end(), _SENTINEL_LINE + split.group(0)
@@ -3,6 +3,9 @@ import html
 import xml 
 import xml.dom.minidom
 import json
+import functools
+import threading
+from collections import OrderedDict
 from gi.repository import GLib
 import tiktoken
 from .media import extract_file, extract_image, extract_video
@@ -79,18 +82,40 @@ def clean_message_tts(text: str) -> str:
 
     return text
 
+TOKEN_COUNT_CACHE_SIZE = 32768
+_token_count_cache = OrderedDict()
+_token_count_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """
+    Get the tiktoken encoding for a model, cached for the whole process
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
 def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
     """
-    Count the number of tokens in a string
+    Count the number of tokens in a string.
+    Counts are memoized by content, so unchanged messages are never tokenized again
     """
+    key = (model, len(text), hash(text))
+    with _token_count_lock:
+        count = _token_count_cache.get(key)
+        if count is not None:
+            _token_count_cache.move_to_end(key)
+            return count
     try:
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            encoding = tiktoken.get_encoding("cl100k_base")
-        return len(encoding.encode(text))
+        count = len(get_encoding(model).encode(text, disallowed_special=()))
     except Exception:
         return len(text) // 4
+    with _token_count_lock:
+        _token_count_cache[key] = count
+        if len(_token_count_cache) > TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+    return count
 
 def quote_string(s):
     if "'" in s:
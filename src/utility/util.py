@@ -3,6 +3,9 @@ import time
 import json
 import re
 import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 
 
 def _normalize_arguments_for_id(arguments) -> str:
@@ -358,6 +361,53 @@ def extract_tools_from_prompts(prompts: list[str], remove_tool_prompt: bool = Tr
                 new_prompts.append(prompt)
     return tools_json, new_prompts
 
+CONVERSION_CACHE_SIZE = 8192
+_conversion_cache = OrderedDict()
+_conversion_lock = threading.Lock()
+
+
+def _convert_message_openai(message: dict, vision_support: bool, native_tool_calling: bool) -> tuple:
+    """Convert a Newelle message without looking at the rest of the history.
+
+    Conversions are memoized by UUID and content, so unchanged messages are
+    parsed only once across requests. The ids of native tool calls are
+    resolved later against the Console rows that follow the message, and
+    images are encoded at every request so that the memo stays small.
+
+    Returns:
+        ``(kind, data)``: ``("tool", (name, id, content))``,
+        ``("tool_calls", (text_part, tool_calls))``, ``("image", (text, image))``
+        where image is the content of the image codeblock, or ``("text", (role, content))``
+    """
+    role = message["User"]
+    text = message["Message"]
+    key = (message.get("UUID"), role, text, vision_support and role == "User", native_tool_calling)
+    with _conversion_lock:
+        converted = _conversion_cache.get(key)
+        if converted is not None:
+            _conversion_cache.move_to_end(key)
+            return converted
+    converted = None
+    if role == "Console":
+        parsed = parse_tool_console_message(text) if native_tool_calling else None
+        converted = ("tool", parsed) if parsed is not None else ("text", ("user", "Console: " + text))
+    elif native_tool_calling and role == "Assistant":
+        parsed_calls = parse_assistant_native_tool_calls(text, [], arguments_as_json_string=True)
+        if parsed_calls is not None:
+            converted = ("tool_calls", parsed_calls[:2])
+    if converted is None:
+        image, image_text = extract_image(text)
+        if vision_support and image is not None and role == "User":
+            converted = ("image", (image_text, image))
+        else:
+            converted = ("text", ("user" if role == "User" else "assistant", text))
+    with _conversion_lock:
+        _conversion_cache[key] = converted
+        if len(_conversion_cache) > CONVERSION_CACHE_SIZE:
+            _conversion_cache.popitem(last=False)
+    return converted
+
+
 def convert_history_openai(history: list, prompts: list, vision_support : bool = False, native_tool_calling: bool = True):
     """Converts Newelle history into OpenAI format
 
@@ -372,57 +422,62 @@ def convert_history_openai(history: list, prompts: list, vision_support : bool =
     result = []
     if len(prompts) > 0:
         result.append({"role": "system", "content": "\n".join(prompts)})
-    
-    for msg_idx, message in enumerate(history):
-        if message["User"] == "Console":
-            parsed = parse_tool_console_message(message["Message"]) if native_tool_calling else None
-            if parsed is not None:
-                tool_name, tool_id, tool_content = parsed
-                result.append({
-                    "role": "tool",
-                    "name": tool_name,
-                    "tool_call_id": tool_id,
-                    "content": tool_content,
-                })
-            else:
-                result.append({
-                    "role": "user",
-                    "content": "Console: " + message["Message"],
+
+    conversions = [_convert_message_openai(message, vision_support, native_tool_calling) for message in history]
+    # Tool name -> history indices and ids of its Console rows, see parse_assistant_native_tool_calls
+    console_rows = {}
+    for msg_idx, (kind, data) in enumerate(conversions):
+        if kind == "tool":
+            indices, ids = console_rows.setdefault(data[0], ([], []))
+            indices.append(msg_idx)
+            ids.append(data[1])
+
+    for msg_idx, (kind, data) in enumerate(conversions):
+        if kind == "tool":
+            tool_name, tool_id, tool_content = data
+            result.append({
+                "role": "tool",
+                "name": tool_name,
+                "tool_call_id": tool_id,
+                "content": tool_content,
+            })
+        elif kind == "tool_calls":
+            text_part, parsed_calls = data
+            # The n-th call of a tool takes the id of the n-th Console row of that tool after the message
+            occurrences = {}
+            tool_calls = []
+            for tool_call in parsed_calls:
+                tool_name = tool_call["function"]["name"]
+                tool_id = tool_call["id"]
+                if tool_name in console_rows:
+                    indices, ids = console_rows[tool_name]
+                    position = bisect_right(indices, msg_idx) + occurrences.get(tool_name, 0)
+                    if position < len(ids):
+                        tool_id = ids[position]
+                        occurrences[tool_name] = occurrences.get(tool_name, 0) + 1
+                tool_calls.append({
+                    "id": tool_id,
+                    "type": "function",
+                    "function": dict(tool_call["function"]),
                 })
+            result.append({"role": "assistant", "content": text_part or "", "tool_calls": tool_calls})
+        elif kind == "image":
+            text, image = data
+            result.append({
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": text
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": get_image_base64(image)}
+                    }
+                ],
+            })
         else:
-            if native_tool_calling and message["User"] == "Assistant":
-                console_msgs = [(i, m) for i, m in enumerate(history[msg_idx + 1:], msg_idx + 1) if m["User"] == "Console"]
-                parsed_calls = parse_assistant_native_tool_calls(
-                    message["Message"], console_msgs, arguments_as_json_string=True
-                )
-                if parsed_calls is not None:
-                    text_part, tool_calls, _ = parsed_calls
-                    ast_msg: dict = {"role": "assistant", "content": text_part or ""}
-                    ast_msg["tool_calls"] = tool_calls
-                    result.append(ast_msg)
-                    continue
-
-            image, text = extract_image(message["Message"])
-            if vision_support and image is not None and message["User"] == "User":
-                image = get_image_base64(image)
-                result.append({
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": text
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": image}
-                        }
-                    ],
-                })
-            else:
-                result.append({
-                    "role": "user" if message["User"] == "User" else "assistant",
-                    "content": message["Message"]
-                })
+            result.append({"role": data[0], "content": data[1]})
     return aggregate_messages(result, "openai")
 
 def aggregate_messages(messages: list, format="newelle"):
@@ -1,6 +1,4 @@
-import math
-import struct
-import array
+import numpy as np
 
 try:
     from pysilero_vad import SileroVoiceActivityDetector
@@ -9,6 +7,58 @@ except ImportError:
     DEPENDENCIES_AVAILABLE = False
 
 
+def pcm_energy(audio_data: bytes) -> float:
+    """Calculate the normalized RMS energy of 16-bit PCM audio
+
+    Args:
+        audio_data: Raw audio bytes (16-bit little endian PCM)
+
+    Returns:
+        RMS energy (0.0 to 1.0)
+    """
+    count = len(audio_data) // 2
+    if count == 0:
+        return 0.0
+    # View the buffer without copying it, trailing odd bytes are ignored
+    samples = np.frombuffer(audio_data, dtype="<i2", count=count).astype(np.float32)
+    return float(np.sqrt(np.dot(samples, samples) / count)) / 32768.0
+
+
+class NoiseFloor:
+    """Running average of the energy of the last non-speech frames"""
+
+    def __init__(self, size: int = 50):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, energy: float):
+        """Add the energy of a frame, replacing the oldest one when full"""
+        if self._count == len(self._samples):
+            self._sum -= self._samples[self._index]
+        else:
+            self._count += 1
+        self._samples[self._index] = energy
+        self._sum += energy
+        self._index = (self._index + 1) % len(self._samples)
+
+    def mean(self) -> float:
+        """Get the average energy of the stored frames"""
+        if self._count == 0:
+            return 0.0
+        return max(0.0, self._sum / self._count)
+
+    def reset(self):
+        self._samples.fill(0)
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+
+
 class VoiceActivityDetector:
     """Unified Voice Activity Detector using Silero VAD with energy-based fallback
     
@@ -30,8 +80,7 @@ class VoiceActivityDetector:
         self._is_speaking = False
         
         self._noise_floor = 0.01
-        self._noise_samples = []
-        self._max_noise_samples = 50
+        self._noise_samples = NoiseFloor(50)
         
         self._try_load_silero()
     
@@ -64,28 +113,17 @@ class VoiceActivityDetector:
     
     def _calculate_energy(self, audio_data: bytes) -> float:
         """Calculate RMS energy of audio chunk"""
-        if len(audio_data) == 0:
-            return 0
-        count = len(audio_data) // 2
-        if count == 0:
-            return 0
-        format_str = "<" + str(count) + "h"
         try:
-            shorts = struct.unpack(format_str, audio_data)
-            normalized = [s / 32768.0 for s in shorts]
-            rms = math.sqrt(sum(s * s for s in normalized) / len(normalized))
-            return rms
+            return pcm_energy(audio_data)
         except Exception:
             return 0
     
     def _update_noise_floor(self, energy: float):
         """Update adaptive noise floor"""
         if not self._is_speaking and energy < self._energy_threshold * 2:
-            self._noise_samples.append(energy)
-            if len(self._noise_samples) > self._max_noise_samples:
-                self._noise_samples.pop(0)
+            self._noise_samples.add(energy)
             if len(self._noise_samples) >= 10:
-                self._noise_floor = sum(self._noise_samples) / len(self._noise_samples)
+                self._noise_floor = self._noise_samples.mean()
                 self._energy_threshold = max(0.01, self._noise_floor * 2.5)
     
     def is_speech(self, frame: bytes) -> bool:
@@ -99,11 +137,12 @@ class VoiceActivityDetector:
         """
         return self.get_speech_probability(frame) >= 0.5
     
-    def get_speech_probability(self, frame: bytes) -> float:
+    def get_speech_probability(self, frame: bytes, energy: float | None = None) -> float:
         """Get speech probability for a single audio frame
         
         Args:
             frame: Raw audio bytes (16-bit PCM)
+            energy: Energy of the frame if already known, see pcm_energy
             
         Returns:
             Probability value (0.0 to 1.0), 0.5+ means speech detected
@@ -114,7 +153,8 @@ class VoiceActivityDetector:
             except Exception:
                 pass
         
-        energy = self._calculate_energy(frame)
+        if energy is None:
+            energy = self._calculate_energy(frame)
         self._update_noise_floor(energy)
         if energy > self._energy_threshold:
             return 0.8
@@ -167,6 +207,6 @@ class VoiceActivityDetector:
         self._speech_frame_count = 0
         self._silence_frame_count = 0
         self._is_speaking = False
-        self._noise_samples = []
+        self._noise_samples.reset()
         self._noise_floor = 0.01
         self._energy_threshold = 0.015
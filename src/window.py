@@ -227,6 +227,15 @@ class MainWindow(Adw.ApplicationWindow):
         )
         self.chats_secondary_box.append(self.chat_panel_header)
         self.chat_panel_header.pack_end(menu_button)
+
+        # Search across the messages of all the chats
+        self.chats_search_entry = Gtk.SearchEntry(
+            placeholder_text=_("Search Chats..."), margin_start=12, margin_end=12, margin_bottom=6
+        )
+        self.chats_search_entry.connect("search-changed", self.on_chats_search_changed)
+        self.chats_search_entry.connect("stop-search", lambda entry: entry.set_text(""))
+        self.chats_secondary_box.append(self.chats_search_entry)
+        self.chats_search_serial = 0
         
         # Chat list with navigation-sidebar styling for Adwaita look
         self.chats_buttons_block = Gtk.ListBox(css_classes=["navigation-sidebar"])
@@ -236,7 +245,21 @@ class MainWindow(Adw.ApplicationWindow):
             Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC
         )
         self.chats_buttons_scroll_block.set_child(self.chats_buttons_block)
-        self.chats_secondary_box.append(self.chats_buttons_scroll_block)
+        # Built by update_history
+        self.chats_list_box = None
+        self.chats_rows = []
+        self.chats_search_results = Gtk.ListBox(css_classes=["navigation-sidebar"])
+        self.chats_search_results.set_placeholder(
+            Gtk.Label(label=_("No messages found"), css_classes=["dim-label"], margin_top=12)
+        )
+        self.chats_search_results.connect("row-activated", self.on_chats_search_result_activated)
+        chats_search_scroll_block = Gtk.ScrolledWindow(vexpand=True)
+        chats_search_scroll_block.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        chats_search_scroll_block.set_child(self.chats_search_results)
+        self.chats_stack = Gtk.Stack(vexpand=True)
+        self.chats_stack.add_named(self.chats_buttons_scroll_block, "chats")
+        self.chats_stack.add_named(chats_search_scroll_block, "search")
+        self.chats_secondary_box.append(self.chats_stack)
         
         # Bottom button bar: New Chat + New Folder
         bottom_buttons = Gtk.Box(
@@ -290,7 +313,7 @@ class MainWindow(Adw.ApplicationWindow):
         self.chat_tabs = Adw.TabView()
         self.chat_tabs.connect("notify::selected-page", self._on_chat_tab_switched)
         self.chat_tabs.connect("close-page", self._on_chat_tab_close_requested)
-        self.chat_tabs.connect("page-detached", lambda *_: self.update_history())
+        self.chat_tabs.connect("page-detached", self._on_chat_tab_detached)
         
         # Tab bar - shows tabs when more than one is open
         self.chat_tab_bar = Adw.TabBar(autohide=True, view=self.chat_tabs, css_classes=["inline"])
@@ -641,9 +664,15 @@ class MainWindow(Adw.ApplicationWindow):
                 # Just switch to a new chat tab instead of closing
                 self.new_chat(None)
                 return True  # Prevent close, we'll handle it via new_chat
+            # Release the chat so its messages can be unloaded, tabs moved to another window keep it
+            child.controller.unpin_chat(child.chat_id)
         
         return False  # Allow close
     
+    def _on_chat_tab_detached(self, tab_view, page, position):
+        """Update the history when a tab is closed or moved to another window."""
+        self.update_history()
+
     def _on_create_chat_tab(self, tab_overview) -> Adw.TabPage:
         """Handle new tab creation from tab overview."""
         # Create a new chat and force open it in a new tab
@@ -2011,10 +2040,10 @@ class MainWindow(Adw.ApplicationWindow):
                 message_label = tab.chat_history.get_file_button(path)
                 if os.path.isdir(path):
                     tab.chat.append({"User": "Folder", "Message": " " + path})
-                    tab.chat_history.add_message("Folder", message_label)
+                    tab.chat_history.add_message("Folder", message_label, id_message=len(tab.chat) - 1)
                 else:
                     tab.chat.append({"User": "File", "Message": " " + path})
-                    tab.chat_history.add_message("File", message_label)
+                    tab.chat_history.add_message("File", message_label, id_message=len(tab.chat) - 1)
                 self.chats[tab.chat_id]["chat"] = tab.chat
                 tab.chat_history.hide_placeholder()
             else:
@@ -2137,27 +2166,16 @@ class MainWindow(Adw.ApplicationWindow):
             t.start()
 
     def update_history(self):
-        """Reload chats panel with Adwaita-styled ChatRow/FolderRow widgets, supporting folders and branching"""
-        self.focus_input()
-
-        list_box = Gtk.ListBox(css_classes=["navigation-sidebar"])
-        list_box.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.chats_list_box = list_box
-        self.chats_buttons_scroll_block.set_child(list_box)
+        """Update chats panel with Adwaita-styled ChatRow/FolderRow widgets, supporting folders and branching
 
-        list_box.connect("row-activated", self.on_chat_row_activated)
-
-        middle_click_gesture = Gtk.GestureClick()
-        middle_click_gesture.set_button(2)
-        middle_click_gesture.connect("pressed", self._on_chat_row_middle_clicked, list_box)
-        list_box.add_controller(middle_click_gesture)
+        Rows are described by plain tuples and compared with the rows shown, only the rows that
+        changed are created or removed.
+        """
+        self.focus_input()
 
-        # Drop target on the list box itself to remove a chat from its folder
-        unfolder_drop = Gtk.DropTarget.new(GObject.TYPE_STRING, Gdk.DragAction.MOVE)
-        unfolder_drop.connect("enter", self._on_unfolder_drop_enter)
-        unfolder_drop.connect("leave", self._on_unfolder_drop_leave)
-        unfolder_drop.connect("drop", self._on_unfolder_drop)
-        list_box.add_controller(unfolder_drop)
+        list_box = self.chats_list_box
+        if list_box is None:
+            list_box = self._build_chats_list_box()
 
         # Build hierarchy map
         id_to_chat_id = {chat.get("id"): cid for cid, chat in self.chats.items()}
@@ -2185,31 +2203,26 @@ class MainWindow(Adw.ApplicationWindow):
         if self.controller.newelle_settings.reverse_order:
             top_level_ids.reverse()
 
+        open_chat_ids = set()
+        for i in range(self.chat_tabs.get_n_pages()):
+            child = self.chat_tabs.get_nth_page(i).get_child()
+            if isinstance(child, ChatTab):
+                open_chat_ids.add(child.chat_id)
+
+        # Rows to show, as (key, arguments of the row)
+        specs = []
+        # Times each chat is shown, a branch can also be in a folder
+        occurrences = {}
+
         def add_chat_recursive(chat_id, level=0):
             if chat_id not in self.chats:
                 return
             chat_entry = self.chats[chat_id]
-            name = chat_entry["name"]
-            is_selected = (chat_id == self.chat_id)
-            is_open = self.get_tab_for_chat(chat_id) is not None
-
-            chat_row = ChatRow(
-                chat_name=name,
-                chat_index=chat_id,
-                is_selected=is_selected,
-                level=level,
-                is_open=is_open
-            )
-            chat_row.connect_signals(
-                on_generate=self.generate_chat_name,
-                on_edit=lambda btn, row=chat_row: self.edit_chat_name(btn, row.get_edit_stack()),
-                on_clone=self.copy_chat,
-                on_delete=self.remove_chat
-            )
-            list_box.append(chat_row)
-            if is_selected:
-                list_box.select_row(chat_row)
-
+            occurrences[chat_id] = occurrences.get(chat_id, 0) + 1
+            specs.append((
+                ("chat", chat_id, occurrences[chat_id]),
+                (chat_entry["name"], chat_id == self.chat_id, level, chat_id in open_chat_ids)
+            ))
             entry_uuid = chat_entry.get("id")
             if entry_uuid in children_map:
                 for child_id in children_map[entry_uuid]:
@@ -2217,27 +2230,151 @@ class MainWindow(Adw.ApplicationWindow):
 
         # Render folders first
         for fid, folder in self.controller.folders.items():
-            folder_row = FolderRow(
-                folder_id=fid,
-                folder_name=folder["name"],
-                folder_color=folder.get("color", "#3584e4"),
-                folder_icon=folder.get("icon", "folder-symbolic"),
-                expanded=folder.get("expanded", True),
-            )
-            folder_row.connect_signals(
-                on_edit=lambda btn, f_id=fid: self._edit_folder(f_id),
-                on_delete=lambda btn, f_id=fid: self._delete_folder(f_id),
-                on_drop_chat=self._on_chat_dropped_on_folder,
-            )
-            list_box.append(folder_row)
-
-            if folder.get("expanded", True):
+            expanded = folder.get("expanded", True)
+            specs.append((
+                ("folder", fid, 1),
+                (folder["name"], folder.get("color", "#3584e4"), folder.get("icon", "folder-symbolic"), expanded)
+            ))
+            if expanded:
                 for cid in folder.get("chat_ids", []):
                     add_chat_recursive(cid, level=1)
 
         # Render top-level (unfoldered) chats
         for cid in top_level_ids:
             add_chat_recursive(cid)
+
+        self._update_chats_list_box(list_box, specs)
+
+    def on_chats_search_changed(self, entry: Gtk.SearchEntry):
+        """Search the messages of all the chats in a thread, the chats list is shown when the query is empty"""
+        self.chats_search_serial += 1
+        query = entry.get_text().strip()
+        if not query:
+            self.chats_stack.set_visible_child_name("chats")
+            return
+        serial = self.chats_search_serial
+
+        def search():
+            results = self.controller.search_chats(query, 50)
+            GLib.idle_add(self._show_chats_search_results, results, serial)
+
+        threading.Thread(target=search, daemon=True).start()
+
+    def _show_chats_search_results(self, results: list[dict], serial: int):
+        if serial != self.chats_search_serial:
+            # The query changed in the meantime
+            return False
+        self.chats_search_results.remove_all()
+        for result in results:
+            row = Adw.ActionRow(
+                title=result["chat_name"], subtitle=result["snippet"], subtitle_lines=2,
+                use_markup=False, activatable=True
+            )
+            row.chat_id = result["chat_id"]
+            self.chats_search_results.append(row)
+        self.chats_stack.set_visible_child_name("search")
+        return False
+
+    def on_chats_search_result_activated(self, list_box: Gtk.ListBox, row: Gtk.ListBoxRow):
+        self.chose_chat(row.chat_id)
+
+    def _build_chats_list_box(self) -> Gtk.ListBox:
+        """Create the list box of the chats panel, its rows are added by update_history"""
+        list_box = Gtk.ListBox(css_classes=["navigation-sidebar"])
+        list_box.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self.chats_list_box = list_box
+        self.chats_rows = []
+        self.chats_buttons_scroll_block.set_child(list_box)
+
+        list_box.connect("row-activated", self.on_chat_row_activated)
+
+        middle_click_gesture = Gtk.GestureClick()
+        middle_click_gesture.set_button(2)
+        middle_click_gesture.connect("pressed", self._on_chat_row_middle_clicked, list_box)
+        list_box.add_controller(middle_click_gesture)
+
+        # Drop target on the list box itself to remove a chat from its folder
+        unfolder_drop = Gtk.DropTarget.new(GObject.TYPE_STRING, Gdk.DragAction.MOVE)
+        unfolder_drop.connect("enter", self._on_unfolder_drop_enter)
+        unfolder_drop.connect("leave", self._on_unfolder_drop_leave)
+        unfolder_drop.connect("drop", self._on_unfolder_drop)
+        list_box.add_controller(unfolder_drop)
+        return list_box
+
+    def _update_chats_list_box(self, list_box: Gtk.ListBox, specs: list):
+        """Show the given rows in the chats panel, keeping the rows that did not change
+
+        Args:
+            list_box: list box of the chats panel
+            specs: rows to show, as (key, arguments of the row)
+        """
+        wanted = dict(specs)
+        # Rows that are kept, in their current order
+        kept = []
+        for spec, row in self.chats_rows:
+            if wanted.get(spec[0]) == spec[1]:
+                kept.append((spec, row))
+            else:
+                list_box.remove(row)
+        kept_keys = [spec[0] for spec, row in kept]
+
+        rows = []
+        j = 0
+        for position, spec in enumerate(specs):
+            if j < len(kept) and kept_keys[j] == spec[0]:
+                rows.append(kept[j])
+                j += 1
+                continue
+            if spec[0] in kept_keys[j:]:
+                # Moved row, it is created again at its new position
+                k = kept_keys.index(spec[0], j)
+                list_box.remove(kept[k][1])
+                del kept[k]
+                del kept_keys[k]
+            row = self._create_chats_panel_row(spec)
+            list_box.insert(row, position)
+            rows.append((spec, row))
+        self.chats_rows = rows
+
+        for spec, row in rows:
+            if spec[0][0] == "chat" and spec[1][1]:
+                list_box.select_row(row)
+                break
+        else:
+            list_box.unselect_all()
+
+    def _create_chats_panel_row(self, spec: tuple) -> Gtk.ListBoxRow:
+        (kind, item_id, _occurrence), args = spec
+        if kind == "folder":
+            name, color, icon, expanded = args
+            folder_row = FolderRow(
+                folder_id=item_id,
+                folder_name=name,
+                folder_color=color,
+                folder_icon=icon,
+                expanded=expanded,
+            )
+            folder_row.connect_signals(
+                on_edit=lambda btn, f_id=item_id: self._edit_folder(f_id),
+                on_delete=lambda btn, f_id=item_id: self._delete_folder(f_id),
+                on_drop_chat=self._on_chat_dropped_on_folder,
+            )
+            return folder_row
+        name, is_selected, level, is_open = args
+        chat_row = ChatRow(
+            chat_name=name,
+            chat_index=item_id,
+            is_selected=is_selected,
+            level=level,
+            is_open=is_open
+        )
+        chat_row.connect_signals(
+            on_generate=self.generate_chat_name,
+            on_edit=lambda btn, row=chat_row: self.edit_chat_name(btn, row.get_edit_stack()),
+            on_clone=self.copy_chat,
+            on_delete=self.remove_chat
+        )
+        return chat_row
     
     def on_chat_row_activated(self, listbox, row):
         """Handle chat/folder row activation"""
@@ -2876,7 +3013,7 @@ class MainWindow(Adw.ApplicationWindow):
     def _on_attach_clicked(self, browser):
         text = "```website\n" + browser.get_current_url() + "\n```"
         self.chat.append({"User": "User", "Message": text})
-        self.chat_history.show_message(text, False, is_user=True)
+        self.chat_history.show_message(text, False, id_message=len(self.chat) - 1, is_user=True)
     
     def add_explorer_tab(self, tabview=None, path=None):
         """Add an explorer tab
@@ -2960,7 +3097,7 @@ class MainWindow(Adw.ApplicationWindow):
     def add_file_to_chat(self, widget, path):
         message_label = self.chat_history.get_file_button(path)
         self.chat.append({"User": "File", "Message": " " + path})
-        self.chat_history.add_message("File", message_label)
+        self.chat_history.add_message("File", message_label, id_message=len(self.chat) - 1)
         self.chats[self.chat_id]["chat"] = self.chat
 
     def _on_editor_modified(self, editor, param, tab, base_title):
@@ -3016,7 +3153,7 @@ class MainWindow(Adw.ApplicationWindow):
             GLib.idle_add(on_complete)
         else:
             chat_id = int(button.get_name())
-            if chat_id not in self.chats or len(self.chats[chat_id]["chat"]) < 2:
+            if chat_id not in self.chats or self.chats[chat_id].message_count < 2:
                 self.notification_block.add_toast(
                     Adw.Toast(title=_("Chat is empty"), timeout=2)
                 )